@@ -0,0 +1,232 @@
+"""
+api.py — Headless JSON API over queries.py
+Every get_* function is a GET endpoint named after it without the prefix,
+taking the same filters as query parameters (repeat one for a list filter):
+
+    python api.py --port 8765
+    curl "localhost:8765/kpis?start=2024-01-01&end=2024-12-31&state=Kerala&state=Goa"
+    curl "localhost:8765/state_performance?start=2024-01-01&end=2024-12-31&format=csv"
+
+All clients share result_cache (so the dashboard's results on disk too) and
+an in-memory LRU of serialized responses keyed by the same data-versioned
+key, so a repeated request is a dictionary lookup; responses carry an ETag
+and a matching If-None-Match gets 304. format=json (default) returns
+{"columns": [...], "data": [[...]]} for tables and an object for get_kpis;
+format=csv and format=arrow (Arrow IPC stream, needs pyarrow) are also
+served. GET / lists the endpoints and their parameters, /health the data
+version and cache counters.
+"""
+import argparse
+import inspect
+import json
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import database
+import queries
+from result_cache import cache_key, cache_stats, cached
+
+try:
+    import pyarrow as pa
+except ImportError:                      # Arrow output is optional
+    pa = None
+
+API_PORT          = int(os.environ.get("INDIA_OPS_API_PORT", "8765"))
+RESPONSE_CACHE    = 512   # serialized responses kept in memory
+ENDPOINTS = {name[4:]: fn for name, fn in vars(queries).items()
+             if name.startswith("get_") and callable(fn) and fn.__module__ == queries.__name__}
+FORMATS = {"json": "application/json", "csv": "text/csv; charset=utf-8",
+           "arrow": "application/vnd.apache.arrow.stream"}
+
+_responses = OrderedDict()   # (key, format) -> (etag, body)
+_responses_lock = threading.Lock()
+_api_stats = {"requests": 0, "served_from_memory": 0, "not_modified": 0, "errors": 0}
+
+
+class ApiError(ValueError):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Parameters and serialization
+# ─────────────────────────────────────────────────────────────────────────────
+def parse_params(fn, query):
+    """Query-string values -> keyword arguments of `fn` (lists for repeated keys, ints where the default is one)."""
+    params = inspect.signature(fn).parameters
+    unknown = set(query) - set(params)
+    if unknown:
+        raise ApiError(400, f"unknown parameter(s): {', '.join(sorted(unknown))}")
+    missing = [n for n, p in params.items() if p.default is inspect.Parameter.empty and n not in query]
+    if missing:
+        raise ApiError(400, f"missing parameter(s): {', '.join(missing)}")
+    kwargs = {}
+    for name, values in query.items():
+        value = values if len(values) > 1 else values[0]
+        if isinstance(params[name].default, int) and not isinstance(params[name].default, bool):
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ApiError(400, f"{name} must be an integer") from None
+        kwargs[name] = value
+    return kwargs
+
+
+def _frame(result):
+    """The result as a table; a meaningful index (e.g. cohort months) becomes a column."""
+    if not isinstance(result.index, pd.RangeIndex):
+        result = result.reset_index()
+    return result
+
+
+def _plain(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def serialize(result, fmt):
+    """Response body for a get_* result in `fmt` (json / csv / arrow)."""
+    if isinstance(result, pd.DataFrame):
+        df = _frame(result)
+        if fmt == "csv":
+            return df.to_csv(index=False).encode()
+        if fmt == "arrow":
+            sink = pa.BufferOutputStream()
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return sink.getvalue().to_pybytes()
+        return df.to_json(orient="split", index=False, date_format="iso").encode()
+    if isinstance(result, dict) and any(isinstance(v, pd.DataFrame) for v in result.values()):
+        if fmt != "json":                # e.g. get_order_breakdowns: several tables
+            raise ApiError(400, "this endpoint returns several tables: use format=json")
+        return b"{" + b",".join(json.dumps(str(k)).encode() + b":" + serialize(v, fmt)
+                                for k, v in result.items()) + b"}"
+    if isinstance(result, dict):
+        if fmt == "json":
+            return json.dumps({k: _plain(v) for k, v in result.items()}).encode()
+        return serialize(pd.DataFrame([result]), fmt)
+    raise ApiError(500, f"cannot serialize {type(result).__name__}")
+
+
+def respond(name, query):
+    """(status, content type, body, etag) for GET /<name>?<query>; the core of the server, usable without it."""
+    fn = ENDPOINTS.get(name)
+    if fn is None:
+        raise ApiError(404, f"no endpoint {name!r}")
+    fmt = query.pop("format", ["json"])[0]
+    if fmt not in FORMATS:
+        raise ApiError(400, f"format must be one of {', '.join(FORMATS)}")
+    if fmt == "arrow" and pa is None:
+        raise ApiError(406, "format=arrow needs pyarrow installed")
+    kwargs = parse_params(fn, query)
+    key = (cache_key(fn, (), kwargs)[0], fmt)
+    with _responses_lock:
+        hit = _responses.get(key)
+        if hit:
+            _responses.move_to_end(key)
+            _api_stats["served_from_memory"] += 1
+    if hit is None:
+        try:
+            body = serialize(cached(fn)(**kwargs), fmt)
+        except ApiError:
+            raise
+        except (ValueError, TypeError) as ex:     # e.g. an unparseable date
+            raise ApiError(400, str(ex)) from None
+        hit = (f'"{key[0][:20]}-{fmt}"', body)
+        with _responses_lock:
+            _responses[key] = hit
+            while len(_responses) > RESPONSE_CACHE:
+                _responses.popitem(last=False)
+    etag, body = hit
+    return 200, FORMATS[fmt], body, etag
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  HTTP server
+# ─────────────────────────────────────────────────────────────────────────────
+def _index():
+    return {"endpoints": {name: {p.name: (None if p.default is inspect.Parameter.empty else p.default)
+                                 for p in inspect.signature(fn).parameters.values()}
+                          for name, fn in sorted(ENDPOINTS.items())},
+            "formats": [f for f in FORMATS if f != "arrow" or pa is not None]}
+
+
+def _health():
+    return {"data_version": list(database.data_version()), "result_cache": cache_stats(),
+            "api": {**_api_stats, "responses_cached": len(_responses)}}
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"     # keep-alive: load generators reuse connections
+    server_version = "IndiaOpsAPI/1.0"
+    # headers + body leave in one buffered write, without Nagle's delayed-ACK stall
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        _api_stats["requests"] += 1
+        url = urlsplit(self.path)
+        name = url.path.strip("/")
+        try:
+            if name in ("", "health"):
+                body = json.dumps(_index() if name == "" else _health(), default=str).encode()
+                return self._send(200, FORMATS["json"], body)
+            status, ctype, body, etag = respond(name, parse_qs(url.query, keep_blank_values=True))
+            if self.headers.get("If-None-Match") == etag:
+                _api_stats["not_modified"] += 1
+                return self._send(304, ctype, b"", etag)
+            self._send(status, ctype, body, etag)
+        except ApiError as ex:
+            _api_stats["errors"] += 1
+            self._send(ex.status, FORMATS["json"], json.dumps({"error": str(ex)}).encode())
+        except Exception as ex:
+            _api_stats["errors"] += 1
+            self._send(500, FORMATS["json"], json.dumps({"error": f"{type(ex).__name__}: {ex}"}).encode())
+
+    def _send(self, status, ctype, body, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, fmt, *args):   # one line per request is too much under load
+        pass
+
+
+def serve(port=API_PORT, host="127.0.0.1", path=None):
+    """Start the API (blocking). Returns nothing; stop with Ctrl+C."""
+    if path:
+        database.DB_PATH = path
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    print(f"India Ops API on http://{host}:{port}/ ({len(ENDPOINTS)} endpoints, db {database.DB_PATH})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Serve queries.py as a JSON/CSV/Arrow HTTP API.")
+    ap.add_argument("--port", type=int, default=API_PORT)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--db", default=None, help=f"SQLite file (default: {database.DB_PATH})")
+    args = ap.parse_args()
+    serve(args.port, args.host, args.db)
@@ -3,6 +3,8 @@ India Customer Operations Analytics Dashboard
 Editorial / Financial Times aesthetic — no icons, no emoji.
 Fixed: state filter crash, date range 2022-2024, Gmail SMTP, YoY, cohort.
 """
+import os
+import threading
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -11,17 +13,28 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import datetime, date
 
-from database import init_db, get_connection
+from database import (init_db, get_connection, reader, pool_stats, load_replica, refresh_replica, replica_info,
+                      ensure_data_version, data_version)
 from queries import (
     get_kpis, get_revenue_trend, get_state_performance, get_category_mix,
     get_payment_analysis, get_temporal_patterns, get_customer_tiers,
     get_return_analysis, get_agent_performance, get_ticket_analytics,
     get_product_performance, get_churn_risk, get_weekly_trends,
     get_weekly_csat, get_top_customers, get_zone_comparison,
-    get_yoy_comparison, get_cohort_data
+    get_yoy_comparison, get_cohort_data, get_dimension_catalog
 )
 from alerts import detect_trends, build_email_html, send_email_alert
 from report_generator import generate_html_report
+from rollups import ensure_rollups
+from loaders import run_loaders, TAB_DATASETS, REPORT_DATASETS
+from result_cache import cached, cache_stats, CACHE_PATH
+from downsample import downsample_frame, DEFAULT_POINTS
+import prewarm
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:   # Streamlit without the scriptrunner helpers: loaders run without the script context
+    add_script_run_ctx = get_script_run_ctx = None
 
 # ── Page config ───────────────────────────────────────────────────────────────
 st.set_page_config(
@@ -96,12 +109,28 @@ div[data-testid="stDataFrame"] th { font-family:'IBM Plex Mono',monospace !impor
 """, unsafe_allow_html=True)
 
 # ── Init DB ────────────────────────────────────────────────────────────────────
+IN_MEMORY = os.environ.get("INDIA_OPS_IN_MEMORY", "0") == "1"   # serve reads from a RAM copy
+
 @st.cache_resource
 def setup():
     init_db()
+    ensure_rollups()
+    ensure_data_version()
+    if IN_MEMORY:
+        load_replica()
+    if prewarm.PREWARM_ON_START:
+        prewarm.prewarm_in_background()   # default view + each state / category into the result cache
     return True
 setup()
 
+# the data version this rerun reads: part of every cached wrapper's key
+if IN_MEMORY and data_version(replica=False) != data_version():
+    refresh_replica()      # an ingest landed since the RAM copy was taken
+dv = data_version()
+
+@st.cache_data(max_entries=8)
+def _c_dims(v):                       return cached(get_dimension_catalog)()
+
 # ── Sidebar ────────────────────────────────────────────────────────────────────
 with st.sidebar:
     st.markdown("""
@@ -129,12 +158,10 @@ with st.sidebar:
         st.error("Start date must be before end date.")
         st.stop()
 
-    conn = get_connection()
-    states_list = pd.read_sql("SELECT DISTINCT state FROM orders ORDER BY state", conn)["state"].tolist()
-    zones_list  = pd.read_sql("SELECT DISTINCT zone  FROM orders ORDER BY zone",  conn)["zone"].tolist()
-    cats_list   = pd.read_sql("SELECT DISTINCT category FROM orders ORDER BY category", conn)["category"].tolist()
-    segs_list   = pd.read_sql("SELECT DISTINCT segment FROM customers ORDER BY segment", conn)["segment"].tolist()
-    conn.close()
+    # filter values come from the dimension catalog (dim_values), cached per data version
+    dims = _c_dims(dv)
+    states_list, zones_list = dims["state"], dims["zone"]
+    cats_list,   segs_list  = dims["category"], dims["segment"]
 
     sel_state   = st.selectbox("State",    ["All"] + states_list)
     sel_zone    = st.selectbox("Zone",     ["All"] + zones_list)
@@ -143,7 +170,8 @@ with st.sidebar:
 
     st.markdown("")
     if st.button("Refresh Data"):
-        st.cache_data.clear()
+        if IN_MEMORY:
+            refresh_replica()
         st.rerun()
 
     st.markdown("""
@@ -155,64 +183,86 @@ with st.sidebar:
     """, unsafe_allow_html=True)
 
 # ── Load all data — each query gets its own cached wrapper ───────────────────
+# Every wrapper is keyed by the data version (bumped by each ingest), so an
+# entry lives exactly as long as the data it was computed from; behind
+# st.cache_data, result_cache keeps the same results on disk across restarts.
 s = start_date.strftime("%Y-%m-%d")
 e = end_date.strftime("%Y-%m-%d")
 
-@st.cache_data(ttl=120)
-def _c_kpis(s,e,st,zo,ca,sg):         return get_kpis(s,e,st,zo,ca,sg)
-@st.cache_data(ttl=120)
-def _c_trend(s,e,st,zo,ca):           return get_revenue_trend(s,e,st,zo,ca)
-@st.cache_data(ttl=120)
-def _c_state_p(s,e,ca):               return get_state_performance(s,e,ca)
-@st.cache_data(ttl=120)
-def _c_cat_mix(s,e,st,zo):            return get_category_mix(s,e,st,zo)
-@st.cache_data(ttl=120)
-def _c_pay(s,e,st):                   return get_payment_analysis(s,e,st)
-@st.cache_data(ttl=120)
-def _c_temporal(s,e):                 return get_temporal_patterns(s,e)
-@st.cache_data(ttl=120)
-def _c_tiers(s,e,st,sg):              return get_customer_tiers(s,e,st,sg)
-@st.cache_data(ttl=120)
-def _c_returns(s,e,st):               return get_return_analysis(s,e,st)
-@st.cache_data(ttl=120)
-def _c_agents(s,e,st):                return get_agent_performance(s,e,st)
-@st.cache_data(ttl=120)
-def _c_tickets(s,e,st):               return get_ticket_analytics(s,e,st)
-@st.cache_data(ttl=120)
-def _c_products(s,e,st,ca):           return get_product_performance(s,e,st,ca)
-@st.cache_data(ttl=120)
-def _c_churn(s,e,st,sg):              return get_churn_risk(s,e,st,sg)
-@st.cache_data(ttl=120)
-def _c_weekly_o():                    return get_weekly_trends()
-@st.cache_data(ttl=120)
-def _c_weekly_c():                    return get_weekly_csat()
-@st.cache_data(ttl=120)
-def _c_top_cust(s,e,st,sg):          return get_top_customers(s,e,st,sg)
-@st.cache_data(ttl=120)
-def _c_zone(s,e,ca):                  return get_zone_comparison(s,e,ca)
-@st.cache_data(ttl=120)
-def _c_yoy(st,ca):                    return get_yoy_comparison(st,ca)
-@st.cache_data(ttl=120)
-def _c_cohort(st,sg):                 return get_cohort_data(st,sg)
-
-kpis     = _c_kpis(s, e, sel_state, sel_zone, sel_cat, sel_segment)
-trend    = _c_trend(s, e, sel_state, sel_zone, sel_cat)
-state_p  = _c_state_p(s, e, sel_cat)
-cat_mix  = _c_cat_mix(s, e, sel_state, sel_zone)
-pay_data = _c_pay(s, e, sel_state)
-temporal = _c_temporal(s, e)
-tiers    = _c_tiers(s, e, sel_state, sel_segment)
-returns  = _c_returns(s, e, sel_state)
-agents   = _c_agents(s, e, sel_state)
-tickets  = _c_tickets(s, e, sel_state)
-products = _c_products(s, e, sel_state, sel_cat)
-churn    = _c_churn(s, e, sel_state, sel_segment)
-weekly_o = _c_weekly_o()
-weekly_c = _c_weekly_c()
-top_cust = _c_top_cust(s, e, sel_state, sel_segment)
-zone_cmp = _c_zone(s, e, sel_cat)
-yoy      = _c_yoy(sel_state, sel_cat)
-cohort   = _c_cohort(sel_state, sel_segment)
+@st.cache_data(max_entries=64)
+def _c_kpis(v,s,e,st,zo,ca,sg):       return cached(get_kpis)(s,e,st,zo,ca,sg)
+@st.cache_data(max_entries=64)
+def _c_trend(v,s,e,st,zo,ca):         return cached(get_revenue_trend)(s,e,st,zo,ca)
+@st.cache_data(max_entries=64)
+def _c_state_p(v,s,e,ca):             return cached(get_state_performance)(s,e,ca)
+@st.cache_data(max_entries=64)
+def _c_cat_mix(v,s,e,st,zo):          return cached(get_category_mix)(s,e,st,zo)
+@st.cache_data(max_entries=64)
+def _c_pay(v,s,e,st):                 return cached(get_payment_analysis)(s,e,st)
+@st.cache_data(max_entries=64)
+def _c_temporal(v,s,e):               return cached(get_temporal_patterns)(s,e)
+@st.cache_data(max_entries=64)
+def _c_tiers(v,s,e,st,sg):            return cached(get_customer_tiers)(s,e,st,sg)
+@st.cache_data(max_entries=64)
+def _c_returns(v,s,e,st):             return cached(get_return_analysis)(s,e,st)
+@st.cache_data(max_entries=64)
+def _c_agents(v,s,e,st):              return cached(get_agent_performance)(s,e,st)
+@st.cache_data(max_entries=64)
+def _c_tickets(v,s,e,st):             return cached(get_ticket_analytics)(s,e,st)
+@st.cache_data(max_entries=64)
+def _c_products(v,s,e,st,ca):         return cached(get_product_performance)(s,e,st,ca)
+@st.cache_data(max_entries=64)
+def _c_churn(v,s,e,st,sg):            return cached(get_churn_risk)(s,e,st,sg)
+@st.cache_data(max_entries=64)
+def _c_weekly_o(v):                   return cached(get_weekly_trends)()
+@st.cache_data(max_entries=64)
+def _c_weekly_c(v):                   return cached(get_weekly_csat)()
+@st.cache_data(max_entries=64)
+def _c_top_cust(v,s,e,st,sg):        return cached(get_top_customers)(s,e,st,sg)
+@st.cache_data(max_entries=64)
+def _c_zone(v,s,e,ca):                return cached(get_zone_comparison)(s,e,ca)
+@st.cache_data(max_entries=64)
+def _c_yoy(v,st,ca):                  return cached(get_yoy_comparison)(st,ca)
+@st.cache_data(max_entries=64)
+def _c_cohort(v,st,sg):               return cached(get_cohort_data)(st,sg)
+
+# Loaders run only for what this rerun renders (see loaders.TAB_DATASETS):
+# the page header, the active tab and, on request, the report. Each batch
+# runs concurrently with the script context attached to every worker.
+LOADERS = {
+    "kpis":     (_c_kpis,     (dv, s, e, sel_state, sel_zone, sel_cat, sel_segment)),
+    "trend":    (_c_trend,    (dv, s, e, sel_state, sel_zone, sel_cat)),
+    "state_p":  (_c_state_p,  (dv, s, e, sel_cat)),
+    "cat_mix":  (_c_cat_mix,  (dv, s, e, sel_state, sel_zone)),
+    "pay_data": (_c_pay,      (dv, s, e, sel_state)),
+    "temporal": (_c_temporal, (dv, s, e)),
+    "tiers":    (_c_tiers,    (dv, s, e, sel_state, sel_segment)),
+    "returns":  (_c_returns,  (dv, s, e, sel_state)),
+    "agents":   (_c_agents,   (dv, s, e, sel_state)),
+    "tickets":  (_c_tickets,  (dv, s, e, sel_state)),
+    "products": (_c_products, (dv, s, e, sel_state, sel_cat)),
+    "churn":    (_c_churn,    (dv, s, e, sel_state, sel_segment)),
+    "weekly_o": (_c_weekly_o, (dv,)),
+    "weekly_c": (_c_weekly_c, (dv,)),
+    "top_cust": (_c_top_cust, (dv, s, e, sel_state, sel_segment)),
+    "zone_cmp": (_c_zone,     (dv, s, e, sel_cat)),
+    "yoy":      (_c_yoy,      (dv, sel_state, sel_cat)),
+    "cohort":   (_c_cohort,   (dv, sel_state, sel_segment)),
+}
+_ctx = get_script_run_ctx() if get_script_run_ctx else None
+_loaded, _loader_runs = {}, []
+
+def load(*labels):
+    """The given datasets, in order; the ones not fetched yet in this rerun are loaded as one batch."""
+    todo = {label: LOADERS[label] for label in labels if label not in _loaded}
+    if todo:
+        results, timings = run_loaders(todo, initializer=(
+            lambda: add_script_run_ctx(threading.current_thread(), _ctx)) if _ctx else None)
+        _loaded.update(results)
+        _loader_runs.append(timings)
+    return [_loaded[label] for label in labels]
+
+kpis, weekly_o, weekly_c = load(*TAB_DATASETS["page"])
 
 alerts = detect_trends(weekly_o, weekly_c)
 crit_c = sum(1 for a in alerts if a["severity"] == "critical")
@@ -300,24 +350,31 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 # ── Tabs ───────────────────────────────────────────────────────────────────────
-tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
-    "Revenue & Sales", "Geographic", "Customer Intelligence",
-    "Support & Tickets", "Returns & Quality", "Alerts & Reports", "Raw Data"
-])
+# A tab bar that renders (and loads) only the selected tab; st.tabs would run every tab's body
+TABS = [tab for tab in TAB_DATASETS if tab != "page"]
+active_tab = st.radio("Section", TABS, horizontal=True, key="active_tab", label_visibility="collapsed")
 
 # ════════════════════════════════════════════════════════════════════
 # TAB 1 — REVENUE & SALES
 # ════════════════════════════════════════════════════════════════════
-with tab1:
+if active_tab == "Revenue & Sales":
+    trend, yoy, cat_mix, temporal, pay_data = load(*TAB_DATASETS["Revenue & Sales"])
     st.markdown('<div style="height:16px"></div>', unsafe_allow_html=True)
     st.markdown('<div style="padding:0 8px"><div class="section-hed">Revenue Trend</div></div>', unsafe_allow_html=True)
 
-    gran = st.radio("", ["Daily","Weekly","Monthly"], horizontal=True, index=1)
+    g1, g2 = st.columns([3,2])
+    with g1:
+        gran = st.radio("", ["Daily","Weekly","Monthly"], horizontal=True, index=1)
+    with g2:
+        points = st.radio("Points", ["Raw","LTTB","Min/Max"], horizontal=True, index=1, key="trend_points",
+                          help=f"Reduce the series to about {DEFAULT_POINTS} points before plotting, keeping peaks")
     rt = trend.copy()
     if gran == "Weekly":
         rt = rt.set_index("date").resample("W").agg({"revenue":"sum","orders":"sum","discount":"sum","gst":"sum"}).reset_index()
     elif gran == "Monthly":
         rt = rt.set_index("date").resample("ME").agg({"revenue":"sum","orders":"sum","discount":"sum","gst":"sum"}).reset_index()
+    n_raw = len(rt)
+    rt = downsample_frame(rt, "date", ["revenue","orders"], DEFAULT_POINTS, points)
 
     fig = make_subplots(specs=[[{"secondary_y":True}]])
     fig.add_trace(go.Scatter(x=rt["date"], y=rt["revenue"], name="Revenue",
@@ -328,6 +385,8 @@ with tab1:
         legend=dict(orientation="h", y=1.08, x=0, bgcolor="rgba(0,0,0,0)"))
     fig.update_yaxes(tickprefix="₹", secondary_y=False)
     st.plotly_chart(fig, use_container_width=True)
+    if len(rt) < n_raw:
+        st.caption(f"{len(rt):,} of {n_raw:,} points plotted ({points})")
 
     # YoY comparison
     st.markdown('<div style="padding:0 8px"><div class="section-hed">Year-on-Year Revenue Comparison (2022 / 2023 / 2024)</div></div>', unsafe_allow_html=True)
@@ -398,14 +457,13 @@ with tab1:
 
         # Download orders data
         st.markdown("")
-        conn = get_connection()
-        dl_orders = pd.read_sql(f"""
-            SELECT order_id, customer_id, order_date, category, product_name,
-                   final_amount, payment_method, order_status, state, zone, delivery_days
-            FROM orders WHERE order_date BETWEEN '{s}' AND '{e}'
-            ORDER BY order_date DESC
-        """, conn)
-        conn.close()
+        with reader() as conn:
+            dl_orders = pd.read_sql("""
+                SELECT order_id, customer_id, order_date, category, product_name,
+                       final_amount, payment_method, order_status, state, zone, delivery_days
+                FROM orders WHERE order_date BETWEEN ? AND ?
+                ORDER BY order_date DESC
+            """, conn, params=(s, e))
         st.download_button(
             "Download Filtered Orders CSV",
             data=dl_orders.to_csv(index=False),
@@ -416,7 +474,8 @@ with tab1:
 # ════════════════════════════════════════════════════════════════════
 # TAB 2 — GEOGRAPHIC
 # ════════════════════════════════════════════════════════════════════
-with tab2:
+if active_tab == "Geographic":
+    state_p, zone_cmp = load(*TAB_DATASETS["Geographic"])
     st.markdown('<div style="height:16px"></div>', unsafe_allow_html=True)
     st.markdown('<div style="padding:0 8px"><div class="section-hed">State-Level Performance</div></div>', unsafe_allow_html=True)
 
@@ -460,7 +519,8 @@ with tab2:
 # ════════════════════════════════════════════════════════════════════
 # TAB 3 — CUSTOMER INTELLIGENCE
 # ════════════════════════════════════════════════════════════════════
-with tab3:
+if active_tab == "Customer Intelligence":
+    tiers, cohort, churn, top_cust = load(*TAB_DATASETS["Customer Intelligence"])
     st.markdown('<div style="height:16px"></div>', unsafe_allow_html=True)
 
     c1, c2 = st.columns(2)
@@ -557,7 +617,8 @@ with tab3:
 # ════════════════════════════════════════════════════════════════════
 # TAB 4 — SUPPORT & TICKETS
 # ════════════════════════════════════════════════════════════════════
-with tab4:
+if active_tab == "Support & Tickets":
+    tickets, agents = load(*TAB_DATASETS["Support & Tickets"])
     st.markdown('<div style="height:16px"></div>', unsafe_allow_html=True)
 
     if not tickets.empty:
@@ -626,7 +687,8 @@ with tab4:
 # ════════════════════════════════════════════════════════════════════
 # TAB 5 — RETURNS & QUALITY
 # ════════════════════════════════════════════════════════════════════
-with tab5:
+if active_tab == "Returns & Quality":
+    returns, products = load(*TAB_DATASETS["Returns & Quality"])
     st.markdown('<div style="height:16px"></div>', unsafe_allow_html=True)
 
     if not returns.empty:
@@ -651,11 +713,10 @@ with tab5:
 
         # Return rate by state
         st.markdown('<div style="padding:0 8px"><div class="section-hed">State Return Rate vs 8% Benchmark</div></div>', unsafe_allow_html=True)
-        conn = get_connection()
-        ord_st = pd.read_sql(f"""SELECT state, COUNT(*) as orders FROM orders
-            WHERE order_date BETWEEN '{s}' AND '{e}' AND order_status NOT IN ('Processing')
-            GROUP BY state""", conn)
-        conn.close()
+        with reader() as conn:
+            ord_st = pd.read_sql("""SELECT state, COUNT(*) as orders FROM orders
+                WHERE order_date BETWEEN ? AND ? AND order_status NOT IN ('Processing')
+                GROUP BY state""", conn, params=(s, e))
         ret_st = returns.groupby("state")["returns"].sum().reset_index()
         retmap = ret_st.merge(ord_st, on="state")
         retmap["return_pct"] = (retmap["returns"] / retmap["orders"] * 100).round(2)
@@ -690,7 +751,7 @@ with tab5:
 # ════════════════════════════════════════════════════════════════════
 # TAB 6 — ALERTS & REPORTS
 # ════════════════════════════════════════════════════════════════════
-with tab6:
+if active_tab == "Alerts & Reports":
     st.markdown('<div style="height:16px"></div>', unsafe_allow_html=True)
     c_left, c_right = st.columns([3,2])
 
@@ -736,17 +797,23 @@ with tab6:
           A comprehensive HTML report covering all KPIs, geographic performance, customer intelligence, support metrics, and churn risk analysis. Opens in any browser and is print-ready (Ctrl+P to PDF).
         </div>""", unsafe_allow_html=True)
 
-        report_bytes = generate_html_report(
-            kpis=kpis, revenue_trend=trend, state_perf=state_p,
-            category_mix=cat_mix, payment_data=pay_data,
-            agent_perf=agents, ticket_data=tickets,
-            churn_data=churn, start_date=s, end_date=e,
-            filters={"State":sel_state,"Zone":sel_zone,"Category":sel_cat,"Segment":sel_segment}
-        )
-        st.download_button("Download Full Analysis Report (HTML)",
-            data=report_bytes,
-            file_name=f"india_ops_report_{s}_{e}.html",
-            mime="text/html", use_container_width=True)
+        # the report reads eight datasets: load and build it only when asked for
+        report_key = (dv, s, e, sel_state, sel_zone, sel_cat, sel_segment)
+        if st.button("Prepare Full Analysis Report", use_container_width=True):
+            r_kpis, trend, state_p, cat_mix, pay_data, agents, tickets, churn = load(*REPORT_DATASETS)
+            st.session_state["report"] = (report_key, generate_html_report(
+                kpis=r_kpis, revenue_trend=trend, state_perf=state_p,
+                category_mix=cat_mix, payment_data=pay_data,
+                agent_perf=agents, ticket_data=tickets,
+                churn_data=churn, start_date=s, end_date=e,
+                filters={"State":sel_state,"Zone":sel_zone,"Category":sel_cat,"Segment":sel_segment}
+            ))
+        report = st.session_state.get("report")
+        if report and report[0] == report_key:
+            st.download_button("Download Full Analysis Report (HTML)",
+                data=report[1],
+                file_name=f"india_ops_report_{s}_{e}.html",
+                mime="text/html", use_container_width=True)
 
         # Download all CSVs bundle info
         st.markdown("""<div class="smtp-box" style="margin-top:10px;font-size:12px">
@@ -814,7 +881,7 @@ with tab6:
 # ════════════════════════════════════════════════════════════════════
 # TAB 7 — RAW DATA
 # ════════════════════════════════════════════════════════════════════
-with tab7:
+if active_tab == "Raw Data":
     st.markdown('<div style="height:16px"></div>', unsafe_allow_html=True)
     st.markdown('<div style="padding:0 8px"><div class="section-hed">Raw Data Explorer — Live SQL Interface</div></div>', unsafe_allow_html=True)
 
@@ -826,7 +893,7 @@ with tab7:
         where_clause = st.text_input("SQL WHERE clause (optional)",
             placeholder="e.g.  state = 'Tamil Nadu' AND final_amount > 5000")
 
-    conn = get_connection()
+    conn = get_connection(readonly=True)
     where = f"WHERE {where_clause.strip()}" if where_clause.strip() else ""
     try:
         raw = pd.read_sql(f"SELECT * FROM {table_choice} {where} LIMIT {row_limit}", conn)
@@ -844,9 +911,50 @@ with tab7:
         conn.close()
 
     with st.expander("Database Schema Reference"):
-        conn = get_connection()
-        for tbl in ["customers","orders","tickets","agents","returns"]:
-            info = pd.read_sql(f"PRAGMA table_info({tbl})", conn)
-            st.markdown(f'<div style="font-family:monospace;font-size:12px;font-weight:600;margin:10px 0 4px">{tbl}</div>', unsafe_allow_html=True)
-            st.dataframe(info[["name","type","notnull","pk"]], use_container_width=True, hide_index=True, height=min(200, len(info)*38+38))
-        conn.close()
+        with reader() as conn:
+            for tbl in ["customers","orders","tickets","agents","returns"]:
+                info = pd.read_sql(f"PRAGMA table_info({tbl})", conn)
+                st.markdown(f'<div style="font-family:monospace;font-size:12px;font-weight:600;margin:10px 0 4px">{tbl}</div>', unsafe_allow_html=True)
+                st.dataframe(info[["name","type","notnull","pk"]], use_container_width=True, hide_index=True, height=min(200, len(info)*38+38))
+
+    with st.expander("Connection Pool"):
+        ps_ = pool_stats()
+        st.markdown(f'<div style="font-family:monospace;font-size:11px;color:#888">'
+                    f'opened {ps_["opened"]:,} · reused {ps_["reused"]:,} · idle {ps_["idle"]} · in use {ps_["in_use"]} · '
+                    f'discarded {ps_["discarded"]:,} · reuse ratio {ps_["reuse_ratio"]:.0%}</div>', unsafe_allow_html=True)
+        rep = replica_info()
+        if rep:
+            st.markdown(f'<div style="font-family:monospace;font-size:11px;color:#888">'
+                        f'in-memory replica #{rep["generation"]} · {rep["mb"]:,.0f} MB · '
+                        f'loaded {rep["loaded_at"]:%H:%M:%S} in {rep["seconds"]:.2f}s</div>', unsafe_allow_html=True)
+
+    with st.expander("Result Cache"):
+        rc = cache_stats()
+        st.markdown(f'<div style="font-family:monospace;font-size:11px;color:#888">'
+                    f'{CACHE_PATH} · {rc["entries"]:,} entries · {rc["mb"]:,.1f} / {rc["max_mb"]:,.0f} MB · '
+                    f'hits {rc["hits"]:,} · misses {rc["misses"]:,} · evicted {rc["evicted"]:,} · '
+                    f'hit ratio {rc["hit_ratio"]:.0%}</div>', unsafe_allow_html=True)
+        pw = prewarm.last_report
+        if pw and "error" in pw:
+            pw_line = f'prewarm: failed at {datetime.fromtimestamp(pw["finished_at"]):%H:%M:%S} · {pw["error"]}'
+        elif pw:
+            pw_line = (f'prewarm: {pw["calls"]} results ({", ".join(["default view"] + pw["dims"])}) in '
+                       f'{pw["seconds"]:.1f}s · default view after {pw["default_seconds"]:.1f}s · '
+                       f'{pw["computed"]} computed · coverage {pw["coverage"]:.0%}')
+        else:
+            pw_line = "prewarm: running" if prewarm.PREWARM_ON_START else "prewarm: off (INDIA_OPS_PREWARM=0)"
+        st.markdown(f'<div style="font-family:monospace;font-size:11px;color:#888">{pw_line}</div>',
+                    unsafe_allow_html=True)
+
+# ── Loader timings for this rerun ──────────────────────────────────────────────
+# one batch per load(): the page header, then the active tab (and the report, if built)
+loader_times = pd.concat([t.assign(batch=n) for n, t in enumerate(_loader_runs)], ignore_index=True)
+with st.expander("Loader Timings"):
+    st.markdown(f'<div style="font-family:monospace;font-size:11px;color:#888">'
+                f'{len(loader_times)} of {len(LOADERS)} loaders ran ({active_tab}) · '
+                f'wall {sum(t.attrs["wall"] for t in _loader_runs) * 1000:,.0f} ms · '
+                f'sum {loader_times["seconds"].sum() * 1000:,.0f} ms · '
+                f'critical path {", ".join(t.attrs["critical"] for t in _loader_runs)}</div>', unsafe_allow_html=True)
+    st.dataframe(loader_times.assign(start=loader_times["start"] * 1000, end=loader_times["end"] * 1000,
+                                     ms=loader_times["seconds"] * 1000)[["batch", "loader", "start", "end", "ms", "thread"]],
+                 use_container_width=True, hide_index=True)
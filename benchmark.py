@@ -0,0 +1,615 @@
+"""
+benchmark.py — Latency measurements for the dashboard query layer
+Runs the same set of queries.py calls app.py makes on a page load (the
+"tab set") against one or more database files and prints median timings.
+
+    python benchmark.py replica --db india_ops.db india_ops_100x.db
+    python benchmark.py statements --db india_ops.db
+    python benchmark.py topcustomers --db india_ops_100x.db
+    python benchmark.py ingest --db india_ops.db --rows 10000
+    python benchmark.py loaders --db india_ops_100x.db --workers 1 4 8
+    python benchmark.py lazy --db india_ops_100x.db
+    python benchmark.py cache --db india_ops_100x.db
+    python benchmark.py api --clients 8 --requests 2000 [--url http://127.0.0.1:8765]
+    python benchmark.py downsample --db india_ops.db --sizes 10000 100000 1000000
+"""
+import argparse
+import http.client
+import inspect
+import json
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import database
+import downsample
+import ingest
+import queries
+import result_cache
+import rollups
+from loaders import REPORT_DATASETS, TAB_DATASETS, run_loaders
+
+DEFAULT_FILTERS = {"start": "2024-01-01", "end": "2024-12-31",
+                   "state": "All", "zone": "All", "category": "All", "segment": "All"}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Workload — mirrors app.LOADERS (labels as in loaders.DATASETS)
+# ─────────────────────────────────────────────────────────────────────────────
+def tab_set(start, end, state="All", zone="All", category="All", segment="All", wrap=None):
+    """[(label, callable)] for one full dashboard render; `wrap` decorates each query (e.g. cached)."""
+    s, e = start, end
+    q = wrap or (lambda fn: fn)
+    return [
+        ("kpis",      lambda: q(queries.get_kpis)(s, e, state, zone, category, segment)),
+        ("trend",     lambda: q(queries.get_revenue_trend)(s, e, state, zone, category)),
+        ("state_p",   lambda: q(queries.get_state_performance)(s, e, category)),
+        ("cat_mix",   lambda: q(queries.get_category_mix)(s, e, state, zone)),
+        ("pay_data",  lambda: q(queries.get_payment_analysis)(s, e, state)),
+        ("temporal",  lambda: q(queries.get_temporal_patterns)(s, e)),
+        ("tiers",     lambda: q(queries.get_customer_tiers)(s, e, state, segment)),
+        ("returns",   lambda: q(queries.get_return_analysis)(s, e, state)),
+        ("agents",    lambda: q(queries.get_agent_performance)(s, e, state)),
+        ("tickets",   lambda: q(queries.get_ticket_analytics)(s, e, state)),
+        ("products",  lambda: q(queries.get_product_performance)(s, e, state, category)),
+        ("churn",     lambda: q(queries.get_churn_risk)(s, e, state, segment)),
+        ("weekly_o",  lambda: q(queries.get_weekly_trends)()),
+        ("weekly_c",  lambda: q(queries.get_weekly_csat)()),
+        ("top_cust",  lambda: q(queries.get_top_customers)(s, e, state, segment)),
+        ("zone_cmp",  lambda: q(queries.get_zone_comparison)(s, e, category)),
+        ("yoy",       lambda: q(queries.get_yoy_comparison)(state, category)),
+        ("cohort",    lambda: q(queries.get_cohort_data)(state, segment)),
+    ]
+
+
+def time_calls(calls, repeats=5, warmup=1):
+    """{label: median seconds} over `repeats` runs, plus "TOTAL" (median of per-run sums)."""
+    for _ in range(warmup):
+        for _, fn in calls:
+            fn()
+    samples = {label: [] for label, _ in calls}
+    totals = []
+    for _ in range(repeats):
+        run = 0.0
+        for label, fn in calls:
+            t0 = time.perf_counter()
+            fn()
+            samples[label].append(time.perf_counter() - t0)
+            run += samples[label][-1]
+        totals.append(run)
+    out = {label: statistics.median(v) for label, v in samples.items()}
+    out["TOTAL"] = statistics.median(totals)
+    return out
+
+
+def _print_table(title, columns, results):
+    labels = list(next(iter(results.values())).keys())
+    print(f"\n{title}")
+    print(f"{'query':<12}" + "".join(f"{c:>14}" for c in columns))
+    for label in labels:
+        print(f"{label:<12}" + "".join(f"{results[c][label] * 1000:>12.1f}ms" for c in columns))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Scenarios
+# ─────────────────────────────────────────────────────────────────────────────
+def bench_replica(paths, repeats=5):
+    """Full tab set from the file vs from the in-memory replica, per database."""
+    summary = []
+    for path in paths:
+        database.DB_PATH = path
+        calls = tab_set(**DEFAULT_FILTERS)
+        disk = time_calls(calls, repeats)
+        info = database.load_replica(path)
+        ram = time_calls(calls, repeats)
+        database.drop_replica(path)
+        database.close_pool()
+        _print_table(f"{path}  (replica {info['mb']:.0f} MB, loaded in {info['seconds']:.2f}s)",
+                     ["disk", "memory"], {"disk": disk, "memory": ram})
+        summary.append((path, disk["TOTAL"], ram["TOTAL"], info["seconds"]))
+    print(f"\n{'database':<28}{'disk':>10}{'memory':>10}{'speedup':>9}{'load':>8}")
+    for path, d, m, load in summary:
+        print(f"{path:<28}{d * 1000:>8.0f}ms{m * 1000:>8.0f}ms{d / m:>8.2f}x{load:>7.2f}s")
+    return summary
+
+
+RERUN_STATES = ["All", "Maharashtra", "Karnataka", "Delhi", "Tamil Nadu"]
+
+def _prepare_seconds(conn, sql, repeats=20):
+    """Parse + plan cost of `sql`: EXPLAIN QUERY PLAN prepares the statement without running it."""
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+def bench_statements(path, repeats=5):
+    """
+    Statement reuse: a rerun sweep over RERUN_STATES per query, timed with the
+    readers' prepared-statement cache on and off (off = what literal SQL cost,
+    since every new filter value was a new statement), plus the parse/plan
+    cost of each query measured on its own.
+    """
+    database.DB_PATH = path
+    sweeps = list(zip(*[tab_set(**{**DEFAULT_FILTERS, "state": st}) for st in RERUN_STATES]))
+    calls = [(group[0][0], lambda g=group: [fn() for _, fn in g]) for group in sweeps]
+
+    prep = {}
+    conn = sqlite3.connect(path, cached_statements=0)
+    database.attach_partitions(conn, path)
+    for label, run in calls:
+        with database.trace_statements() as stmts:
+            run()
+        prep[label] = sum(_prepare_seconds(conn, sql) for sql in stmts) / len(RERUN_STATES)
+    conn.close()
+    prep["TOTAL"] = sum(prep.values())
+
+    results = {}
+    for mode, size in (("reused", database.STATEMENT_CACHE), ("reparsed", 0)):
+        saved, database.STATEMENT_CACHE = database.STATEMENT_CACHE, size
+        database.close_pool()
+        results[mode] = {k: v / len(RERUN_STATES) for k, v in time_calls(calls, repeats).items()}
+        database.STATEMENT_CACHE = saved
+        database.close_pool()
+
+    print(f"\n{path}: per-render latency over a {len(RERUN_STATES)}-state rerun sweep")
+    print(f"{'query':<12}{'parse+plan':>12}{'reparsed':>12}{'reused':>12}{'saved':>10}")
+    for label in results["reused"]:
+        r, u = results["reused"][label], results["reparsed"][label]
+        print(f"{label:<12}{prep[label] * 1e6:>10.0f}us{u * 1000:>10.2f}ms{r * 1000:>10.2f}ms{(u - r) * 1000:>8.2f}ms")
+    return {"prepare": prep, **results}
+
+
+# get_top_customers before pre-aggregation: orders x tickets per customer
+FANOUT_TOP_CUSTOMERS = """
+SELECT c.customer_id, COUNT(DISTINCT o.order_id) AS orders, SUM(o.final_amount) AS lifetime_value
+FROM customers c
+JOIN orders o ON c.customer_id=o.customer_id
+LEFT JOIN tickets t ON c.customer_id=t.customer_id AND t.created_date BETWEEN :start AND :end
+WHERE o.order_date BETWEEN :start AND :end
+  AND o.order_status NOT IN ('Cancelled','Processing')
+  AND (:state='All' OR c.state=:state) AND (:segment='All' OR c.segment=:segment)
+GROUP BY c.customer_id ORDER BY lifetime_value DESC LIMIT 20"""
+
+FANOUT_ROWS = """
+SELECT COUNT(*), COUNT(DISTINCT o.order_id) FROM orders o
+LEFT JOIN tickets t ON o.customer_id=t.customer_id AND t.created_date BETWEEN :start AND :end
+WHERE o.order_date BETWEEN :start AND :end AND o.order_status NOT IN ('Cancelled','Processing')"""
+
+TRUE_LTV = """
+SELECT COUNT(*), SUM(final_amount) FROM orders
+WHERE customer_id=? AND order_date BETWEEN ? AND ? AND order_status NOT IN ('Cancelled','Processing')"""
+
+def bench_top_customers(path, repeats=5):
+    """
+    get_top_customers vs the fan-out join it replaced: each returned
+    lifetime_value and order count is checked against a plain per-customer
+    SUM over orders (AssertionError on any difference), and the joined rows /
+    latency of both versions are reported.
+    """
+    database.DB_PATH = path
+    database.close_pool()
+    conn = sqlite3.connect(path)
+    start, end = DEFAULT_FILTERS["start"], DEFAULT_FILTERS["end"]
+    joined, orders = conn.execute(FANOUT_ROWS, {"start": start, "end": end}).fetchone()
+    print(f"\n{path}: {orders:,} orders in {start}..{end} -> {joined:,} rows after the tickets join "
+          f"({joined / max(orders, 1):.1f}x)")
+    print(f"{'filter':<22}{'fan-out':>10}{'pre-agg':>10}{'LTV inflated':>14}{'max x':>8}{'LTV exact':>11}")
+    results = []
+    for state, segment in (("All", "All"), ("Maharashtra", "All"), ("All", "Corporate")):
+        params = {"start": start, "end": end, "state": state, "segment": segment}
+        old = {}
+        new = None
+        def run_old():
+            old.update((r[0], r[2]) for r in conn.execute(FANOUT_TOP_CUSTOMERS, params))
+        def run_new():
+            nonlocal new
+            new = queries.get_top_customers(start, end, state, segment)
+        t = time_calls([("fanout", run_old), ("preagg", run_new)], repeats)
+
+        truth = {cid: conn.execute(TRUE_LTV, (cid, start, end)).fetchone() for cid in old}
+        ratios = [old[cid] / truth[cid][1] for cid in old if truth[cid][1]]
+        # get_top_customers does not return customer_id: match on (orders, lifetime_value)
+        ranked = conn.execute("""SELECT COUNT(*), SUM(final_amount) AS ltv FROM orders o
+                                  JOIN customers c ON c.customer_id=o.customer_id
+                                  WHERE order_date BETWEEN :start AND :end
+                                    AND order_status NOT IN ('Cancelled','Processing')
+                                    AND (:state='All' OR c.state=:state) AND (:segment='All' OR c.segment=:segment)
+                                  GROUP BY o.customer_id ORDER BY ltv DESC LIMIT 20""", params).fetchall()
+        exact = len(new) == len(ranked) and all(
+            n == r[0] and abs(v - r[1]) < 1e-6 for (n, v), r in zip(new[["orders", "lifetime_value"]].values, ranked))
+        label = f"{state}/{segment}"
+        print(f"{label:<22}{t['fanout'] * 1000:>8.1f}ms{t['preagg'] * 1000:>8.1f}ms"
+              f"{sum(x > 1 + 1e-9 for x in ratios):>10}/{len(ratios):<3}{max(ratios, default=1):>8.1f}{str(exact):>11}")
+        results.append({"filter": label, "fanout": t["fanout"], "preagg": t["preagg"],
+                        "inflated": sum(x > 1 + 1e-9 for x in ratios), "exact": exact})
+    conn.close()
+    wrong = [r["filter"] for r in results if not r["exact"]]
+    if wrong:
+        raise AssertionError(f"get_top_customers orders / lifetime_value differ from the per-customer sums for {wrong}")
+    return results
+
+
+TIER_DRIFT = f"""
+SELECT COUNT(*) FROM customers c
+LEFT JOIN (SELECT customer_id, SUM(final_amount) AS spent FROM orders
+           WHERE order_status = 'Delivered' GROUP BY customer_id) s USING (customer_id)
+WHERE c.tier IS NOT {database.tier_case_sql("COALESCE(s.spent, 0)")}"""
+
+def _rollup_drift(conn, name):
+    """Rows of rollup `name` that differ from a rebuild from the raw tables (floats compared with a tolerance)."""
+    stored = pd.read_sql(f"SELECT * FROM {name}", conn)
+    fresh = pd.read_sql(rollups.ROLLUPS[name][1].format(where=""), conn)
+    fresh.columns = stored.columns
+    if len(stored) != len(fresh):
+        return abs(len(stored) - len(fresh))
+    keys = [c for c in stored.columns if not pd.api.types.is_numeric_dtype(stored[c])]
+    stored, fresh = (f.sort_values(keys).reset_index(drop=True) for f in (stored, fresh))
+    diff = np.zeros(len(stored), dtype=bool)
+    for c in stored.columns:
+        if c in keys:
+            diff |= (stored[c] != fresh[c]) & ~(stored[c].isna() & fresh[c].isna())
+        else:
+            diff |= ~np.isclose(stored[c].astype(float), fresh[c].astype(float), equal_nan=True)
+    return int(diff.sum())
+
+
+def _consistency(conn):
+    """Problems between the raw tables and everything derived from them (empty when consistent)."""
+    problems = []
+    tiers = conn.execute(TIER_DRIFT).fetchone()[0]
+    if tiers:
+        problems.append(f"{tiers} stale tiers")
+    for name in ("orders_daily", "orders_weekly", "customer_features"):
+        if rollups.has_table(conn, name) and (n := _rollup_drift(conn, name)):
+            problems.append(f"{n} stale {name} rows")
+    return problems
+
+
+def _tier_flip(conn, status, sign):
+    """(order_id, customer_id, tier) of an order whose amount added (+1) / removed (-1) from its owner's delivered spend changes the tier."""
+    spent = dict(conn.execute("SELECT customer_id, SUM(final_amount) FROM orders "
+                              "WHERE order_status = 'Delivered' GROUP BY customer_id"))
+    for oid, cid, amount in conn.execute("SELECT order_id, customer_id, final_amount FROM orders "
+                                         "WHERE order_status = ? ORDER BY final_amount DESC", (status,)):
+        before = spent.get(cid, 0)
+        if database.get_tier(before) != database.get_tier(before + sign * amount):
+            return oid, cid, database.get_tier(before)
+    raise LookupError(f"no {status} order changes its owner's tier")
+
+
+def bench_ingest(path, rows=10_000):
+    """
+    ingest.py on a scratch copy of `path`: append throughput, the upserts that
+    must keep customers.tier and the rollups in step (a status-only update, an
+    order moved to another customer), and batches that must leave the tables,
+    rollups and data version untouched (a non-ISO date, a duplicate key that
+    fails mid-insert). Raises AssertionError if any check fails.
+    """
+    tmp = tempfile.mkdtemp()
+    scratch = os.path.join(tmp, "ingest_check.db")
+    with sqlite3.connect(path) as src, sqlite3.connect(scratch) as dst:
+        src.backup(dst)
+    conn = sqlite3.connect(scratch)
+    version = lambda: conn.execute("SELECT MAX(version) FROM data_versions").fetchone()[0]
+    snapshot = lambda: (conn.execute("SELECT COUNT(*), SUM(final_amount) FROM orders").fetchone(),
+                        conn.execute("SELECT SUM(n_orders), SUM(final_amount) FROM orders_daily").fetchone()
+                        if rollups.has_table(conn, "orders_daily") else None,
+                        version())
+    database.ensure_data_version(scratch)
+    failures = []
+
+    def check(label, stats, expect_version):
+        problems = _consistency(conn)
+        if version() != expect_version:
+            problems.append(f"data version {version()} (expected {expect_version})")
+        print(f"{label:<34}{stats}  {'ok' if not problems else 'FAILED: ' + ', '.join(problems)}")
+        failures.extend(f"{label}: {p}" for p in problems)
+
+    print(f"\n{path} (checked on a scratch copy)")
+    base = pd.read_sql("SELECT * FROM orders ORDER BY RANDOM() LIMIT ?", conn, params=(rows,))
+    base["order_id"] = [f"ING{i:08d}" for i in range(len(base))]
+    base["order_date"] = "2025-01-02"
+    v = version()
+    st = ingest.ingest("orders", base, path=scratch, report=None)
+    check(f"append {len(base):,} orders", f"{st['rows_per_sec']:>10,.0f} rows/s", v + 1)
+
+    oid, cid, tier = _tier_flip(conn, "Shipped", +1)
+    v = version()
+    ingest.ingest("orders", [{"order_id": oid, "order_status": "Delivered"}], upsert=True, path=scratch, report=None)
+    new_tier = conn.execute("SELECT tier FROM customers WHERE customer_id = ?", (cid,)).fetchone()[0]
+    check("status-only upsert", f"{cid} {tier} -> {new_tier}", v + 1)
+
+    oid, cid, tier = _tier_flip(conn, "Delivered", -1)
+    other = conn.execute("SELECT customer_id FROM customers WHERE customer_id != ? LIMIT 1", (cid,)).fetchone()[0]
+    v = version()
+    ingest.ingest("orders", [{"order_id": oid, "customer_id": other}], upsert=True, path=scratch, report=None)
+    new_tier = conn.execute("SELECT tier FROM customers WHERE customer_id = ?", (cid,)).fetchone()[0]
+    check("order moved to another customer", f"{cid} {tier} -> {new_tier}", v + 1)
+
+    bad_date = base.head(3).assign(order_id=["BAD0", "BAD1", "BAD2"], order_date=["2025-01-03", "01/02/2024", None])
+    dup_key = pd.concat([base.head(CHUNK := 5).assign(order_id=[f"DUP{i}" for i in range(CHUNK)]), base.head(1)])
+    for label, batch, error in (("non-ISO date rejected", bad_date, ValueError),
+                                ("duplicate key rolled back", dup_key, sqlite3.IntegrityError)):
+        before = snapshot()
+        try:
+            ingest.ingest("orders", batch, path=scratch, report=None)
+            raised = "nothing raised"
+        except error as ex:
+            raised = type(ex).__name__
+        if snapshot() != before:
+            failures.append(f"{label}: rows, rollups or data version changed")
+        check(label, raised, before[2])
+    conn.close()
+    shutil.rmtree(tmp)
+    if failures:
+        raise AssertionError("ingest check failed: " + "; ".join(failures))
+
+
+def bench_loaders(path, workers=(1, 4, 8), repeats=3):
+    """Cold tab set (no result caches) run serially vs through run_loaders' thread pool."""
+    database.DB_PATH = path
+    loaders = {label: (fn, ()) for label, fn in tab_set(**DEFAULT_FILTERS)}
+    run_loaders(loaders, workers=1)   # warm the reader pool and the page cache
+    print(f"\n{path}: {len(loaders)} loaders, os.cpu_count()={os.cpu_count()}")
+    print(f"{'workers':<9}{'wall':>10}{'sum':>10}{'overlap':>9}  critical path")
+    results = {}
+    for n in workers:
+        runs = []
+        for _ in range(repeats):
+            queries._scans.clear()
+            runs.append(run_loaders(loaders, workers=n)[1])
+        t = sorted(runs, key=lambda r: r.attrs["wall"])[len(runs) // 2]
+        wall, total = t.attrs["wall"], t["seconds"].sum()
+        print(f"{n:<9}{wall * 1000:>8.0f}ms{total * 1000:>8.0f}ms{total / wall:>8.2f}x  "
+              f"{t.attrs['critical']} ({t['seconds'].iloc[0] * 1000:.0f} ms)")
+        results[n] = t
+    return results
+
+
+def bench_lazy(path, repeats=3):
+    """
+    Cold rerun (no result caches) per tab: every loader up front, as app.py
+    used to, vs the page header plus the active tab's datasets only.
+    """
+    database.DB_PATH = path
+    loaders = {label: (fn, ()) for label, fn in tab_set(**DEFAULT_FILTERS)}
+    run_loaders(loaders, workers=1)   # warm the reader pool and the page cache
+
+    def cold(labels):
+        walls = []
+        for _ in range(repeats):
+            queries._scans.clear()
+            walls.append(run_loaders({label: loaders[label] for label in labels})[1].attrs["wall"])
+        return statistics.median(walls)
+
+    eager = cold(list(loaders))
+    views = {tab: TAB_DATASETS["page"] + datasets for tab, datasets in TAB_DATASETS.items() if tab != "page"}
+    views["Alerts + report"] = list(dict.fromkeys(TAB_DATASETS["page"] + REPORT_DATASETS))
+    print(f"\n{path}: cold rerun, all {len(loaders)} loaders = {eager * 1000:,.0f} ms")
+    print(f"{'tab':<24}{'loaders':>8}{'lazy':>10}{'saved':>8}")
+    results = {}
+    for tab, labels in views.items():
+        lazy = cold(labels)
+        print(f"{tab:<24}{len(labels):>8}{lazy * 1000:>8.0f}ms{1 - lazy / eager:>8.0%}")
+        results[tab] = lazy
+    return eager, results
+
+
+def bench_result_cache(path, cache_path="benchmark_cache.db", repeats=5):
+    """
+    Tab set against the on-disk result cache: a miss (query + store), a hit
+    from a cache connection opened afresh — what a restarted process sees —
+    and the stored size per entry.
+    """
+    database.DB_PATH = path
+    result_cache.CACHE_PATH = cache_path
+    result_cache.clear_cache()
+    calls = tab_set(**DEFAULT_FILTERS, wrap=result_cache.cached)
+    for _, fn in tab_set(**DEFAULT_FILTERS):               # warm the page cache and reader pool
+        fn()
+    miss = {}
+    for label, fn in calls:
+        queries._scans.clear()
+        t0 = time.perf_counter()
+        fn()
+        miss[label] = time.perf_counter() - t0
+    miss["TOTAL"] = sum(miss.values())
+    result_cache._conn.pop(cache_path).close()           # "restart": a new cache connection
+    hit = time_calls(calls, repeats, warmup=0)
+    sizes = dict(result_cache._connection().execute("SELECT fn, size FROM results"))
+    _print_table(f"{path}  (cache {cache_path})", ["miss", "hit"], {"miss": miss, "hit": hit})
+    stats = result_cache.cache_stats()
+    print(f"{stats['entries']} entries, {stats['mb'] * 1024:,.0f} KB "
+          f"(largest {max(sizes, key=sizes.get)} {max(sizes.values()) / 1024:,.0f} KB), "
+          f"hit ratio {stats['hit_ratio']:.0%}, speedup {miss['TOTAL'] / hit['TOTAL']:.0f}x")
+    return {"miss": miss, "hit": hit, "stats": stats}
+
+
+def api_paths(states=RERUN_STATES):
+    """GET paths covering every API endpoint for the default window and each of `states`."""
+    import api
+    paths = []
+    for state in states:
+        filters = {**DEFAULT_FILTERS, "state": state}
+        for name, fn in sorted(api.ENDPOINTS.items()):
+            params = {k: v for k, v in filters.items() if k in inspect.signature(fn).parameters}
+            paths.append(f"/{name}?{urlencode(params)}" if params else f"/{name}")
+    return paths
+
+
+def bench_api(path, url=None, clients=8, requests=2000, seed=0):
+    """
+    Load test of api.py: `clients` threads with keep-alive connections issue
+    `requests` GETs drawn from api_paths(); reports requests/s and latency
+    percentiles. Without `url` the API is started in this process on a free
+    port (its result cache is whatever INDIA_OPS_CACHE points to).
+    """
+    server = None
+    if url is None:
+        import api
+        from http.server import ThreadingHTTPServer
+        database.DB_PATH = path
+        server = ThreadingHTTPServer(("127.0.0.1", 0), api.ApiHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+    host = urlsplit(url).netloc
+    paths = api_paths()
+    rng = random.Random(seed)
+    plan = [rng.choice(paths) for _ in range(requests)]
+    latencies, errors, sizes = [], [0], [0]
+    lock = threading.Lock()
+
+    def client(share):
+        conn = http.client.HTTPConnection(host, timeout=120)
+        mine = []
+        for p in share:
+            t0 = time.perf_counter()
+            conn.request("GET", p)
+            resp = conn.getresponse()
+            body = resp.read()
+            mine.append(time.perf_counter() - t0)
+            with lock:
+                sizes[0] += len(body)
+                errors[0] += resp.status != 200
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+
+    # first pass over every path: cold misses, then the measured mixed load
+    t0 = time.perf_counter()
+    client(paths)
+    cold = time.perf_counter() - t0
+    latencies.clear()
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(plan[i::clients],)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    q = statistics.quantiles(latencies, n=100)
+    print(f"\n{url}: {len(paths)} distinct requests, first pass {cold:.1f}s")
+    print(f"{clients} clients, {requests:,} requests in {wall:.2f}s -> {requests / wall:,.0f} req/s, "
+          f"p50 {q[49] * 1000:.1f} ms, p95 {q[94] * 1000:.1f} ms, p99 {q[98] * 1000:.1f} ms, "
+          f"{sizes[0] / requests / 1024:,.1f} KB/response, {errors[0]} errors")
+    if server:
+        server.shutdown()
+    return {"rps": requests / wall, "p95": q[94], "errors": errors[0]}
+
+
+def _trace_bytes(df, x, cols):
+    """Size of the chart's traces as JSON (ISO dates, floats), roughly what Plotly ships to the browser."""
+    xs = df[x].dt.strftime("%Y-%m-%dT%H:%M:%S").tolist() if df[x].dtype.kind == "M" else df[x].tolist()
+    return sum(len(json.dumps({"x": xs, "y": df[c].astype(float).tolist()})) for c in cols)
+
+
+def _spiky_series(size, seed=0):
+    """Minute-level revenue/orders with a daily cycle, noise and a few one-sample spikes and dips."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(size)
+    revenue = 1e5 + 3e4 * np.sin(2 * np.pi * t / 1440) + rng.normal(0, 5e3, size)
+    spikes = rng.choice(size, 5, replace=False)
+    revenue[spikes[:3]] *= 6
+    revenue[spikes[3:]] = 0
+    return pd.DataFrame({"date": pd.date_range("2022-01-01", periods=size, freq="min"),
+                         "revenue": revenue, "orders": rng.poisson(40, size).astype(float)})
+
+
+def bench_downsample(path, sizes=(10_000, 100_000, 1_000_000), points=downsample.DEFAULT_POINTS, repeats=5):
+    """
+    Revenue-trend downsampling: server time of each method, the chart's trace
+    payload raw vs reduced, and whether the series' highest and lowest revenue
+    samples survive — on the real daily trend (all history) and on synthetic series.
+    """
+    database.DB_PATH = path
+    series = {"trend (daily)": queries.get_revenue_trend("2000-01-01", "2099-12-31")}
+    series.update({f"synthetic {n:,}": _spiky_series(n) for n in sizes})
+    cols = ["revenue", "orders"]
+    print(f"\n{path}: {points}-point budget")
+    print(f"{'series':<20}{'method':<8}{'points':>9}{'server':>10}{'payload':>11}{'reduction':>10}  high/low kept")
+    results = {}
+    for name, df in series.items():
+        raw_bytes = _trace_bytes(df, "date", cols)
+        high, low = df["revenue"].max(), df["revenue"].min()
+        for method in downsample.METHODS:
+            samples = []
+            for _ in range(repeats):
+                t0 = time.perf_counter()
+                out = downsample.downsample_frame(df, "date", cols, points, method)
+                samples.append(time.perf_counter() - t0)
+            seconds = statistics.median(samples)
+            size = _trace_bytes(out, "date", cols)
+            kept = (high in set(out["revenue"]), low in set(out["revenue"]))
+            print(f"{name:<20}{method:<8}{len(out):>9,}{seconds * 1000:>8.1f}ms{size / 1024:>9,.0f}KB"
+                  f"{raw_bytes / size:>9.0f}x  {'/'.join('yes' if k else 'no' for k in kept)}")
+            results[(name, method)] = {"points": len(out), "seconds": seconds, "bytes": size, "peaks": kept}
+    return results
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Dashboard query-layer benchmarks.")
+    sub = ap.add_subparsers(dest="scenario", required=True)
+    p = sub.add_parser("replica", help="file vs in-memory replica for the full tab set")
+    p.add_argument("--db", nargs="+", default=[database.DB_PATH])
+    p.add_argument("--repeats", type=int, default=5)
+    p = sub.add_parser("statements", help="parse/plan cost and prepared-statement reuse per query")
+    p.add_argument("--db", default=database.DB_PATH)
+    p.add_argument("--repeats", type=int, default=5)
+    p = sub.add_parser("topcustomers", help="top-customer fan-out vs pre-aggregated ranking")
+    p.add_argument("--db", default=database.DB_PATH)
+    p.add_argument("--repeats", type=int, default=5)
+    p = sub.add_parser("ingest", help="ingest consistency (tiers, rollups, data version) and throughput")
+    p.add_argument("--db", default=database.DB_PATH)
+    p.add_argument("--rows", type=int, default=10_000)
+    p = sub.add_parser("loaders", help="dashboard loaders serially vs in a thread pool")
+    p.add_argument("--db", default=database.DB_PATH)
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    p.add_argument("--repeats", type=int, default=3)
+    p = sub.add_parser("lazy", help="cold rerun per tab: all loaders vs only the tab's datasets")
+    p.add_argument("--db", default=database.DB_PATH)
+    p.add_argument("--repeats", type=int, default=3)
+    p = sub.add_parser("api", help="load test of api.py: requests/s and p95 latency")
+    p.add_argument("--db", default=database.DB_PATH)
+    p.add_argument("--url", default=None, help="running API (default: start one in-process)")
+    p.add_argument("--clients", type=int, default=8)
+    p.add_argument("--requests", type=int, default=2000)
+    p = sub.add_parser("cache", help="on-disk result cache: miss vs hit after a restart")
+    p.add_argument("--db", default=database.DB_PATH)
+    p.add_argument("--cache", default="benchmark_cache.db", help="result cache file (cleared first)")
+    p.add_argument("--repeats", type=int, default=5)
+    p = sub.add_parser("downsample", help="revenue-trend downsampling: server time, payload, extremes kept")
+    p.add_argument("--db", default=database.DB_PATH)
+    p.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    p.add_argument("--points", type=int, default=downsample.DEFAULT_POINTS)
+    p.add_argument("--repeats", type=int, default=5)
+    args = ap.parse_args()
+    if args.scenario == "replica":
+        bench_replica(args.db, args.repeats)
+    elif args.scenario == "statements":
+        bench_statements(args.db, args.repeats)
+    elif args.scenario == "topcustomers":
+        bench_top_customers(args.db, args.repeats)
+    elif args.scenario == "ingest":
+        bench_ingest(args.db, args.rows)
+    elif args.scenario == "loaders":
+        bench_loaders(args.db, args.workers, args.repeats)
+    elif args.scenario == "lazy":
+        bench_lazy(args.db, args.repeats)
+    elif args.scenario == "api":
+        bench_api(args.db, args.url, args.clients, args.requests)
+    elif args.scenario == "cache":
+        bench_result_cache(args.db, args.cache, args.repeats)
+    elif args.scenario == "downsample":
+        bench_downsample(args.db, args.sizes, args.points, args.repeats)
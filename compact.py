@@ -0,0 +1,151 @@
+"""
+compact.py — Optional compact layout for india_ops.db
+Dates are stored as integer day numbers (days since 1970-01-01) and repeated
+dimension strings as small integer keys into d_<dimension> lookup tables.
+Views named like the original tables decode both, so queries.py and the Raw
+Data tab read the compact file unchanged. Date-window filters stay indexed
+through expression indexes on the decoded date.
+
+The compact file is a read layout: build it from a regular database after
+seeding/ingest rather than writing to it directly.
+
+    python compact.py --src india_ops.db --dst india_ops_compact.db
+    INDIA_OPS_DB=india_ops_compact.db streamlit run app.py
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+from database import DB_PATH
+
+# table -> date columns
+DATE_COLUMNS = {
+    "customers": ["join_date"],
+    "orders":    ["order_date", "delivery_date"],
+    "tickets":   ["created_date", "resolved_date"],
+    "returns":   ["return_date"],
+}
+
+# table -> {column: lookup dimension}; state/city/zone share one lookup across tables
+DIM_COLUMNS = {
+    "customers": {"city": "city", "state": "state", "zone": "zone", "segment": "segment",
+                  "tier": "tier", "status": "customer_status", "age_group": "age_group"},
+    "orders":    {"category": "category", "product_name": "product", "payment_method": "payment_method",
+                  "order_status": "order_status", "city": "city", "state": "state", "zone": "zone"},
+    "tickets":   {"ticket_category": "ticket_category", "priority": "priority",
+                  "status": "ticket_status", "state": "state"},
+    "returns":   {"reason": "return_reason", "refund_status": "refund_status", "state": "state"},
+}
+
+# Decoded-date expression indexes; the view substitutes the same expression,
+# so "o.order_date BETWEEN ..." still seeks instead of scanning
+COMPACT_INDEXES = {
+    "orders":  [["@order_date", "order_status_id", "state_id", "zone_id", "category_id", "payment_method_id",
+                 "customer_id", "final_amount", "discount", "gst_amount", "delivery_days"],
+                ["customer_id", "order_status_id"]],
+    "tickets": [["@created_date", "state_id", "customer_id", "agent_id"], ["customer_id"]],
+    "returns": [["@return_date", "state_id"]],
+    "customers": [["state_id", "segment_id"]],
+}
+
+EPOCH_JD = 2440587.5   # julianday('1970-01-01')
+
+
+def _encode_date(expr):
+    return f"CAST(julianday({expr}) - {EPOCH_JD} AS INTEGER)"
+
+def _decode_date(expr):
+    return f"date({expr} * 86400, 'unixepoch')"
+
+def _columns(conn, schema, table):
+    return [(r[1], r[2], r[5]) for r in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def build_compact(src=None, dst="india_ops_compact.db", report=print):
+    """Write a compact copy of `src` to `dst` (replacing it). Returns size stats."""
+    src = src or DB_PATH
+    if os.path.exists(dst):
+        os.remove(dst)
+    t0 = time.perf_counter()
+    conn = sqlite3.connect(dst)
+    conn.execute("ATTACH DATABASE ? AS src", (src,))
+
+    # ── Lookup tables ────────────────────────────────────────────────────────
+    sources = {}
+    for table, dims in DIM_COLUMNS.items():
+        for col, dim in dims.items():
+            sources.setdefault(dim, []).append(f"SELECT {col} AS v FROM src.{table}")
+    for dim, selects in sources.items():
+        conn.execute(f"CREATE TABLE d_{dim} (id INTEGER PRIMARY KEY, name TEXT UNIQUE)")
+        conn.execute(f"INSERT INTO d_{dim}(name) SELECT DISTINCT v FROM ({' UNION '.join(selects)}) "
+                     f"WHERE v IS NOT NULL ORDER BY v")
+
+    # ── Fact tables + decoding views ─────────────────────────────────────────
+    for table in ["agents", "customers", "orders", "tickets", "returns"]:
+        cols = _columns(conn, "src", table)
+        if table not in DIM_COLUMNS:
+            conn.execute(f"CREATE TABLE {table} AS SELECT * FROM src.{table}")
+            continue
+        dates, dims = DATE_COLUMNS[table], DIM_COLUMNS[table]
+        ddl, select, view, joins = [], [], [], []
+        for i, (name, ctype, pk) in enumerate(cols):
+            if name in dates:
+                ddl.append(f"{name}_day INTEGER")
+                select.append(_encode_date(f"s.{name}"))
+                view.append(f"{_decode_date(f'f.{name}_day')} AS {name}")
+            elif name in dims:
+                ddl.append(f"{name}_id INTEGER")
+                select.append(f"k{i}.id")
+                joins.append((f"LEFT JOIN d_{dims[name]} k{i} ON k{i}.name = s.{name}",
+                              f"LEFT JOIN d_{dims[name]} k{i} ON k{i}.id = f.{name}_id"))
+                view.append(f"k{i}.name AS {name}")
+            else:
+                ddl.append(f"{name} {ctype}{' PRIMARY KEY' if pk else ''}")
+                select.append(f"s.{name}")
+                view.append(f"f.{name}")
+        conn.execute(f"CREATE TABLE {table}_c ({', '.join(ddl)})")
+        conn.execute(f"INSERT INTO {table}_c SELECT {', '.join(select)} FROM src.{table} s "
+                     f"{' '.join(j[0] for j in joins)} ORDER BY s.rowid")
+        conn.execute(f"CREATE VIEW {table} AS SELECT {', '.join(view)} FROM {table}_c f "
+                     f"{' '.join(j[1] for j in joins)}")
+        for n, key in enumerate(COMPACT_INDEXES.get(table, [])):
+            parts = [_decode_date(f"{c[1:]}_day") if c.startswith("@") else c for c in key]
+            conn.execute(f"CREATE INDEX idx_{table}_c_{n} ON {table}_c({', '.join(parts)})")
+
+    conn.commit()
+    conn.execute("DETACH DATABASE src")
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+
+    stats = {"src_mb": os.path.getsize(src) / 2**20, "dst_mb": os.path.getsize(dst) / 2**20,
+             "data_mb": {p: table_bytes(p) / 2**20 for p in (src, dst)},
+             "seconds": time.perf_counter() - t0}
+    if report:
+        report(f"Compact layout written to {dst} in {stats['seconds']:.1f}s: "
+               f"file {stats['src_mb']:.1f} MB -> {stats['dst_mb']:.1f} MB, "
+               f"fact-table pages {stats['data_mb'][src]:.1f} MB -> {stats['data_mb'][dst]:.1f} MB")
+    return stats
+
+
+def table_bytes(path):
+    """Bytes in table b-trees (excluding indexes), via dbstat when compiled in."""
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("""SELECT COALESCE(SUM(s.pgsize), 0) FROM dbstat s
+                               JOIN sqlite_master m ON m.name = s.name
+                               WHERE m.type = 'table'""").fetchone()[0]
+    except sqlite3.OperationalError:
+        return float("nan")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Build the compact integer-date / dictionary-encoded layout.")
+    ap.add_argument("--src", default=None, help=f"source database (default: {DB_PATH})")
+    ap.add_argument("--dst", default="india_ops_compact.db")
+    args = ap.parse_args()
+    build_compact(args.src, args.dst)
@@ -3,12 +3,365 @@ import pandas as pd
 import numpy as np
 import random
 import os
+import secrets
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
-DB_PATH = "india_ops.db"
+DB_PATH = os.environ.get("INDIA_OPS_DB", "india_ops.db")
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Connections — readers come from a small pool of tuned, query-only handles
+# ─────────────────────────────────────────────────────────────────────────────
+POOL_SIZE = 8   # idle reader connections kept per database file
+STATEMENT_CACHE = 256   # prepared statements kept per reader (sqlite3 default: 128)
+
+READER_PRAGMAS = {
+    "mmap_size":  268435456,   # 256 MB memory-mapped reads
+    "cache_size": -65536,      # 64 MB page cache per connection
+    "temp_store": "MEMORY",
+    "query_only": "ON",
+}
+
+_pool_lock  = threading.Lock()
+_pool_idle  = defaultdict(list)
+_pool_wal   = set()
+_pool_stats = defaultdict(int)
+_tracers    = []
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() hands it back to the reader pool (a second close() is a no-op)."""
+    checked_out = False
+
+    def close(self):
+        if not _release(self):
+            super().close()
+
+
+def _open_reader(path):
+    if not path.startswith("file:") and not os.path.exists(path):
+        # connect() would silently create an empty file and init_db would then skip seeding
+        raise sqlite3.OperationalError(f"database file not found: {path}")
+    if path not in _pool_wal:
+        # WAL lets readers run alongside a writer; it persists in the file
+        c = sqlite3.connect(path)
+        try:
+            c.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            c.close()
+        _pool_wal.add(path)
+    conn = sqlite3.connect(path, factory=PooledConnection, check_same_thread=False, uri=True,
+                           cached_statements=STATEMENT_CACHE)
+    settings = dict(READER_PRAGMAS)
+    query_only = settings.pop("query_only")
+    for k, v in settings.items():
+        conn.execute(f"PRAGMA {k}={v}")
+    # after temp_store (which drops the temp schema), before query_only (which forbids TEMP views)
+    attach_partitions(conn, path)
+    conn.execute(f"PRAGMA query_only={query_only}")
+    conn.pool_path = path
+    return conn
+
+
+def _release(conn):
+    path = getattr(conn, "pool_path", None)
+    if path is None:
+        return False
+    with _pool_lock:
+        if not conn.checked_out:       # already back in the pool: never hand it out twice
+            return True
+        conn.checked_out = False
+        _pool_stats["in_use"] -= 1
+    try:
+        conn.rollback()
+    except sqlite3.ProgrammingError:   # already closed underneath us
+        conn.pool_path = None
+        return False
+    with _pool_lock:
+        if len(_pool_idle[path]) >= POOL_SIZE or path in _retired:
+            _pool_stats["discarded"] += 1
+            conn.pool_path = None
+            return False
+        _pool_idle[path].append(conn)
+        _pool_stats["returned"] += 1
+        return True
+
+
+def get_connection(path=None, readonly=False):
+    """
+    readonly=False: a fresh read-write connection (seeding, ingestion).
+    readonly=True:  a pooled, query-only connection; close() returns it to the pool.
+                    Served from the in-memory replica when one is loaded for `path`.
+    """
+    path = path or DB_PATH
+    if not readonly:
+        return sqlite3.connect(path, uri=True)
+    with _pool_lock:
+        path = _replicas[path]["uri"] if path in _replicas else path
+        conn = _pool_idle[path].pop() if _pool_idle[path] else None
+        _pool_stats["reused" if conn else "opened"] += 1
+        _pool_stats["in_use"] += 1
+    if conn is None:
+        try:
+            conn = _open_reader(path)
+        except Exception:
+            with _pool_lock:
+                _pool_stats["in_use"] -= 1
+            raise
+    conn.checked_out = True
+    conn.set_trace_callback(_dispatch_trace if _tracers else None)
+    return conn
+
+
+@contextmanager
+def reader(path=None):
+    """A pooled read-only connection for a with-block, returned to the pool even when the query raises."""
+    conn = get_connection(path, readonly=True)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def _dispatch_trace(sql):
+    for fn in list(_tracers):
+        fn(sql)
+
+
+@contextmanager
+def trace_statements():
+    """Collect every SQL statement run on pooled readers inside the block."""
+    captured = []
+    hook = captured.append
+    _tracers.append(hook)
+    try:
+        yield captured
+    finally:
+        _tracers.remove(hook)
+
+
+def pool_stats():
+    with _pool_lock:
+        stats = {k: _pool_stats[k] for k in ("opened", "reused", "returned", "discarded", "in_use")}
+        stats["idle"] = sum(len(v) for v in _pool_idle.values())
+    checkouts = stats["opened"] + stats["reused"]
+    stats["reuse_ratio"] = stats["reused"] / checkouts if checkouts else 0.0
+    return stats
+
+
+def close_pool(path=None):
+    """Really close idle readers, e.g. before replacing or reseeding the file."""
+    with _pool_lock:
+        for p in ([path] if path else list(_pool_idle)):
+            for conn in _pool_idle.pop(p, []):
+                conn.pool_path = None
+                sqlite3.Connection.close(conn)
+            _pool_wal.discard(p)
+            _partitions.pop(p, None)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Year partitions — optional layout written by partition.py
+# ─────────────────────────────────────────────────────────────────────────────
+PARTITIONED_TABLES = {"orders": "order_date", "tickets": "created_date", "returns": "return_date"}
+
+_partitions = {}
+
+
+def partitions(path=None):
+    """
+    {year: (schema alias, file URI)} when `path` is a partitioned main file,
+    {} for the regular single-file layout. Read once per path.
+    """
+    path = path or DB_PATH
+    if path not in _partitions:
+        parts = {}
+        conn = sqlite3.connect(path, uri=True)
+        try:
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='partitions'").fetchone():
+                base = os.path.dirname(os.path.abspath(path))
+                for year, file, cold in conn.execute("SELECT year, file, cold FROM partitions ORDER BY year"):
+                    uri = "file:" + os.path.join(base, file) + ("?mode=ro&immutable=1" if cold else "?mode=ro")
+                    parts[year] = (f"p{year}", uri)
+        finally:
+            conn.close()
+        _partitions[path] = parts
+    return _partitions[path]
+
+
+def attach_partitions(conn, path=None):
+    """
+    ATTACH every year file of a partitioned layout and expose the full
+    orders/tickets/returns as TEMP views, so unrouted SQL still sees all
+    years. Cold years are attached immutable. No-op for a single file.
+    """
+    parts = partitions(path)
+    for alias, uri in parts.values():
+        conn.execute("ATTACH DATABASE ? AS " + alias, (uri,))
+    if parts:
+        for table in PARTITIONED_TABLES:
+            union = " UNION ALL ".join(f"SELECT * FROM {alias}.{table}" for alias, _ in parts.values())
+            conn.execute(f"CREATE TEMP VIEW IF NOT EXISTS {table} AS {union}")
+    return parts
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  In-memory replica — readers served from RAM, refreshed explicitly
+# ─────────────────────────────────────────────────────────────────────────────
+_replicas   = {}      # file path -> {"uri", "anchor", "generation", "stamp", "loaded_at", "seconds", "mb"}
+_retired    = set()   # replica URIs replaced by a refresh; their readers are closed on release
+_replica_gen = 0
+
+
+def load_replica(path=None):
+    """
+    Copy `path` into a shared-cache in-memory database with the backup API
+    and route every readonly get_connection(path) to it. Calling it again
+    is the refresh hook: a fresh copy is built, swapped in, and the previous
+    one is dropped once its in-flight readers close. Writers still go to
+    the file. Returns the replica stats.
+    """
+    global _replica_gen
+    path = path or DB_PATH
+    if not os.path.exists(path):
+        raise sqlite3.OperationalError(f"database file not found: {path}")
+    if partitions(path):
+        raise ValueError("the in-memory replica does not cover year-partitioned layouts")
+    t0 = datetime.now()
+    with _pool_lock:
+        _replica_gen += 1
+        gen = _replica_gen
+    uri = f"file:india_ops_replica_{gen}?mode=memory&cache=shared"
+    # the anchor keeps the shared in-memory database alive between readers
+    anchor = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    before = _file_stamp(path)
+    src = sqlite3.connect(path)
+    try:
+        src.backup(anchor)
+    finally:
+        src.close()
+    # the copy carries the file's stamp, unless a commit landed while copying
+    stamp = before if _file_stamp(path) == before else (path, "replica", t0.isoformat())
+    pages, page_size = (anchor.execute(f"PRAGMA {p}").fetchone()[0] for p in ("page_count", "page_size"))
+    info = {"uri": uri, "anchor": anchor, "generation": gen, "stamp": stamp, "loaded_at": datetime.now(),
+            "seconds": (datetime.now() - t0).total_seconds(), "mb": pages * page_size / 2**20}
+    with _pool_lock:
+        old = _replicas.get(path)
+        _replicas[path] = info
+        if old:
+            _retired.add(old["uri"])
+    if old:
+        close_pool(old["uri"])
+        old["anchor"].close()
+    return replica_info(path)
+
+refresh_replica = load_replica
+
+
+def drop_replica(path=None):
+    """Stop serving `path` from memory; readers go back to the file."""
+    path = path or DB_PATH
+    with _pool_lock:
+        info = _replicas.pop(path, None)
+        if info:
+            _retired.add(info["uri"])
+    if info:
+        close_pool(info["uri"])
+        info["anchor"].close()
+
+
+def replica_info(path=None):
+    """Stats of the active replica for `path` (without the anchor), or None."""
+    info = _replicas.get(path or DB_PATH)
+    return {k: v for k, v in info.items() if k != "anchor"} if info else None
+
+
+def data_stamp(path=None):
+    """
+    Cheap change marker for what readonly readers of `path` see: size +
+    mtime of the file, its WAL and any year files (every commit touches one
+    of them), or the stamp the file had when the active replica copied it.
+    Stable across restarts while the data is unchanged.
+    """
+    path = path or DB_PATH
+    info = _replicas.get(path)
+    if info:
+        return info["stamp"]
+    return _file_stamp(path)
+
+
+def _file_stamp(path):
+    files = [path, path + "-wal"] + [uri[5:].split("?")[0] for _, uri in partitions(path).values()]
+    stamp = [path]
+    for f in files:
+        try:
+            st = os.stat(f)
+            # an emptied WAL holds no frames: same data as no WAL at all
+            stamp.append((st.st_size, st.st_mtime_ns) if st.st_size or f == path else None)
+        except FileNotFoundError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Data version — one row per committed data change, written by the writer
+# ─────────────────────────────────────────────────────────────────────────────
+DATA_VERSION_SQL = """
+CREATE TABLE IF NOT EXISTS data_versions (
+    version     INTEGER PRIMARY KEY AUTOINCREMENT,
+    source      TEXT,
+    rows        INTEGER,
+    token       TEXT,
+    created_at  TEXT
+)"""
+
+
+def bump_data_version(conn, source, rows=0):
+    """
+    Record a data change on the writer's connection (committed with its
+    transaction) and return the new version. ingest.py calls it once a
+    batch and its rollups are in; any other writer of orders, tickets,
+    returns, customers or agents should too.
+    """
+    conn.execute(DATA_VERSION_SQL)
+    cur = conn.execute("INSERT INTO data_versions (source, rows, token, created_at) VALUES (?, ?, ?, ?)",
+                       (source, rows, secrets.token_hex(8), datetime.now().isoformat(timespec="seconds")))
+    return cur.lastrowid
+
+
+def ensure_data_version(path=None):
+    """Give a database its first version row if it has none yet."""
+    conn = get_connection(path)
+    conn.execute(DATA_VERSION_SQL)
+    if conn.execute("SELECT 1 FROM data_versions LIMIT 1").fetchone() is None:
+        bump_data_version(conn, "baseline")
+        conn.commit()
+    conn.close()
+
+
+def data_version(path=None, replica=True):
+    """
+    (path, version, token) of the data readonly readers of `path` see — the
+    in-memory replica's copy when one is loaded, the file's with
+    replica=False. The random token tells apart databases re-seeded at the
+    same path. Falls back to data_stamp() for a database without a
+    data_versions table.
+    """
+    path = path or DB_PATH
+    conn = get_connection(path, readonly=True) if replica else sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        row = conn.execute("SELECT version, token FROM data_versions ORDER BY version DESC LIMIT 1").fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    finally:
+        conn.close()
+    if row:
+        return (path, *row)
+    return data_stamp(path) if replica else _file_stamp(path)
 
-def get_connection():
-    return sqlite3.connect(DB_PATH)
 
 # ─────────────────────────────────────────────────────────────────────────────
 #  REAL INDIA MASTER DATA
@@ -113,6 +466,42 @@ AGENT_NAMES = ["Aryan Kapoor","Shreya Menon","Rohan Das","Preethi Subramaniam","
                "Aman Bhatt","Pallavi Reddy","Deepak Singh","Swati Joshi","Karthik Nair",
                "Ankita Patel","Nitin Malhotra","Divya Agarwal","Saurabh Gupta","Megha Pillai"]
 
+CATEGORY_WEIGHTS   = [25, 20, 15, 12, 10, 8, 6, 4]
+
+SEGMENTS     = ["Retail", "Wholesale", "SME", "Corporate"]
+SEG_WEIGHTS  = [55, 20, 15, 10]
+SEG_MULT     = {"Corporate": 1.5, "Wholesale": 1.3, "SME": 1.1, "Retail": 1.0}
+AGE_GROUPS   = ["18-25", "26-35", "36-45", "46-60", "60+"]
+AGE_WEIGHTS  = [20, 35, 25, 15, 5]
+CUST_STATUSES   = ["Active", "Churned", "At-Risk"]
+CUST_STATUS_W   = [72, 14, 14]
+
+TEAMS  = ["Tier-1 Support", "Tier-2 Technical", "Returns & Refunds", "Escalations", "Billing"]
+SHIFTS = ["Morning (6-14)", "Afternoon (14-22)", "Night (22-6)"]
+
+RES_HOURS = {"Low": (12, 72), "Medium": (4, 24), "High": (1, 12), "Critical": (0.5, 6)}
+
+RETURN_REASONS  = ["Product Defective", "Wrong Item Delivered", "Size/Fit Issue",
+                   "Not as Described", "Damaged Packaging", "Changed Mind",
+                   "Better Price Available", "Delayed Delivery"]
+REFUND_STATUSES = ["Completed", "Pending", "Processing"]
+REFUND_WEIGHTS  = [70, 18, 12]
+
+# Festival effect: bump volumes in Oct-Nov (Diwali), Jan (Republic Day Sale), Aug (Independence Day)
+FESTIVAL_MONTHS = {10: 2.8, 11: 2.2, 1: 1.8, 8: 1.5, 3: 1.3, 7: 1.2}
+
+STATE_PIN_PREFIX = {
+    "Maharashtra": 4, "Karnataka": 5, "Tamil Nadu": 6, "Delhi": 1,
+    "Uttar Pradesh": 2, "West Bengal": 7, "Gujarat": 3, "Rajasthan": 3,
+    "Telangana": 5, "Andhra Pradesh": 5, "Kerala": 6, "Punjab": 1,
+    "Madhya Pradesh": 4, "Haryana": 1, "Bihar": 8,
+}
+
+DATA_START = datetime(2022, 1, 1)   # 3 years of data
+DATA_END   = datetime(2024, 12, 31)
+
+BASE_CUSTOMERS, BASE_ORDERS, BASE_TICKETS = 2000, 12000, 5000
+
 TIER_THRESHOLDS = {"Platinum": 50000, "Gold": 20000, "Silver": 8000, "Bronze": 0}
 
 def get_tier(spent):
@@ -122,134 +511,163 @@ def get_tier(spent):
     return "Bronze"
 
 def random_pincode(state):
-    state_pin_prefix = {
-        "Maharashtra": 4, "Karnataka": 5, "Tamil Nadu": 6, "Delhi": 1,
-        "Uttar Pradesh": 2, "West Bengal": 7, "Gujarat": 3, "Rajasthan": 3,
-        "Telangana": 5, "Andhra Pradesh": 5, "Kerala": 6, "Punjab": 1,
-        "Madhya Pradesh": 4, "Haryana": 1, "Bihar": 8,
-    }
-    prefix = state_pin_prefix.get(state, random.randint(1, 8))
+    prefix = STATE_PIN_PREFIX.get(state, random.randint(1, 8))
     return f"{prefix}{random.randint(10000, 99999)}"
 
-def init_db():
-    if os.path.exists(DB_PATH):
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS customers (
+    customer_id    TEXT PRIMARY KEY,
+    full_name      TEXT NOT NULL,
+    email          TEXT,
+    phone          TEXT,
+    city           TEXT,
+    state          TEXT,
+    zone           TEXT,
+    pincode        TEXT,
+    segment        TEXT,
+    tier           TEXT,
+    join_date      TEXT,
+    status         TEXT,
+    age_group      TEXT
+);
+
+CREATE TABLE IF NOT EXISTS orders (
+    order_id        TEXT PRIMARY KEY,
+    customer_id     TEXT,
+    order_date      TEXT,
+    delivery_date   TEXT,
+    amount          REAL,
+    gst_amount      REAL,
+    discount        REAL,
+    final_amount    REAL,
+    category        TEXT,
+    product_name    TEXT,
+    payment_method  TEXT,
+    order_status    TEXT,
+    city            TEXT,
+    state           TEXT,
+    zone            TEXT,
+    delivery_days   INTEGER,
+    is_returned     INTEGER,
+    FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+);
+
+CREATE TABLE IF NOT EXISTS tickets (
+    ticket_id         TEXT PRIMARY KEY,
+    customer_id       TEXT,
+    agent_id          TEXT,
+    order_id          TEXT,
+    created_date      TEXT,
+    resolved_date     TEXT,
+    ticket_category   TEXT,
+    priority          TEXT,
+    status            TEXT,
+    csat_score        REAL,
+    resolution_hours  REAL,
+    first_response_h  REAL,
+    is_repeat         INTEGER,
+    state             TEXT,
+    FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+);
+
+CREATE TABLE IF NOT EXISTS agents (
+    agent_id    TEXT PRIMARY KEY,
+    agent_name  TEXT NOT NULL,
+    team        TEXT,
+    shift       TEXT,
+    state       TEXT,
+    join_date   TEXT
+);
+
+CREATE TABLE IF NOT EXISTS returns (
+    return_id     TEXT PRIMARY KEY,
+    order_id      TEXT,
+    customer_id   TEXT,
+    return_date   TEXT,
+    reason        TEXT,
+    refund_amount REAL,
+    refund_status TEXT,
+    state         TEXT
+);
+"""
+
+INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_orders_date   ON orders(order_date);
+CREATE INDEX IF NOT EXISTS idx_orders_cust   ON orders(customer_id);
+CREATE INDEX IF NOT EXISTS idx_orders_state  ON orders(state);
+CREATE INDEX IF NOT EXISTS idx_tickets_date  ON tickets(created_date);
+CREATE INDEX IF NOT EXISTS idx_tickets_agent ON tickets(agent_id);
+CREATE INDEX IF NOT EXISTS idx_returns_date  ON returns(return_date);
+"""
+
+def init_db(path=None, generator="python", scale=1, seed=2024, chunk_size=100_000, workers=None, shard="year"):
+    """
+    Create and seed the database if it does not exist yet.
+    generator="python" reproduces the original row-by-row seed exactly;
+    generator="numpy" builds every table as whole arrays (see datagen.py)
+    and multiplies the base volumes by `scale` for load testing;
+    generator="stream" does the same in `chunk_size` slices with bounded memory;
+    generator="parallel" splits it into `shard` ("year"/"month") shards across
+    `workers` processes. The advisor's covering indexes are created last.
+    """
+    path = path or DB_PATH
+    if os.path.exists(path):
         return
+    _seed(path, generator, scale, seed, chunk_size, workers, shard)
+    from index_advisor import apply_indexes   # index_advisor imports this module
+    apply_indexes(path)
+
 
-    conn = get_connection()
+def _seed(path, generator, scale, seed, chunk_size, workers, shard):
+    conn = get_connection(path)
     cur  = conn.cursor()
+    cur.executescript(SCHEMA_SQL)
+
+    if generator == "numpy":
+        from datagen import generate_tables, insert_tables
+        tables = generate_tables(scale=scale, seed=seed)
+        insert_tables(conn, tables)
+        cur.executescript(INDEX_SQL)
+        conn.commit()
+        conn.close()
+        print(f"Database seeded: {len(tables['customers'])} customers, {len(tables['orders'])} orders, "
+              f"{len(tables['tickets'])} tickets, {len(tables['returns'])} returns.")
+        return
 
-    cur.executescript("""
-    CREATE TABLE IF NOT EXISTS customers (
-        customer_id    TEXT PRIMARY KEY,
-        full_name      TEXT NOT NULL,
-        email          TEXT,
-        phone          TEXT,
-        city           TEXT,
-        state          TEXT,
-        zone           TEXT,
-        pincode        TEXT,
-        segment        TEXT,
-        tier           TEXT,
-        join_date      TEXT,
-        status         TEXT,
-        age_group      TEXT
-    );
-
-    CREATE TABLE IF NOT EXISTS orders (
-        order_id        TEXT PRIMARY KEY,
-        customer_id     TEXT,
-        order_date      TEXT,
-        delivery_date   TEXT,
-        amount          REAL,
-        gst_amount      REAL,
-        discount        REAL,
-        final_amount    REAL,
-        category        TEXT,
-        product_name    TEXT,
-        payment_method  TEXT,
-        order_status    TEXT,
-        city            TEXT,
-        state           TEXT,
-        zone            TEXT,
-        delivery_days   INTEGER,
-        is_returned     INTEGER,
-        FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
-    );
-
-    CREATE TABLE IF NOT EXISTS tickets (
-        ticket_id         TEXT PRIMARY KEY,
-        customer_id       TEXT,
-        agent_id          TEXT,
-        order_id          TEXT,
-        created_date      TEXT,
-        resolved_date     TEXT,
-        ticket_category   TEXT,
-        priority          TEXT,
-        status            TEXT,
-        csat_score        REAL,
-        resolution_hours  REAL,
-        first_response_h  REAL,
-        is_repeat         INTEGER,
-        state             TEXT,
-        FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
-    );
-
-    CREATE TABLE IF NOT EXISTS agents (
-        agent_id    TEXT PRIMARY KEY,
-        agent_name  TEXT NOT NULL,
-        team        TEXT,
-        shift       TEXT,
-        state       TEXT,
-        join_date   TEXT
-    );
-
-    CREATE TABLE IF NOT EXISTS returns (
-        return_id     TEXT PRIMARY KEY,
-        order_id      TEXT,
-        customer_id   TEXT,
-        return_date   TEXT,
-        reason        TEXT,
-        refund_amount REAL,
-        refund_status TEXT,
-        state         TEXT
-    );
-
-    CREATE INDEX IF NOT EXISTS idx_orders_date   ON orders(order_date);
-    CREATE INDEX IF NOT EXISTS idx_orders_cust   ON orders(customer_id);
-    CREATE INDEX IF NOT EXISTS idx_orders_state  ON orders(state);
-    CREATE INDEX IF NOT EXISTS idx_tickets_date  ON tickets(created_date);
-    CREATE INDEX IF NOT EXISTS idx_tickets_agent ON tickets(agent_id);
-    CREATE INDEX IF NOT EXISTS idx_returns_date  ON returns(return_date);
-    """)
+    if generator == "stream":
+        from datagen import stream_tables
+        stream_tables(conn, scale=scale, seed=seed, chunk_size=chunk_size)
+        conn.close()
+        return
 
-    random.seed(2024)
-    np.random.seed(2024)
+    if generator == "parallel":
+        from datagen import parallel_tables
+        parallel_tables(conn, scale=scale, seed=seed, workers=workers, shard=shard, chunk_size=chunk_size)
+        conn.close()
+        return
+
+    cur.executescript(INDEX_SQL)
+
+    random.seed(seed)
+    np.random.seed(seed)
 
-    now = datetime(2024, 12, 31)
-    data_start = datetime(2022, 1, 1)   # 3 years of data
-    total_days = (now - data_start).days
+    now = DATA_END
+    total_days = (now - DATA_START).days
 
     # ── Agents ────────────────────────────────────────────────────────────────
-    teams  = ["Tier-1 Support", "Tier-2 Technical", "Returns & Refunds", "Escalations", "Billing"]
-    shifts = ["Morning (6-14)", "Afternoon (14-22)", "Night (22-6)"]
     states_list = list(STATES_CITIES.keys())
 
     agents = []
     for i, name in enumerate(AGENT_NAMES):
         st = random.choice(states_list)
         agents.append((
-            f"AGT{i+1:03d}", name, random.choice(teams),
-            random.choice(shifts), st,
+            f"AGT{i+1:03d}", name, random.choice(TEAMS),
+            random.choice(SHIFTS), st,
             (now - timedelta(days=random.randint(90, total_days))).strftime("%Y-%m-%d")
         ))
     cur.executemany("INSERT INTO agents VALUES (?,?,?,?,?,?)", agents)
 
     # ── Customers ─────────────────────────────────────────────────────────────
-    segments    = ["Retail", "Wholesale", "SME", "Corporate"]
-    seg_weights = [55, 20, 15, 10]
-    age_groups  = ["18-25", "26-35", "36-45", "46-60", "60+"]
-    age_weights = [20, 35, 25, 15, 5]
-
     customers = []
     for i in range(2000):
         cid   = f"CUST{i+1:05d}"
@@ -257,10 +675,10 @@ def init_db():
         state = random.choice(states_list)
         city  = random.choice(STATES_CITIES[state])
         zone  = STATE_ZONES.get(state, "North")
-        seg   = random.choices(segments, seg_weights)[0]
+        seg   = random.choices(SEGMENTS, SEG_WEIGHTS)[0]
         jdate = (now - timedelta(days=random.randint(30, total_days))).strftime("%Y-%m-%d")
-        status = random.choices(["Active", "Churned", "At-Risk"], [72, 14, 14])[0]
-        age_group = random.choices(age_groups, age_weights)[0]
+        status = random.choices(CUST_STATUSES, CUST_STATUS_W)[0]
+        age_group = random.choices(AGE_GROUPS, AGE_WEIGHTS)[0]
         customers.append((
             cid, name, f"{name.lower().replace(' ','.')}@gmail.com",
             f"+91-{random.randint(7000000000,9999999999)}",
@@ -274,13 +692,10 @@ def init_db():
     cust_ids = [c[0] for c in customers]
     cust_map  = {c[0]: c for c in customers}
 
-    # Festival effect: bump volumes in Oct-Nov (Diwali), Jan (Republic Day Sale), Aug (Independence Day)
     def order_weight_for_month(m):
-        festival_months = {10: 2.8, 11: 2.2, 1: 1.8, 8: 1.5, 3: 1.3, 7: 1.2}
-        return festival_months.get(m, 1.0)
+        return FESTIVAL_MONTHS.get(m, 1.0)
 
     orders = []
-    cust_spent = {c: 0 for c in cust_ids}
     for i in range(12000):
         oid    = f"ORD{i+1:06d}"
         cid    = random.choice(cust_ids)
@@ -296,16 +711,14 @@ def init_db():
             day_offset = random.randint(0, total_days)
             odate = (now - timedelta(days=day_offset))
 
-        cat_name = random.choices(list(CATEGORIES.keys()),
-                                   [25, 20, 15, 12, 10, 8, 6, 4])[0]
+        cat_name = random.choices(list(CATEGORIES.keys()), CATEGORY_WEIGHTS)[0]
         cat = CATEGORIES[cat_name]
         product = random.choice(cat["products"])
         lo, hi = cat["price_range"]
         base_price = round(random.uniform(lo, hi), 2)
 
         # Segment premium
-        seg_mult = {"Corporate": 1.5, "Wholesale": 1.3, "SME": 1.1, "Retail": 1.0}
-        base_price = round(base_price * seg_mult.get(c_data[8], 1.0), 2)
+        base_price = round(base_price * SEG_MULT.get(c_data[8], 1.0), 2)
 
         gst_pct   = cat["gst"]
         gst_amt   = round(base_price * gst_pct / 100, 2)
@@ -319,8 +732,6 @@ def init_db():
         ddate = (odate + timedelta(days=delivery_days)).strftime("%Y-%m-%d")
         is_returned = 1 if order_status == "Returned" else 0
 
-        cust_spent[cid] += final_amt if order_status == "Delivered" else 0
-
         orders.append((
             oid, cid, odate.strftime("%Y-%m-%d"), ddate,
             base_price, gst_amt, discount, final_amt,
@@ -331,9 +742,7 @@ def init_db():
     cur.executemany("INSERT INTO orders VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)", orders)
 
     # Update tiers
-    for cid, spent in cust_spent.items():
-        tier = get_tier(spent)
-        cur.execute("UPDATE customers SET tier=? WHERE customer_id=?", (tier, cid))
+    recompute_tiers(conn)
 
     # ── Tickets ───────────────────────────────────────────────────────────────
     agent_ids  = [a[0] for a in agents]
@@ -349,8 +758,7 @@ def init_db():
         status  = random.choices(TICKET_STATUSES, TICKET_STATUS_W)[0]
         cdate   = (now - timedelta(days=random.randint(0, total_days)))
 
-        res_hrs_map = {"Low": (12, 72), "Medium": (4, 24), "High": (1, 12), "Critical": (0.5, 6)}
-        lo_h, hi_h  = res_hrs_map[prio]
+        lo_h, hi_h  = RES_HOURS[prio]
         res_hours   = round(random.uniform(lo_h, hi_h), 2)
         frt_hours   = round(random.uniform(0.25, res_hours * 0.5), 2)
         rdate       = (cdate + timedelta(hours=res_hours))
@@ -367,13 +775,7 @@ def init_db():
     cur.executemany("INSERT INTO tickets VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)", tickets)
 
     # ── Returns ───────────────────────────────────────────────────────────────
-    return_reasons = ["Product Defective", "Wrong Item Delivered", "Size/Fit Issue",
-                      "Not as Described", "Damaged Packaging", "Changed Mind",
-                      "Better Price Available", "Delayed Delivery"]
-    refund_statuses = ["Completed", "Pending", "Processing"]
-    refund_weights  = [70, 18, 12]
-
-    returned_orders = [(o[0], o[1], o[2], o[4], o[5]) for o in orders if o[16] == 1]
+    returned_orders = [(o[0], o[1], o[2], o[4], o[13]) for o in orders if o[16] == 1]
     returns = []
     for i, (oid, cid, odate, amt, state) in enumerate(returned_orders):
         rid = f"RET{i+1:05d}"
@@ -381,12 +783,64 @@ def init_db():
         refund_amt = round(amt * random.uniform(0.85, 1.0), 2)
         returns.append((
             rid, oid, cid, rdate,
-            random.choice(return_reasons), refund_amt,
-            random.choices(refund_statuses, refund_weights)[0], state
+            random.choice(RETURN_REASONS), refund_amt,
+            random.choices(REFUND_STATUSES, REFUND_WEIGHTS)[0], state
         ))
 
     cur.executemany("INSERT INTO returns VALUES (?,?,?,?,?,?,?,?)", returns)
 
     conn.commit()
     conn.close()
-    print(f"Database seeded: 2000 customers, {len(orders)} orders, {len(tickets)} tickets, {len(returns)} returns.")
+    print(f"Database seeded: {len(customers)} customers, {len(orders)} orders, {len(tickets)} tickets, {len(returns)} returns.")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Tier maintenance — set-based, safe to run whenever orders change
+# ─────────────────────────────────────────────────────────────────────────────
+def tier_case_sql(col):
+    """SQL twin of get_tier(), built from TIER_THRESHOLDS in the same order."""
+    whens = " ".join(f"WHEN {col} >= {t} THEN '{name}'" for name, t in TIER_THRESHOLDS.items())
+    return f"CASE {whens} ELSE 'Bronze' END"
+
+def recompute_tiers(conn=None, customer_ids=None):
+    """
+    Recompute customers.tier from delivered order value in one pass:
+    a single GROUP BY over orders into a keyed temp table, then one
+    UPDATE ... FROM join that only touches rows whose tier changed.
+    Pass `customer_ids` to limit the work to customers with new orders.
+    Runs inside the caller's transaction on a passed `conn` (the caller
+    commits). Returns the number of customers whose tier changed.
+    """
+    own = conn is None
+    conn = conn or get_connection()
+    scope = spend_scope = ""
+    if customer_ids is not None:
+        conn.execute("DROP TABLE IF EXISTS temp._tier_scope")
+        conn.execute("CREATE TEMP TABLE _tier_scope (customer_id TEXT PRIMARY KEY) WITHOUT ROWID")
+        conn.executemany("INSERT OR IGNORE INTO _tier_scope VALUES (?)", ((c,) for c in customer_ids))
+        scope       = "WHERE c.customer_id IN (SELECT customer_id FROM _tier_scope)"
+        spend_scope = "AND o.customer_id IN (SELECT customer_id FROM _tier_scope)"
+
+    conn.execute("DROP TABLE IF EXISTS temp._tiers")
+    conn.execute("CREATE TEMP TABLE _tiers (customer_id TEXT PRIMARY KEY, tier TEXT) WITHOUT ROWID")
+    conn.execute(f"""
+    INSERT INTO _tiers
+    SELECT c.customer_id, {tier_case_sql("COALESCE(s.spent, 0)")}
+    FROM customers c
+    LEFT JOIN (SELECT o.customer_id, SUM(o.final_amount) AS spent
+               FROM orders o
+               WHERE o.order_status = 'Delivered' {spend_scope}
+               GROUP BY o.customer_id) s ON s.customer_id = c.customer_id
+    {scope}
+    """)
+    before = conn.total_changes
+    conn.execute("""UPDATE customers SET tier = t.tier
+                    FROM _tiers t
+                    WHERE t.customer_id = customers.customer_id AND customers.tier IS NOT t.tier""")
+    changed = conn.total_changes - before
+    conn.execute("DROP TABLE temp._tiers")
+    conn.execute("DROP TABLE IF EXISTS temp._tier_scope")
+    if own:
+        conn.commit()
+        conn.close()
+    return changed
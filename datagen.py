@@ -0,0 +1,521 @@
+"""
+datagen.py — Vectorized NumPy generator for the synthetic India ops dataset.
+Builds every table as whole arrays instead of row-by-row loops, so the
+2,000 / 12,000 / 5,000 base volumes can be multiplied by `scale` for load tests.
+
+    python datagen.py --scale 100 --db india_ops_100x.db
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from database import (
+    STATES_CITIES, STATE_ZONES, CATEGORIES, CATEGORY_WEIGHTS,
+    PAYMENT_METHODS, PAYMENT_WEIGHTS, ORDER_STATUSES, ORDER_WEIGHTS,
+    TICKET_CATEGORIES, TICKET_PRIORITIES, TICKET_PRIORITY_W,
+    TICKET_STATUSES, TICKET_STATUS_W, FIRST_NAMES, LAST_NAMES, AGENT_NAMES,
+    SEGMENTS, SEG_WEIGHTS, SEG_MULT, AGE_GROUPS, AGE_WEIGHTS,
+    CUST_STATUSES, CUST_STATUS_W, TEAMS, SHIFTS, RES_HOURS,
+    RETURN_REASONS, REFUND_STATUSES, REFUND_WEIGHTS, FESTIVAL_MONTHS,
+    STATE_PIN_PREFIX, TIER_THRESHOLDS, DATA_START, DATA_END,
+    BASE_CUSTOMERS, BASE_ORDERS, BASE_TICKETS, SCHEMA_SQL, INDEX_SQL, init_db, recompute_tiers,
+)
+
+EPOCH      = np.datetime64(DATA_START.date(), "D")
+TOTAL_DAYS = (DATA_END - DATA_START).days
+STATES     = list(STATES_CITIES.keys())
+CAT_NAMES  = list(CATEGORIES.keys())
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Array helpers
+# ─────────────────────────────────────────────────────────────────────────────
+def _pick(rng, n, weights):
+    w = np.asarray(weights, dtype=float)
+    return rng.choice(w.size, size=n, p=w / w.sum())
+
+def _cat(codes, labels):
+    uniq, remap = np.unique(np.asarray(labels, dtype=object), return_inverse=True)
+    return pd.Categorical.from_codes(remap[codes], categories=uniq)
+
+def _ids(prefix, numbers, width):
+    return (prefix + pd.Series(numbers).astype(str).str.zfill(width)).to_numpy()
+
+def _cust_ids(cust_idx):
+    """Customer ids are positional: row i of the customer master is CUST{i+1}."""
+    return _ids("CUST", np.asarray(cust_idx) + 1, 5)
+
+def _take(series, idx):
+    return series.iloc[idx].reset_index(drop=True)
+
+def _dates(day_offsets):
+    """Day offsets from DATA_START -> 'YYYY-MM-DD' strings."""
+    return np.datetime_as_string(EPOCH + np.asarray(day_offsets, dtype="int64"), unit="D")
+
+def _nested_pick(rng, outer, groups):
+    """Uniform pick inside groups[outer[i]] for every row, like random.choice per row."""
+    sizes   = np.array([len(g) for g in groups])
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    inner   = (rng.random(outer.size) * sizes[outer]).astype(np.int64)
+    return offsets[outer] + inner, [x for g in groups for x in g]
+
+def festival_day_weights():
+    """Per-day sampling weight, identical to the accept/reject loop in init_db."""
+    months = (EPOCH + np.arange(TOTAL_DAYS + 1)).astype("datetime64[M]").astype(int) % 12 + 1
+    lut = np.array([FESTIVAL_MONTHS.get(m, 1.0) for m in range(1, 13)])
+    return lut[months - 1]
+
+def _festival_days(rng, n):
+    return _pick(rng, n, festival_day_weights())
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Table generators
+# ─────────────────────────────────────────────────────────────────────────────
+def generate_agents(rng):
+    n = len(AGENT_NAMES)
+    return pd.DataFrame({
+        "agent_id":   [f"AGT{i+1:03d}" for i in range(n)],
+        "agent_name": AGENT_NAMES,
+        "team":       _cat(rng.integers(0, len(TEAMS), n), TEAMS),
+        "shift":      _cat(rng.integers(0, len(SHIFTS), n), SHIFTS),
+        "state":      _cat(rng.integers(0, len(STATES), n), STATES),
+        "join_date":  _dates(TOTAL_DAYS - rng.integers(90, TOTAL_DAYS + 1, n)),
+    })
+
+
+def generate_customers(rng, n, start=1):
+    full_names = [f"{f} {l}" for f in FIRST_NAMES for l in LAST_NAMES]
+    emails     = [f"{x.lower().replace(' ', '.')}@gmail.com" for x in full_names]
+    name_idx   = rng.integers(0, len(FIRST_NAMES), n) * len(LAST_NAMES) + rng.integers(0, len(LAST_NAMES), n)
+
+    state_idx = rng.integers(0, len(STATES), n)
+    city_idx, cities = _nested_pick(rng, state_idx, [STATES_CITIES[s] for s in STATES])
+    zones  = sorted(set(STATE_ZONES.values()))
+    zone_idx = np.array([zones.index(STATE_ZONES.get(s, "North")) for s in STATES])[state_idx]
+    pin_prefix = np.array([STATE_PIN_PREFIX[s] for s in STATES])[state_idx]
+    pincode = pin_prefix * 100000 + rng.integers(10000, 100000, n)
+
+    return pd.DataFrame({
+        "customer_id": _cust_ids(np.arange(start - 1, start - 1 + n)),
+        "full_name":   _cat(name_idx, full_names),
+        "email":       _cat(name_idx, emails),
+        "phone":       "+91-" + pd.Series(rng.integers(7000000000, 10000000000, n)).astype(str),
+        "city":        _cat(city_idx, cities),
+        "state":       _cat(state_idx, STATES),
+        "zone":        _cat(zone_idx, zones),
+        "pincode":     pd.Series(pincode).astype(str),
+        "segment":     _cat(_pick(rng, n, SEG_WEIGHTS), SEGMENTS),
+        "tier":        "Bronze",    # tier updated after order aggregation
+        "join_date":   _dates(TOTAL_DAYS - rng.integers(30, TOTAL_DAYS + 1, n)),
+        "status":      _cat(_pick(rng, n, CUST_STATUS_W), CUST_STATUSES),
+        "age_group":   _cat(_pick(rng, n, AGE_WEIGHTS), AGE_GROUPS),
+    })
+
+
+def generate_orders(rng, n, customers, start=1, day_offsets=None):
+    """
+    Orders for randomly chosen customers. `customers` only needs the city,
+    state, zone and segment columns, in customer-id order. `day_offsets` lets
+    a caller supply pre-sampled order days (e.g. a single year); otherwise the
+    full festival-weighted 2022-2024 range is sampled.
+    """
+    cust_idx = rng.integers(0, len(customers), n)
+    c_zone   = _take(customers["zone"], cust_idx)
+    odays    = _festival_days(rng, n) if day_offsets is None else np.asarray(day_offsets)
+
+    cat_idx = _pick(rng, n, CATEGORY_WEIGHTS)
+    prod_idx, products = _nested_pick(rng, cat_idx, [CATEGORIES[c]["products"] for c in CAT_NAMES])
+    lo  = np.array([CATEGORIES[c]["price_range"][0] for c in CAT_NAMES], dtype=float)[cat_idx]
+    hi  = np.array([CATEGORIES[c]["price_range"][1] for c in CAT_NAMES], dtype=float)[cat_idx]
+    gst = np.array([CATEGORIES[c]["gst"] for c in CAT_NAMES], dtype=float)[cat_idx]
+
+    # Segment premium
+    seg_mult   = customers["segment"].map(SEG_MULT).astype(float).to_numpy()[cust_idx]
+    base_price = np.round(np.round(rng.uniform(lo, hi), 2) * seg_mult, 2)
+    gst_amt    = np.round(base_price * gst / 100, 2)
+    discount   = np.round(base_price * rng.uniform(0, 0.25, n), 2)
+    final_amt  = np.round(base_price + gst_amt - discount, 2)
+
+    status_idx = _pick(rng, n, ORDER_WEIGHTS)
+    near = c_zone.isin(["North", "West"]).to_numpy()
+    delivery_days = rng.integers(np.where(near, 2, 3), np.where(near, 11, 15))
+
+    orders = pd.DataFrame({
+        "order_id":       _ids("ORD", np.arange(start, start + n), 6),
+        "customer_id":    _cust_ids(cust_idx),
+        "order_date":     _dates(odays),
+        "delivery_date":  _dates(odays + delivery_days),
+        "amount":         base_price,
+        "gst_amount":     gst_amt,
+        "discount":       discount,
+        "final_amount":   final_amt,
+        "category":       _cat(cat_idx, CAT_NAMES),
+        "product_name":   _cat(prod_idx, products),
+        "payment_method": _cat(_pick(rng, n, PAYMENT_WEIGHTS), PAYMENT_METHODS),
+        "order_status":   _cat(status_idx, ORDER_STATUSES),
+        "city":           _take(customers["city"], cust_idx),
+        "state":          _take(customers["state"], cust_idx),
+        "zone":           c_zone,
+        "delivery_days":  delivery_days,
+        "is_returned":    (status_idx == ORDER_STATUSES.index("Returned")).astype(np.int64),
+    })
+    return orders, cust_idx
+
+
+def customer_spend(orders, cust_idx, n_customers):
+    """Delivered spend per customer position, the input to the tier rule."""
+    delivered = (orders["order_status"] == "Delivered").to_numpy()
+    return np.bincount(cust_idx, weights=np.where(delivered, orders["final_amount"].to_numpy(), 0.0),
+                       minlength=n_customers)
+
+def tier_labels(spent):
+    """Same rule as get_tier, applied to a whole spend array."""
+    names = list(TIER_THRESHOLDS.keys())
+    return np.select([spent >= t for t in TIER_THRESHOLDS.values()], names, "Bronze")
+
+def assign_tiers(customers, orders, cust_idx):
+    customers["tier"] = tier_labels(customer_spend(orders, cust_idx, len(customers)))
+    return customers
+
+
+def generate_tickets(rng, n, customers, agents, n_orders, start=1, day_offsets=None):
+    cust_idx = rng.integers(0, len(customers), n)
+    prio_idx = _pick(rng, n, TICKET_PRIORITY_W)
+    cdays    = rng.integers(0, TOTAL_DAYS + 1, n) if day_offsets is None else np.asarray(day_offsets)
+
+    lo_h = np.array([RES_HOURS[p][0] for p in TICKET_PRIORITIES])[prio_idx]
+    hi_h = np.array([RES_HOURS[p][1] for p in TICKET_PRIORITIES])[prio_idx]
+    res_hours = np.round(rng.uniform(lo_h, hi_h), 2)
+    frt_hours = np.round(rng.uniform(0.25, res_hours * 0.5), 2)
+    csat      = np.clip(np.round(rng.normal(3.9, 0.7, n), 1), 1.0, 5.0)
+
+    return pd.DataFrame({
+        "ticket_id":        _ids("TKT", np.arange(start, start + n), 6),
+        "customer_id":      _cust_ids(cust_idx),
+        "agent_id":         agents["agent_id"].to_numpy()[rng.integers(0, len(agents), n)],
+        "order_id":         _ids("ORD", rng.integers(1, n_orders + 1, n), 6),
+        "created_date":     _dates(cdays),
+        "resolved_date":    _dates(cdays + (res_hours // 24).astype(np.int64)),
+        "ticket_category":  _cat(rng.integers(0, len(TICKET_CATEGORIES), n), TICKET_CATEGORIES),
+        "priority":         _cat(prio_idx, TICKET_PRIORITIES),
+        "status":           _cat(_pick(rng, n, TICKET_STATUS_W), TICKET_STATUSES),
+        "csat_score":       csat,
+        "resolution_hours": res_hours,
+        "first_response_h": frt_hours,
+        "is_repeat":        (rng.random(n) < 0.18).astype(np.int64),
+        "state":            _take(customers["state"], cust_idx),
+    })
+
+
+def generate_returns(rng, orders, start=1):
+    ret = orders[orders["is_returned"] == 1]
+    n = len(ret)
+    odays = (ret["order_date"].to_numpy().astype("datetime64[D]") - EPOCH).astype(np.int64)
+    return pd.DataFrame({
+        "return_id":     _ids("RET", np.arange(start, start + n), 5),
+        "order_id":      ret["order_id"].to_numpy(),
+        "customer_id":   ret["customer_id"].to_numpy(),
+        "return_date":   _dates(odays + rng.integers(1, 8, n)),
+        "reason":        _cat(rng.integers(0, len(RETURN_REASONS), n), RETURN_REASONS),
+        "refund_amount": np.round(ret["amount"].to_numpy() * rng.uniform(0.85, 1.0, n), 2),
+        "refund_status": _cat(_pick(rng, n, REFUND_WEIGHTS), REFUND_STATUSES),
+        "state":         ret["state"].reset_index(drop=True),
+    })
+
+
+def generate_tables(scale=1, seed=2024):
+    """All five tables as DataFrames, base volumes multiplied by `scale`."""
+    rng = np.random.default_rng(seed)
+    agents    = generate_agents(rng)
+    customers = generate_customers(rng, int(BASE_CUSTOMERS * scale))
+    orders, cust_idx = generate_orders(rng, int(BASE_ORDERS * scale), customers)
+    customers = assign_tiers(customers, orders, cust_idx)
+    tickets   = generate_tickets(rng, int(BASE_TICKETS * scale), customers, agents, len(orders))
+    returns   = generate_returns(rng, orders)
+    return {"agents": agents, "customers": customers, "orders": orders,
+            "tickets": tickets, "returns": returns}
+
+
+def insert_frame(conn, name, df):
+    marks = ",".join("?" * df.shape[1])
+    conn.executemany(f"INSERT INTO {name} VALUES ({marks})", zip(*[df[c].tolist() for c in df.columns]))
+
+def insert_tables(conn, tables):
+    for name, df in tables.items():
+        insert_frame(conn, name, df)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Streaming load — fixed-size chunks, bounded memory
+# ─────────────────────────────────────────────────────────────────────────────
+BULK_PRAGMAS = {
+    "journal_mode": "OFF",
+    "synchronous":  "OFF",
+    "locking_mode": "EXCLUSIVE",
+    "temp_store":   "MEMORY",
+    "cache_size":   -65536,      # 64 MB page cache while loading
+}
+# index build + tier recompute sort every row: spill to temp files, not RAM
+INDEX_PRAGMAS = {
+    "temp_store":   "FILE",
+    "cache_size":   -2000,
+}
+RESTORE_PRAGMAS = {
+    "journal_mode": "DELETE",
+    "synchronous":  "FULL",
+    "locking_mode": "NORMAL",
+    "temp_store":   "DEFAULT",
+    "cache_size":   -2000,
+}
+
+def _pragmas(conn, settings):
+    for k, v in settings.items():
+        conn.execute(f"PRAGMA {k}={v}")
+
+def _peak_rss_mb():
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:   # Windows
+        return float("nan")
+
+def _chunks(total, size):
+    for lo in range(0, total, size):
+        yield lo, min(size, total - lo)
+
+def _progress(report, table, done, total, t0):
+    if report is None:
+        return
+    secs = max(time.perf_counter() - t0, 1e-9)
+    report(f"  {table:<10} {done:>12,} / {total:<12,} {done / secs:>12,.0f} rows/s  "
+           f"peak RSS {_peak_rss_mb():,.0f} MB")
+
+
+def stream_tables(conn, scale=1, seed=2024, chunk_size=100_000, report=print):
+    """
+    Generate and insert every table chunk by chunk, one explicit transaction
+    per chunk. Only per-customer dimension codes are kept between chunks, so
+    memory grows with the customer count rather than with orders/tickets.
+    Indexes are built and tiers recomputed in SQL after the load.
+    Returns {table: rows} plus overall seconds and rows/s.
+    """
+    rng = np.random.default_rng(seed)
+    n_cust, n_ord, n_tkt = (int(b * scale) for b in (BASE_CUSTOMERS, BASE_ORDERS, BASE_TICKETS))
+    counts = {}
+    t_all = time.perf_counter()
+    _pragmas(conn, BULK_PRAGMAS)
+
+    conn.execute("BEGIN")
+    agents = generate_agents(rng)
+    insert_frame(conn, "agents", agents)
+    conn.commit()
+    counts["agents"] = len(agents)
+
+    # Customers: keep only the dimension codes orders/tickets look up
+    dims, t0 = [], time.perf_counter()
+    for lo, n in _chunks(n_cust, chunk_size):
+        chunk = generate_customers(rng, n, start=lo + 1)
+        conn.execute("BEGIN")
+        insert_frame(conn, "customers", chunk)
+        conn.commit()
+        dims.append(chunk[["city", "state", "zone", "segment"]])
+        _progress(report, "customers", lo + n, n_cust, t0)
+    dims = pd.concat(dims, ignore_index=True)
+    counts["customers"] = n_cust
+
+    # Orders + their returns
+    n_ret, t0 = 0, time.perf_counter()
+    for lo, n in _chunks(n_ord, chunk_size):
+        orders, _ = generate_orders(rng, n, dims, start=lo + 1)
+        returns = generate_returns(rng, orders, start=n_ret + 1)
+        conn.execute("BEGIN")
+        insert_frame(conn, "orders", orders)
+        insert_frame(conn, "returns", returns)
+        conn.commit()
+        n_ret += len(returns)
+        _progress(report, "orders", lo + n, n_ord, t0)
+    counts["orders"], counts["returns"] = n_ord, n_ret
+
+    t0 = time.perf_counter()
+    for lo, n in _chunks(n_tkt, chunk_size):
+        tickets = generate_tickets(rng, n, dims, agents, n_ord, start=lo + 1)
+        conn.execute("BEGIN")
+        insert_frame(conn, "tickets", tickets)
+        conn.commit()
+        _progress(report, "tickets", lo + n, n_tkt, t0)
+    counts["tickets"] = n_tkt
+
+    t0 = time.perf_counter()
+    _pragmas(conn, INDEX_PRAGMAS)
+    conn.executescript(INDEX_SQL)
+    if report:
+        report(f"  indexes    built in {time.perf_counter() - t0:.1f}s")
+    t0 = time.perf_counter()
+    recompute_tiers(conn)
+    conn.commit()
+    if report:
+        report(f"  tiers      recomputed in {time.perf_counter() - t0:.1f}s")
+    _pragmas(conn, RESTORE_PRAGMAS)
+
+    secs  = time.perf_counter() - t_all
+    total = sum(counts.values())
+    if report:
+        report(f"Database seeded: {counts['customers']:,} customers, {n_ord:,} orders, {n_tkt:,} tickets, "
+               f"{n_ret:,} returns in {secs:.1f}s ({total / secs:,.0f} rows/s, peak RSS {_peak_rss_mb():,.0f} MB).")
+    return {**counts, "seconds": secs, "rows_per_sec": total / secs}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Parallel load — one process per year/month shard, merged with ATTACH
+# ─────────────────────────────────────────────────────────────────────────────
+def shard_ranges(shard="year"):
+    """[(label, first_day, end_day)) day-offset ranges covering DATA_START..DATA_END."""
+    days  = EPOCH + np.arange(TOTAL_DAYS + 1)
+    unit  = {"year": "Y", "month": "M"}[shard]
+    keys  = days.astype(f"datetime64[{unit}]")
+    edges = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends  = np.r_[edges[1:], TOTAL_DAYS + 1]
+    return [(str(keys[lo]), int(lo), int(hi)) for lo, hi in zip(edges, ends)]
+
+def _apportion(total, weights):
+    """Split `total` rows proportionally to `weights` (largest remainder, sums exactly)."""
+    w = np.asarray(weights, dtype=float)
+    exact = total * w / w.sum()
+    counts = np.floor(exact).astype(np.int64)
+    counts[np.argsort(counts - exact)[:total - counts.sum()]] += 1
+    return counts.tolist()
+
+
+def _generate_shard(task):
+    """
+    Worker: write one shard's orders, returns and tickets to its own SQLite
+    file. Runs in a child process, so everything it needs arrives in `task`.
+    """
+    (path, seed, dims, agents, lo, hi, n_ord, ord_start, n_tkt, tkt_start, n_orders_total, chunk_size) = task
+    rng = np.random.default_rng(seed)
+    day_w = festival_day_weights()[lo:hi]
+
+    conn = sqlite3.connect(path)
+    _pragmas(conn, BULK_PRAGMAS)
+    conn.executescript(SCHEMA_SQL)
+    n_ret = 0
+    for off, n in _chunks(n_ord, chunk_size):
+        orders, _ = generate_orders(rng, n, dims, start=ord_start + off, day_offsets=lo + _pick(rng, n, day_w))
+        returns = generate_returns(rng, orders, start=n_ret + 1)   # renumbered globally on merge
+        conn.execute("BEGIN")
+        insert_frame(conn, "orders", orders)
+        insert_frame(conn, "returns", returns)
+        conn.commit()
+        n_ret += len(returns)
+    for off, n in _chunks(n_tkt, chunk_size):
+        tickets = generate_tickets(rng, n, dims, agents, n_orders_total, start=tkt_start + off,
+                                   day_offsets=rng.integers(lo, hi, n))
+        conn.execute("BEGIN")
+        insert_frame(conn, "tickets", tickets)
+        conn.commit()
+    conn.close()
+    return {"orders": n_ord, "returns": n_ret, "tickets": n_tkt}
+
+
+def parallel_tables(conn, scale=1, seed=2024, workers=None, shard="year", chunk_size=100_000, report=print):
+    """
+    Generate orders/returns/tickets per year (or month) shard across a process
+    pool and merge the shard files into `conn`. Masters (agents, customers)
+    are generated once in the parent; every shard draws from its own child of
+    SeedSequence(seed), so the output does not depend on `workers`.
+    Orders are apportioned to shards by festival-weighted days and tickets by
+    day count, keeping the same distributions as the single-process path.
+    Returns {table: rows} plus overall seconds and rows/s.
+    """
+    n_cust, n_ord, n_tkt = (int(b * scale) for b in (BASE_CUSTOMERS, BASE_ORDERS, BASE_TICKETS))
+    ranges  = shard_ranges(shard)
+    seeds   = np.random.SeedSequence(seed).spawn(len(ranges) + 1)
+    workers = workers or os.cpu_count() or 1
+    t_all = time.perf_counter()
+    _pragmas(conn, BULK_PRAGMAS)
+
+    rng = np.random.default_rng(seeds[0])
+    agents = generate_agents(rng)
+    counts = {"agents": len(agents), "customers": n_cust}
+    conn.execute("BEGIN")
+    insert_frame(conn, "agents", agents)
+    dims = []
+    for lo, n in _chunks(n_cust, chunk_size):
+        chunk = generate_customers(rng, n, start=lo + 1)
+        insert_frame(conn, "customers", chunk)
+        dims.append(chunk[["city", "state", "zone", "segment"]])
+    conn.commit()
+    dims = pd.concat(dims, ignore_index=True)
+
+    day_w    = festival_day_weights()
+    ord_per  = _apportion(n_ord, [day_w[lo:hi].sum() for _, lo, hi in ranges])
+    tkt_per  = _apportion(n_tkt, [hi - lo for _, lo, hi in ranges])
+    ord_from = np.r_[0, np.cumsum(ord_per)[:-1]] + 1
+    tkt_from = np.r_[0, np.cumsum(tkt_per)[:-1]] + 1
+
+    with tempfile.TemporaryDirectory(prefix="india_ops_shards_") as tmp:
+        tasks = [(os.path.join(tmp, f"shard_{label}.db"), seeds[i + 1], dims, agents[["agent_id"]], lo, hi,
+                  ord_per[i], int(ord_from[i]), tkt_per[i], int(tkt_from[i]), n_ord, chunk_size)
+                 for i, (label, lo, hi) in enumerate(ranges)]
+        t0 = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_generate_shard, tasks))
+        if report:
+            report(f"  shards     {len(tasks)} x {shard} generated on {workers} worker(s) "
+                   f"in {time.perf_counter() - t0:.1f}s")
+
+        # Merge in shard order; return ids are renumbered into one global sequence
+        t0 = time.perf_counter()
+        ret_cols = [r[1] for r in conn.execute("PRAGMA table_info(returns)")][1:]
+        n_ret = 0
+        for task, res in zip(tasks, results):
+            conn.execute("ATTACH DATABASE ? AS shard", (task[0],))
+            conn.execute("BEGIN")
+            conn.execute("INSERT INTO orders  SELECT * FROM shard.orders  ORDER BY rowid")
+            conn.execute("INSERT INTO tickets SELECT * FROM shard.tickets ORDER BY rowid")
+            conn.execute(f"INSERT INTO returns SELECT 'RET' || printf('%05d', rowid + ?), {', '.join(ret_cols)} "
+                         f"FROM shard.returns ORDER BY rowid", (n_ret,))
+            conn.commit()
+            conn.execute("DETACH DATABASE shard")
+            n_ret += res["returns"]
+        if report:
+            report(f"  merge      {n_ord + n_tkt + n_ret:,} rows in {time.perf_counter() - t0:.1f}s")
+    counts.update(orders=n_ord, returns=n_ret, tickets=n_tkt)
+
+    t0 = time.perf_counter()
+    _pragmas(conn, INDEX_PRAGMAS)
+    conn.executescript(INDEX_SQL)
+    recompute_tiers(conn)
+    conn.commit()
+    if report:
+        report(f"  indexes + tiers in {time.perf_counter() - t0:.1f}s")
+    _pragmas(conn, RESTORE_PRAGMAS)
+
+    secs  = time.perf_counter() - t_all
+    total = sum(counts.values())
+    if report:
+        report(f"Database seeded: {n_cust:,} customers, {n_ord:,} orders, {n_tkt:,} tickets, "
+               f"{n_ret:,} returns in {secs:.1f}s ({total / secs:,.0f} rows/s, {workers} worker(s)).")
+    return {**counts, "seconds": secs, "rows_per_sec": total / secs}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Seed a synthetic India ops database with the NumPy generator.")
+    ap.add_argument("--scale", type=float, default=1)
+    ap.add_argument("--seed",  type=int,   default=2024)
+    ap.add_argument("--db",    default=None, help="target SQLite file (default: DB_PATH)")
+    ap.add_argument("--stream", action="store_true", help="chunked load with bounded memory")
+    ap.add_argument("--parallel", action="store_true", help="generate year/month shards in a process pool")
+    ap.add_argument("--workers", type=int, default=None, help="pool size for --parallel (default: CPU count)")
+    ap.add_argument("--shard", choices=["year", "month"], default="year")
+    ap.add_argument("--chunk-size", type=int, default=100_000)
+    args = ap.parse_args()
+    generator = "parallel" if args.parallel else "stream" if args.stream else "numpy"
+    init_db(path=args.db, generator=generator, scale=args.scale, seed=args.seed,
+            chunk_size=args.chunk_size, workers=args.workers, shard=args.shard)
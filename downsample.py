@@ -0,0 +1,85 @@
+"""
+downsample.py — Point-budget reduction of time series before plotting
+Long trend series (a multi-year daily revenue trend, or finer data after
+ingest growth) are cut to a target number of points on the server, so the
+browser gets a small Plotly payload. Both methods keep real data points
+(row indices into the input) including the first and last:
+
+  lttb    Largest-Triangle-Three-Buckets: one point per bucket, the one that
+          forms the largest triangle with its neighbours' picks, so the visual
+          shape and isolated spikes (Diwali peaks) survive; a one-day dip
+          next to a larger swing can be dropped.
+  minmax  the minimum and maximum of every bucket, so every peak and trough
+          is kept exactly.
+
+    rt = downsample_frame(trend, "date", ["revenue", "orders"], 500, "lttb")
+"""
+import numpy as np
+
+METHODS = ("raw", "lttb", "minmax")
+DEFAULT_POINTS = 500
+
+
+def _numeric(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def lttb(x, y, points):
+    """Indices of the `points` samples LTTB keeps from (x, y); all indices when points >= len(y)."""
+    y = np.asarray(y, dtype=float)
+    size = len(y)
+    if points >= size or points < 3:
+        return np.arange(size)
+    x = _numeric(x)
+    # points-2 buckets between the fixed first and last samples
+    edges = np.linspace(1, size - 1, points - 1).astype(np.int64)
+    edges = np.append(edges, size)
+    keep = np.empty(points, dtype=np.int64)
+    keep[0], keep[-1] = 0, size - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi, nxt = edges[i], edges[i + 1], edges[i + 2]
+        cx, cy = x[hi:nxt].mean(), y[hi:nxt].mean()      # centroid of the next bucket
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def minmax(y, points):
+    """Indices of each bucket's min and max (about points // 2 equal-width buckets), plus the first and last sample."""
+    y = np.asarray(y, dtype=float)
+    size = len(y)
+    if points >= size or points < 4:
+        return np.arange(size)
+    width = -(-size // (points // 2))
+    rows = -(-size // width)
+    pad = rows * width - size
+    offsets = np.arange(rows) * width
+    lows = np.pad(y, (0, pad), constant_values=np.inf).reshape(rows, width).argmin(axis=1)
+    highs = np.pad(y, (0, pad), constant_values=-np.inf).reshape(rows, width).argmax(axis=1)
+    return np.unique(np.r_[0, offsets + lows, offsets + highs, size - 1])
+
+
+def downsample_frame(df, x, y, points=DEFAULT_POINTS, method="lttb"):
+    """
+    Rows of `df` (sorted by `x`) reduced to about `points` with `method`.
+    `y` is a column or a list of columns: LTTB picks on the first, min/max
+    keeps the extremes of every listed column. "raw" returns df unchanged.
+    """
+    method = (method or "raw").lower().replace("/", "")
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+    cols = [y] if isinstance(y, str) else list(y)
+    if method == "raw" or len(df) <= points:
+        return df
+    if method == "lttb":
+        keep = lttb(df[x].to_numpy(), df[cols[0]].to_numpy(dtype=float, na_value=0.0), points)
+    else:
+        per_col = max(4, points // len(cols))
+        keep = np.unique(np.concatenate([minmax(df[c].to_numpy(dtype=float, na_value=0.0), per_col)
+                                         for c in cols]))
+    return df.iloc[keep].reset_index(drop=True)
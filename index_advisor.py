@@ -0,0 +1,153 @@
+"""
+index_advisor.py — EXPLAIN QUERY PLAN audit of queries.py + covering indexes
+Runs every get_* function for representative filter combinations, captures the
+SQL each one issues, and reports full table scans and temp B-trees.
+
+    python index_advisor.py            # report only
+    python index_advisor.py --apply    # create missing indexes, ANALYZE, report again
+
+New databases get the indexes from database.init_db(); run --apply once on
+a database seeded before them (the dashboard does not write at startup).
+"""
+import argparse
+import inspect
+import pandas as pd
+
+import database
+import queries
+from database import attach_partitions, get_connection, reader, trace_statements
+
+DEFAULT_START, DEFAULT_END = "2024-01-01", "2024-12-31"
+
+# One representative value per filter dimension; each is tried on its own
+REPRESENTATIVE = {"state": "Maharashtra", "zone": "South", "category": "Electronics", "segment": "Corporate"}
+
+# Workload-driven: date range first (every dashboard query is windowed),
+# then the equality filters, then the aggregated measures so the hot
+# aggregates never touch the table rows. idx_orders_date_cover is nearly as
+# wide as orders (~11% of the 20x file) but serves the shared order scan,
+# KPIs and top customers: without it the advisor's workload takes 16.4 s
+# instead of 12.3 s at 20x.
+COVERING_INDEXES = {
+    "idx_orders_date_cover": """orders(order_date, order_status, state, zone, category, payment_method,
+                                       customer_id, final_amount, discount, gst_amount, delivery_days, product_name)""",
+    "idx_orders_cust_status": "orders(customer_id, order_status, order_date, final_amount)",
+    "idx_tickets_date_cover": """tickets(created_date, state, customer_id, agent_id, status, ticket_category, priority,
+                                         csat_score, resolution_hours, first_response_h, is_repeat)""",
+    "idx_tickets_cust_date": "tickets(customer_id, created_date, csat_score)",
+    "idx_returns_date_cover": "returns(return_date, state, reason, refund_status, refund_amount)",
+    "idx_customers_state_seg": "customers(state, segment)",
+}
+
+# Dropped by apply_indexes where an older advisor created them.
+# idx_orders_state_date (state-first twin of idx_orders_date_cover): the
+# workload ran 12.4 s without it vs 12.3 s with it at 20x, for ~24 MB and a
+# second wide index to maintain on every ingest.
+RETIRED_INDEXES = {"idx_orders_state_date": "orders"}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Workload
+# ─────────────────────────────────────────────────────────────────────────────
+def query_functions():
+    return {name: fn for name, fn in inspect.getmembers(queries, inspect.isfunction)
+            if name.startswith("get_") and fn.__module__ == queries.__name__}
+
+def workload(start=DEFAULT_START, end=DEFAULT_END):
+    """(function name, kwargs) pairs: the unfiltered call plus one per filter it accepts."""
+    calls = []
+    for name, fn in query_functions().items():
+        params = inspect.signature(fn).parameters
+        base = {k: v for k, v in (("start", start), ("end", end)) if k in params}
+        calls.append((name, base))
+        for dim, value in REPRESENTATIVE.items():
+            if dim in params:
+                calls.append((name, {**base, dim: value}))
+    return calls
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Plan analysis
+# ─────────────────────────────────────────────────────────────────────────────
+def explain(conn, sql):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()]
+
+def classify(plan):
+    scans   = [d for d in plan if d.startswith("SCAN ") and "INDEX" not in d]
+    btrees  = [d for d in plan if "TEMP B-TREE" in d]
+    covered = [d for d in plan if "COVERING INDEX" in d]
+    return {"full_scans": len(scans), "temp_btrees": len(btrees), "covering": len(covered),
+            "issues": "; ".join(scans + btrees)}
+
+def audit(start=DEFAULT_START, end=DEFAULT_END):
+    """One row per SQL statement issued by the workload, with its plan verdict."""
+    fns, rows = query_functions(), []
+    # a fresh handle: cached EXPLAIN statements on pooled readers keep their old plan
+    conn = get_connection()
+    attach_partitions(conn)
+    for name, kwargs in workload(start, end):
+        with trace_statements() as stmts:
+            fns[name](**kwargs)
+        filters = ", ".join(f"{k}={v}" for k, v in kwargs.items() if k not in ("start", "end")) or "All"
+        for i, sql in enumerate(s for s in stmts if not s.lstrip().upper().startswith("PRAGMA")):
+            rows.append({"function": name, "filters": filters, "stmt": i, **classify(explain(conn, sql))})
+    conn.close()
+    return pd.DataFrame(rows)
+
+def summarize(report):
+    return (report.groupby("function")[["full_scans", "temp_btrees", "covering"]].sum()
+                  .sort_values(["full_scans", "temp_btrees"], ascending=False))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Apply
+# ─────────────────────────────────────────────────────────────────────────────
+def apply_indexes(path=None):
+    """
+    Create the covering indexes that are missing and drop retired ones; the
+    affected tables are re-ANALYZEd only when something changed, and a write
+    connection is opened only then. Returns the names created or dropped.
+    """
+    with reader(path) as conn:
+        existing = dict(conn.execute("SELECT name, type FROM sqlite_master WHERE type IN ('table', 'index')"))
+    create = {name: target for name, target in COVERING_INDEXES.items()
+              # views in the compact layout carry their own indexes
+              if name not in existing and existing.get(target.split("(")[0]) == "table"}
+    drop = {name: table for name, table in RETIRED_INDEXES.items() if name in existing}
+    if not create and not drop:
+        return []
+    conn = get_connection(path)
+    for name, target in create.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+    for name in drop:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    for table in sorted({t.split("(")[0] for t in create.values()} | set(drop.values())):
+        conn.execute(f"ANALYZE {table}")
+    conn.commit()
+    conn.close()
+    return list(create) + list(drop)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Audit queries.py plans and create covering indexes.")
+    ap.add_argument("--db", default=None, help=f"SQLite file (default: {database.DB_PATH})")
+    ap.add_argument("--apply", action="store_true", help="create the recommended indexes")
+    ap.add_argument("--detail", action="store_true", help="print every flagged statement")
+    args = ap.parse_args()
+    if args.db:
+        database.DB_PATH = args.db
+
+    before = audit()
+    print(f"Before: {before['full_scans'].sum()} full scans, {before['temp_btrees'].sum()} temp B-trees "
+          f"across {len(before)} statements")
+    print(summarize(before).to_string())
+    if args.detail:
+        flagged = before[before["issues"] != ""]
+        print(flagged[["function", "filters", "issues"]].to_string(index=False))
+    if args.apply:
+        changed = apply_indexes()
+        print(f"\nIndexes changed: {', '.join(changed) or 'none (all present)'}")
+        after = audit()
+        print(f"\nAfter:  {after['full_scans'].sum()} full scans, {after['temp_btrees'].sum()} temp B-trees, "
+              f"{after['covering'].sum()} covering-index reads")
+        print(summarize(after).to_string())
@@ -0,0 +1,170 @@
+"""
+ingest.py — Incremental append / upsert of orders, tickets, returns and customers
+Batches (DataFrame, CSV, JSONL or a list of dicts) are validated first (ISO
+dates, present and unique keys), then go into the existing tables in one
+transaction together with everything derived from them: customers.tier and
+the rollups (orders_daily, orders_weekly, tickets_weekly, customer_features)
+are recomputed only for the customers / days / weeks the batch touched, its
+new dimension values are added to dim_values, and the data version the result
+caches are keyed on is bumped. Any failure rolls all of it back. Ingest time
+scales with the batch, not the DB.
+
+    python ingest.py orders daily_orders.csv
+    python ingest.py tickets tickets.jsonl --upsert
+"""
+import argparse
+import os
+import time
+import pandas as pd
+
+import database
+from database import bump_data_version, get_connection, recompute_tiers
+from rollups import refresh_rollups
+
+INGEST_TABLES = ("customers", "orders", "tickets", "returns", "agents")
+CHUNK_ROWS = 50_000
+ROLLUP_DATES = {"orders": ("order_id", "order_date"), "tickets": ("ticket_id", "created_date")}
+
+
+def read_batch(batch):
+    """DataFrame | path to .csv/.jsonl/.json | list of dicts -> DataFrame."""
+    if isinstance(batch, pd.DataFrame):
+        return batch
+    if isinstance(batch, str):
+        if batch.endswith(".csv"):
+            return pd.read_csv(batch)
+        if batch.endswith((".jsonl", ".ndjson")):
+            return pd.read_json(batch, lines=True)
+        if batch.endswith(".json"):
+            return pd.read_json(batch)
+        raise ValueError(f"Unsupported batch file type: {batch}")
+    return pd.DataFrame(list(batch))
+
+
+def _table_columns(conn, table):
+    info = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    return [r[1] for r in info], [r[1] for r in info if r[5]]
+
+
+def _normalize_keys(df, pk):
+    """Ids as trimmed strings; every primary-key value present and unique within the batch."""
+    for col in [c for c in df.columns if c.endswith("_id")]:
+        ok = df[col].notna()
+        df.loc[ok, col] = df.loc[ok, col].astype(str).str.strip()
+    missing = [c for c in pk if c not in df.columns]
+    if missing:
+        raise ValueError(f"Batch has no {', '.join(missing)} column")
+    if df[pk].isna().any(axis=None):
+        raise ValueError(f"Batch has rows without {', '.join(pk)}")
+    dupes = df[df.duplicated(pk, keep=False)][pk[0]].unique()[:5].tolist()
+    if dupes:
+        raise ValueError(f"Duplicate {', '.join(pk)} in batch: {dupes}")
+
+
+def _normalize_dates(df):
+    """*_date columns as 'YYYY-MM-DD' (the stored format); anything that is not an ISO date is rejected."""
+    for col in [c for c in df.columns if c.endswith("_date")]:
+        ok = df[col].notna()
+        parsed = pd.to_datetime(df.loc[ok, col].astype(str), format="ISO8601", errors="coerce")
+        bad = df.loc[ok, col][parsed.isna()].unique()[:5].tolist()
+        if bad:
+            raise ValueError(f"{col} must be an ISO date (YYYY-MM-DD), got {bad}")
+        df.loc[ok, col] = parsed.dt.strftime("%Y-%m-%d")
+
+
+def _prepare(df, table, columns, pk):
+    unknown = [c for c in df.columns if c not in columns]
+    if unknown:
+        raise ValueError(f"Columns not in {table}: {', '.join(unknown)}")
+    df = df.astype(object).copy()
+    _normalize_keys(df, pk)
+    _normalize_dates(df)
+    if table == "orders" and "is_returned" not in df.columns and "order_status" in df.columns:
+        df["is_returned"] = (df["order_status"] == "Returned").astype(int)
+    if table == "customers" and "tier" not in df.columns:
+        df["tier"] = "Bronze"   # recomputed below from delivered orders
+    cols = [c for c in columns if c in df.columns]
+    df = df[cols].astype(object).where(df[cols].notna(), None)
+    return df, cols
+
+
+def _touched(conn, table, df, upsert):
+    """
+    Days and customers whose derived rows change: the batch's values plus, for
+    upserts, the current values of the rows being overwritten (an order moved
+    to another customer, or a status-only update, still touches its owner).
+    """
+    days, customers = set(), set()
+    if "customer_id" in df.columns:
+        customers.update(df["customer_id"].dropna())
+    if table in ROLLUP_DATES:
+        id_col, date_col = ROLLUP_DATES[table]
+        if date_col in df.columns:
+            days.update(df[date_col].dropna())
+        if upsert:
+            ids = df[id_col].tolist()
+            for lo in range(0, len(ids), 900):
+                part = ids[lo:lo + 900]
+                for d, c in conn.execute(f"SELECT {date_col}, customer_id FROM {table} "
+                                         f"WHERE {id_col} IN ({','.join('?' * len(part))})", part):
+                    days.add(d); customers.add(c)
+    return days, customers
+
+
+def ingest(table, batch, upsert=False, path=None, report=print):
+    """
+    Append (or upsert on the primary key) a batch into `table`.
+    Returns {"table", "rows", "seconds", "rows_per_sec", "tiers_changed", "rollup_days"}.
+    """
+    if table not in INGEST_TABLES:
+        raise ValueError(f"Unknown table {table!r}; expected one of {INGEST_TABLES}")
+    t0 = time.perf_counter()
+    if not os.path.exists(path or database.DB_PATH):
+        raise FileNotFoundError(f"No database at {path or database.DB_PATH}; seed it with init_db() first")
+    df = read_batch(batch)
+    conn = get_connection(path)
+    try:
+        columns, pk = _table_columns(conn, table)
+        df, cols = _prepare(df, table, columns, pk)      # nothing is written before this passes
+        sql = f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+        if upsert:
+            updates = ", ".join(f"{c}=excluded.{c}" for c in cols if c not in pk)
+            sql += f" ON CONFLICT({', '.join(pk)}) DO UPDATE SET {updates}" if updates else " ON CONFLICT DO NOTHING"
+
+        # rows, tiers, rollups and the data version commit together or not at all
+        conn.execute("BEGIN IMMEDIATE")
+        touched_days, touched_customers = _touched(conn, table, df, upsert)
+        for lo in range(0, len(df), CHUNK_ROWS):
+            part = df.iloc[lo:lo + CHUNK_ROWS]
+            conn.executemany(sql, zip(*[part[c].tolist() for c in cols]))
+        tiers_changed = 0
+        if table in ("orders", "customers"):
+            tiers_changed = recompute_tiers(conn, customer_ids=list(touched_customers))
+        days_refreshed = refresh_rollups(conn, table, touched_days, touched_customers, batch=df)
+        bump_data_version(conn, f"ingest:{table}", len(df))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    secs = time.perf_counter() - t0
+    stats = {"table": table, "rows": len(df), "seconds": secs,
+             "rows_per_sec": len(df) / secs if secs else 0.0, "tiers_changed": tiers_changed,
+             "rollup_days": days_refreshed}
+    if report:
+        report(f"Ingested {len(df):,} {table} rows ({'upsert' if upsert else 'append'}) in {secs:.2f}s "
+               f"({stats['rows_per_sec']:,.0f} rows/s), {tiers_changed:,} customer tiers changed, "
+               f"{days_refreshed:,} rollup days refreshed.")
+    return stats
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Append or upsert a batch file into india_ops.db.")
+    ap.add_argument("table", choices=INGEST_TABLES)
+    ap.add_argument("batch", help="CSV, JSON or JSONL file")
+    ap.add_argument("--upsert", action="store_true", help="update rows whose primary key already exists")
+    ap.add_argument("--db", default=None)
+    args = ap.parse_args()
+    ingest(args.table, args.batch, upsert=args.upsert, path=args.db)
@@ -0,0 +1,95 @@
+"""
+loaders.py — Concurrent execution of the dashboard data loaders
+Every loader app.py runs on a rerun is an independent queries.py call, so a
+cache miss no longer has to cost the sum of their latencies: run_loaders()
+runs them in a bounded thread pool (sqlite3 releases the GIL while a
+statement executes, and every call checks out its own pooled reader) and
+records when each one started and finished, so the critical path is visible.
+
+    results, timings = run_loaders({"kpis": (get_kpis, (s, e)), ...})
+
+TAB_DATASETS maps every part of the page to the datasets it reads, so app.py
+only fetches what the visible tab (or a requested report) needs.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# one worker per core (up to 6): the queries are CPU-bound once the pages are cached
+LOADER_WORKERS = int(os.environ.get("INDIA_OPS_LOADER_WORKERS", min(6, os.cpu_count() or 1)))
+
+# dataset -> the queries.py function that produces it
+DATASETS = {
+    "kpis":     "get_kpis",
+    "trend":    "get_revenue_trend",
+    "state_p":  "get_state_performance",
+    "cat_mix":  "get_category_mix",
+    "pay_data": "get_payment_analysis",
+    "temporal": "get_temporal_patterns",
+    "tiers":    "get_customer_tiers",
+    "returns":  "get_return_analysis",
+    "agents":   "get_agent_performance",
+    "tickets":  "get_ticket_analytics",
+    "products": "get_product_performance",
+    "churn":    "get_churn_risk",
+    "weekly_o": "get_weekly_trends",
+    "weekly_c": "get_weekly_csat",
+    "top_cust": "get_top_customers",
+    "zone_cmp": "get_zone_comparison",
+    "yoy":      "get_yoy_comparison",
+    "cohort":   "get_cohort_data",
+}
+
+# what each part of the page reads; "page" (masthead, KPI band, alert count) renders on every run
+TAB_DATASETS = {
+    "page":                  ["kpis", "weekly_o", "weekly_c"],
+    "Revenue & Sales":       ["trend", "yoy", "cat_mix", "temporal", "pay_data"],
+    "Geographic":            ["state_p", "zone_cmp"],
+    "Customer Intelligence": ["tiers", "cohort", "churn", "top_cust"],
+    "Support & Tickets":     ["tickets", "agents"],
+    "Returns & Quality":     ["returns", "products"],
+    "Alerts & Reports":      [],
+    "Raw Data":              [],
+}
+REPORT_DATASETS = ["kpis", "trend", "state_p", "cat_mix", "pay_data", "agents", "tickets", "churn"]
+
+
+def run_loaders(loaders, workers=None, initializer=None):
+    """
+    Run {label: (fn, args)} and return ({label: result}, timings).
+    timings has one row per loader — start / end offsets from the batch
+    start, seconds and the worker thread — slowest first; timings.attrs
+    carries the batch "wall" time and the "critical" (slowest) loader.
+    workers=1 runs the loaders one after another on the calling thread.
+    `initializer` runs once in each worker thread (e.g. to attach the
+    Streamlit script context). A loader's exception is re-raised.
+    """
+    workers = max(1, min(workers or LOADER_WORKERS, len(loaders) or 1))
+    t0 = time.perf_counter()
+    timings = {}
+
+    def timed(label, fn, args):
+        start = time.perf_counter() - t0
+        try:
+            return fn(*args)
+        finally:
+            end = time.perf_counter() - t0
+            timings[label] = (start, end, end - start, threading.current_thread().name)
+
+    if workers == 1:
+        results = {label: timed(label, fn, args) for label, (fn, args) in loaders.items()}
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="loader",
+                                initializer=initializer) as pool:
+            futures = {label: pool.submit(timed, label, fn, args) for label, (fn, args) in loaders.items()}
+            results = {label: f.result() for label, f in futures.items()}
+
+    report = pd.DataFrame([(label, *timings[label]) for label in loaders],
+                          columns=["loader", "start", "end", "seconds", "thread"])
+    report = report.sort_values("seconds", ascending=False).reset_index(drop=True)
+    report.attrs["wall"] = time.perf_counter() - t0
+    report.attrs["critical"] = report["loader"].iloc[0] if len(report) else None
+    return results, report
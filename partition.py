@@ -0,0 +1,113 @@
+"""
+partition.py — Optional year-partitioned layout for india_ops.db
+The main file keeps the masters (agents, customers) plus a `partitions`
+catalog; orders, tickets and returns go to one SQLite file per year, split
+on order_date / created_date / return_date. Pooled readers ATTACH every year
+(see database.attach_partitions) and queries.py routes a [start, end] window
+to the years it overlaps, so a one-year view reads a single file.
+
+Years before `--hot-from` (default: the latest order year) are marked cold and
+attached immutable. Like compact.py this is a read layout: rebuild it from a
+regular database after seeding/ingest.
+
+    python partition.py --src india_ops.db --dst india_ops_part.db
+    INDIA_OPS_DB=india_ops_part.db streamlit run app.py
+"""
+import argparse
+import glob
+import os
+import sqlite3
+import time
+
+from database import DB_PATH, INDEX_SQL, PARTITIONED_TABLES
+from index_advisor import COVERING_INDEXES
+
+MASTER_TABLES = ["agents", "customers"]
+# copied to the main file when the source has them
+ROLLUP_TABLES = ["orders_daily", "orders_weekly", "tickets_weekly", "customer_features", "dim_values"]
+META_TABLES = ["data_versions"]
+
+
+def _ddl(conn, table):
+    return conn.execute("SELECT sql FROM src.sqlite_master WHERE type='table' AND name=?", (table,)).fetchone()[0]
+
+def _copy(conn, table, where="1=1", params=()):
+    conn.execute(_ddl(conn, table))
+    conn.execute(f"INSERT INTO {table} SELECT * FROM src.{table} WHERE {where} ORDER BY rowid", params)
+
+def _index(conn, tables):
+    for stmt in INDEX_SQL.strip().split(";"):
+        if stmt.strip() and stmt.split(" ON ")[1].split("(")[0].strip() in tables:
+            conn.execute(stmt)
+    for name, target in COVERING_INDEXES.items():
+        if target.split("(")[0] in tables:
+            conn.execute(f"CREATE INDEX {name} ON {target}")
+    conn.execute("ANALYZE")
+
+def partition_file(dst, year):
+    stem, ext = os.path.splitext(dst)
+    return f"{stem}_{year}{ext or '.db'}"
+
+
+def build_partitions(src=None, dst="india_ops_part.db", hot_from=None, report=print):
+    """Write a partitioned copy of `src` (main file `dst` + one file per year). Returns per-year row counts."""
+    src = src or DB_PATH
+    for old in [dst] + glob.glob(partition_file(dst, "[0-9]" * 4)):
+        if os.path.exists(old):
+            os.remove(old)
+    t0 = time.perf_counter()
+
+    conn = sqlite3.connect(dst)
+    conn.execute("ATTACH DATABASE ? AS src", (src,))
+    years = sorted({int(y) for table, col in PARTITIONED_TABLES.items()
+                    for (y,) in conn.execute(f"SELECT DISTINCT substr({col}, 1, 4) FROM src.{table}")})
+    hot_from = hot_from or int(conn.execute("SELECT substr(MAX(order_date), 1, 4) FROM src.orders").fetchone()[0])
+
+    # ── Masters + catalog ────────────────────────────────────────────────────
+    for table in MASTER_TABLES:
+        _copy(conn, table)
+    _index(conn, MASTER_TABLES)
+    for table in ROLLUP_TABLES + META_TABLES:
+        if conn.execute("SELECT 1 FROM src.sqlite_master WHERE type='table' AND name=?", (table,)).fetchone():
+            conn.execute(_ddl(conn, table))   # customer_features is WITHOUT ROWID: no rowid order
+            conn.execute(f"INSERT INTO {table} SELECT * FROM src.{table}")
+            for (sql,) in conn.execute("SELECT sql FROM src.sqlite_master WHERE type='index' AND tbl_name=? "
+                                       "AND sql IS NOT NULL", (table,)).fetchall():
+                conn.execute(sql)
+    conn.execute("CREATE TABLE partitions (year INTEGER PRIMARY KEY, file TEXT, cold INTEGER)")
+    conn.executemany("INSERT INTO partitions VALUES (?, ?, ?)",
+                     [(y, os.path.basename(partition_file(dst, y)), int(y < hot_from)) for y in years])
+    conn.commit()
+    conn.close()
+
+    # ── One file per year ────────────────────────────────────────────────────
+    counts = {}
+    for year in years:
+        part = sqlite3.connect(partition_file(dst, year))
+        part.execute("ATTACH DATABASE ? AS src", (src,))
+        for table, col in PARTITIONED_TABLES.items():
+            _copy(part, table, f"{col} BETWEEN ? AND ?", (f"{year}-01-01", f"{year}-12-31"))
+        counts[year] = {t: part.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in PARTITIONED_TABLES}
+        _index(part, PARTITIONED_TABLES)
+        part.commit()
+        part.execute("DETACH DATABASE src")
+        part.execute("VACUUM")
+        part.close()
+        if report:
+            report(f"  {year}{' (cold)' if year < hot_from else ''}: "
+                   + ", ".join(f"{n:,} {t}" for t, n in counts[year].items()))
+
+    if report:
+        report(f"Partitioned layout written to {dst} + {len(years)} year files "
+               f"in {time.perf_counter() - t0:.1f}s")
+    return counts
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Split orders/tickets/returns into one SQLite file per year.")
+    ap.add_argument("--src", default=None, help=f"source database (default: {DB_PATH})")
+    ap.add_argument("--dst", default="india_ops_part.db")
+    ap.add_argument("--hot-from", type=int, default=None,
+                    help="first hot year; earlier years are attached immutable (default: latest order year)")
+    args = ap.parse_args()
+    build_partitions(args.src, args.dst, args.hot_from)
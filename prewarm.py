@@ -0,0 +1,120 @@
+"""
+prewarm.py — Fill the result cache before the first visitor
+Runs the dashboard's loaders for the default view (2024, every filter "All")
+and then for each value of the most used filters (by default every state
+and every category, one filter at a time) through result_cache, so a cold
+dashboard or API request for those views is a cache hit. Reports how long
+it took and how much of the plan is in the cache.
+
+app.py starts it in a background thread from setup() (INDIA_OPS_PREWARM=0
+turns that off); it can also run ahead of a deploy:
+
+    python prewarm.py --db india_ops.db --dims state category zone segment
+"""
+import argparse
+import inspect
+import os
+import threading
+import time
+
+import database
+import queries
+import result_cache
+from loaders import DATASETS, run_loaders
+
+DEFAULT_VIEW   = {"start": "2024-01-01", "end": "2024-12-31",
+                  "state": "All", "zone": "All", "category": "All", "segment": "All"}
+PREWARM_DIMS   = ["state", "category"]
+PREWARM_ON_START = os.environ.get("INDIA_OPS_PREWARM", "1") == "1"
+
+last_report = None     # summary of the latest prewarm() in this process, or {"error": ...} if it failed
+
+
+def warm_plan(dims=PREWARM_DIMS, view=DEFAULT_VIEW):
+    """
+    [(label, fn, kwargs)] — the default view's datasets (plus the filter
+    catalog), then every dataset that takes `dim` once per value of each dim.
+    """
+    fns = [(label, getattr(queries, name)) for label, name in DATASETS.items()]
+    plan = [("dimension_catalog", queries.get_dimension_catalog, {})]
+    plan += [(label, fn, _args(fn, view)) for label, fn in fns]
+    catalog = result_cache.cached(queries.get_dimension_catalog)()
+    for dim in dims:
+        for value in catalog[dim]:
+            filters = {**view, dim: value}
+            plan += [(f"{label}[{dim}={value}]", fn, _args(fn, filters))
+                     for label, fn in fns if dim in inspect.signature(fn).parameters]
+    return plan
+
+
+def _args(fn, filters):
+    return {k: v for k, v in filters.items() if k in inspect.signature(fn).parameters}
+
+
+def coverage(plan):
+    """Share of the plan's results that are in the result cache for the current data version."""
+    version = database.data_version()
+    keys = [result_cache.cache_key(fn, (), kwargs, version)[0] for _, fn, kwargs in plan]
+    return result_cache.contains(keys) / len(keys) if keys else 1.0
+
+
+def prewarm(dims=PREWARM_DIMS, workers=None, report=print):
+    """
+    Run the warm-up plan for database.DB_PATH through result_cache (default
+    view first) and return
+    {"calls", "computed", "cached", "seconds", "default_seconds", "coverage"}.
+    """
+    global last_report
+    t0 = time.perf_counter()
+    plan = warm_plan(dims)
+    before = coverage(plan)
+    misses = result_cache._stats["misses"]
+    default, rest = plan[:len(DATASETS) + 1], plan[len(DATASETS) + 1:]
+    run_loaders({label: (_call(fn, kwargs), ()) for label, fn, kwargs in default}, workers)
+    default_seconds = time.perf_counter() - t0
+    run_loaders({label: (_call(fn, kwargs), ()) for label, fn, kwargs in rest}, workers)
+    last_report = {"calls": len(plan), "computed": result_cache._stats["misses"] - misses,
+                   "cached": round(before * len(plan)), "seconds": time.perf_counter() - t0,
+                   "default_seconds": default_seconds, "coverage": coverage(plan),
+                   "dims": list(dims), "finished_at": time.time()}
+    if report:
+        report(f"Prewarm: {last_report['calls']} results ({', '.join(['default view'] + list(dims))}) "
+               f"in {last_report['seconds']:.1f}s — default view ready after {default_seconds:.1f}s, "
+               f"{last_report['computed']} computed, {last_report['cached']} already cached, "
+               f"coverage {before:.0%} -> {last_report['coverage']:.0%}")
+    return last_report
+
+
+def _call(fn, kwargs):
+    cached = result_cache.cached(fn)
+    return lambda: cached(**kwargs)
+
+
+def prewarm_in_background(dims=PREWARM_DIMS):
+    """
+    Start prewarm() on a daemon thread (app.py setup) and return the thread;
+    if it fails, last_report becomes {"error", "finished_at"} for the app to show.
+    """
+    thread = threading.Thread(target=_prewarm_worker, args=(dims,), name="prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def _prewarm_worker(dims):
+    global last_report
+    try:
+        prewarm(dims, report=None)
+    except Exception as ex:
+        last_report = {"error": f"{type(ex).__name__}: {ex}", "finished_at": time.time()}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Populate the query result cache for the default and common views.")
+    ap.add_argument("--db", default=None, help=f"SQLite file (default: {database.DB_PATH})")
+    ap.add_argument("--dims", nargs="*", default=PREWARM_DIMS,
+                    choices=["state", "zone", "category", "segment"], help="filters warmed one value at a time")
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args()
+    if args.db:
+        database.DB_PATH = args.db
+    prewarm(args.dims, args.workers)
@@ -1,19 +1,259 @@
+import json
+import threading
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
-from database import get_connection
+from database import data_stamp, partitions, reader
+from rollups import DIM_VALUES_SELECT, DIMENSIONS, has_table
 from datetime import datetime, timedelta
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 #  Filter helpers — explicit table alias per function
+#  Helpers emit named placeholders and _bind() supplies the values, so the SQL
+#  text only depends on which filters are active and every rerun reuses the
+#  prepared statement. A filter is a single value, "All"/""/None, or a list
+#  (matched through json_each, so the text is the same for any list length).
 # ─────────────────────────────────────────────────────────────────────────────
-def _state_o(s):   return f"AND o.state = '{s}'"  if s not in ("All","",None) else ""
-def _state_c(s):   return f"AND c.state = '{s}'"  if s not in ("All","",None) else ""
-def _state_t(s):   return f"AND t.state = '{s}'"  if s not in ("All","",None) else ""
-def _state_r(s):   return f"AND r.state = '{s}'"  if s not in ("All","",None) else ""
-def _zone_o(z):    return f"AND o.zone = '{z}'"   if z not in ("All","",None) else ""
-def _cat_o(c):     return f"AND o.category = '{c}'" if c not in ("All","",None) else ""
-def _seg_c(s):     return f"AND c.segment = '{s}'" if s not in ("All","",None) else ""
+def _active(v):
+    if isinstance(v, (list, tuple, set)):
+        return bool(v) and "All" not in v
+    return v not in ("All", "", None)
+
+def _dim(col, key, v):
+    if not _active(v):
+        return ""
+    if isinstance(v, (list, tuple, set)):
+        return f" AND {col} IN (SELECT value FROM json_each(:{key}))"
+    return f" AND {col} = :{key}"
+
+def _state_o(s):   return _dim("o.state", "state", s)
+def _state_c(s):   return _dim("c.state", "state", s)
+def _state_t(s):   return _dim("t.state", "state", s)
+def _state_r(s):   return _dim("r.state", "state", s)
+def _zone_o(z):    return _dim("o.zone", "zone", z)
+def _cat_o(c):     return _dim("o.category", "category", c)
+def _seg_c(s):     return _dim("c.segment", "segment", s)
+
+def _bind(**values):
+    """Named parameters for a query; list filters travel as one JSON array."""
+    return {k: json.dumps(list(v)) if isinstance(v, (list, tuple, set)) else v for k, v in values.items()}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Partition routing — only the years overlapping [start, end] are read
+# ─────────────────────────────────────────────────────────────────────────────
+def _route(table, start, end):
+    """
+    FROM-clause source for a date-windowed read of orders/tickets/returns.
+    Single-file layout: the table itself. Year-partitioned layout: the
+    attached year table(s) overlapping the window; the full TEMP view when
+    the window falls outside every partition.
+    """
+    parts = partitions()
+    if not parts:
+        return table
+    years = [a for y, (a, _) in parts.items() if str(start)[:4] <= str(y) <= str(end)[:4]]
+    if not years:
+        return table
+    if len(years) == 1:
+        return f"{years[0]}.{table}"
+    return "(" + " UNION ALL ".join(f"SELECT * FROM {a}.{table}" for a in years) + ")"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Daily rollup — orders_daily (rollups.py) answers the additive order measures
+#  Its key and summed columns carry the orders names, so filters and SUM(...)
+#  read the same; counts and averages go through the helpers below.
+# ─────────────────────────────────────────────────────────────────────────────
+def _orders_daily(conn, start=None, end=None):
+    """(FROM source, is_rollup): orders_daily once built, else the (routed) orders table."""
+    if has_table(conn, "orders_daily"):
+        return "orders_daily", True
+    return (_route("orders", start, end) if start else "orders"), False
+
+def _count(r):           return "SUM(o.n_orders)" if r else "COUNT(*)"
+def _avg(col, r):        return f"SUM(o.{col})*1.0/SUM(o.n_{col})" if r else f"AVG(o.{col})"
+def _count_if(cond, r):  return f"SUM(CASE WHEN {cond} THEN o.n_orders ELSE 0 END)*1.0" if r else f"SUM(CASE WHEN {cond} THEN 1.0 ELSE 0 END)"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Shared order scan — state / zone / category / payment / product breakdowns
+#  A window's orders are grouped once in SQL by every breakdown dimension
+#  (bounded by the dimension values, not the order count: 32k groups for 240k
+#  orders at 20x) and factorized into NumPy codes; every breakdown is a filter
+#  mask + weighted bincount over the same groups, so the five views, and any
+#  change of the state/zone/category filters, reuse one read. Distinct customers, which do not add up across groups, come from the
+#  window's distinct (state, zone, category, customer) tuples as int32 codes.
+#  Scans are kept per (data_stamp, start, end) for the last few windows.
+# ─────────────────────────────────────────────────────────────────────────────
+SCAN_DIMS     = ["state", "zone", "category", "payment_method", "product_name", "order_status"]
+SCAN_MEASURES = ["final_amount", "discount", "delivery_days"]
+CUSTOMER_DIMS = ["state", "zone", "category"]
+SCAN_CACHE_SIZE = 4
+SCAN_CHUNK_ROWS = 100_000
+
+_scans      = OrderedDict()
+_scans_lock = threading.Lock()
+_scan_locks = {}      # key -> Lock held while that window is being read (concurrent loaders wait)
+
+
+def _order_scan(start, end):
+    """
+    {"codes": {dim: int32 codes}, "labels": {dim: values}, "values": {"n", measure,
+    "n_" + measure: float64}, "customers": {"codes": {...}, "labels": ...}} for
+    [start, end]: one entry per group, plus the distinct-customer tuples.
+    """
+    key = (data_stamp(), str(start), str(end))
+    with _scans_lock:
+        if key in _scans:
+            _scans.move_to_end(key)
+            return _scans[key]
+        lock = _scan_locks.setdefault(key, threading.Lock())
+    try:
+        with lock:
+            with _scans_lock:
+                if key in _scans:
+                    return _scans[key]
+            scan = _read_scan(start, end)
+            with _scans_lock:
+                _scans[key] = scan
+                while len(_scans) > SCAN_CACHE_SIZE:
+                    _scans.popitem(last=False)
+    finally:
+        with _scans_lock:
+            _scan_locks.pop(key, None)
+    return scan
+
+
+def _read_scan(start, end):
+    src, params = _route('orders', start, end), _bind(start=start, end=end)
+    measures = ", ".join(f"SUM(o.{m}), COUNT(o.{m})" for m in SCAN_MEASURES)
+    with reader() as conn:
+        groups = pd.read_sql(f"""SELECT {', '.join('o.' + c for c in SCAN_DIMS)}, COUNT(*), {measures}
+            FROM {src} o
+            WHERE o.order_date BETWEEN :start AND :end
+            GROUP BY {', '.join('o.' + c for c in SCAN_DIMS)}""", conn, params=params)
+        groups.columns = SCAN_DIMS + ["n"] + [p + m for m in SCAN_MEASURES for p in ("", "n_")]
+        scan = {"codes": {}, "labels": {}, "values": {}}
+        for dim in SCAN_DIMS:
+            codes, labels = pd.factorize(groups[dim], use_na_sentinel=False)
+            scan["codes"][dim], scan["labels"][dim] = codes.astype(np.int32), np.asarray(labels, dtype=object)
+        for col in groups.columns[len(SCAN_DIMS):]:
+            scan["values"][col] = groups[col].to_numpy(dtype=float, na_value=0.0)
+        cur = conn.execute(f"""SELECT DISTINCT {', '.join('o.' + c for c in CUSTOMER_DIMS)}, o.customer_id
+            FROM {src} o
+            WHERE o.order_date BETWEEN :start AND :end AND o.order_status != 'Processing'""", params)
+        scan["customers"] = _customer_tuples(cur, scan["labels"])
+    return scan
+
+
+def _customer_tuples(cur, labels):
+    """int32 codes of the distinct (state, zone, category, customer) rows of `cur`, read in chunks."""
+    ids, index = {}, {dim: pd.Index(labels[dim]) for dim in CUSTOMER_DIMS}
+    parts = [[np.zeros(0, dtype=np.int32)] for _ in range(len(CUSTOMER_DIMS) + 1)]
+    while rows := cur.fetchmany(SCAN_CHUNK_ROWS):
+        cols = list(zip(*rows))
+        for part, dim, col in zip(parts, CUSTOMER_DIMS, cols):
+            part.append(index[dim].get_indexer(list(col)).astype(np.int32))
+        parts[-1].append(np.fromiter((ids.setdefault(c, len(ids)) for c in cols[-1]), dtype=np.int32, count=len(rows)))
+    codes = {dim: np.concatenate(part) for dim, part in zip(CUSTOMER_DIMS + ["customer_id"], parts)}
+    return {"codes": codes, "labels": labels, "n_customers": len(ids)}
+
+
+def _in(scan, dim, value, negate=False):
+    """Row mask for a filter value (single, list, or "All" -> every row)."""
+    if not _active(value):
+        return np.ones(len(scan["codes"][dim]), dtype=bool)
+    wanted = list(value) if isinstance(value, (list, tuple, set)) else [value]
+    hit = np.isin(scan["codes"][dim], np.flatnonzero(pd.Index(scan["labels"][dim]).isin(wanted)))
+    return ~hit if negate else hit
+
+
+def _grouped(scan, dims, mask):
+    """
+    Aggregates of the masked groups regrouped by `dims`: a DataFrame with the
+    dim columns plus n, the sum/non-null count of each measure, returned and
+    cancelled. Groups are dense code combinations, so everything is a bincount.
+    """
+    sizes = [max(len(scan["labels"][d]), 1) for d in dims]
+    key = np.zeros(int(mask.sum()), dtype=np.int64)
+    for d, size in zip(dims, sizes):
+        key = key * size + scan["codes"][d][mask]
+    total = int(np.prod(sizes))
+    weights = scan["values"]["n"][mask]
+    n = np.bincount(key, weights=weights, minlength=total)
+    present = np.flatnonzero(n)
+    out = pd.DataFrame({d: scan["labels"][d][idx] if len(scan["labels"][d]) else idx
+                        for d, idx in zip(dims, np.unravel_index(present, sizes))})
+    out["n"] = n[present].astype(np.int64)
+    for m in SCAN_MEASURES:
+        out[m] = np.bincount(key, weights=scan["values"][m][mask], minlength=total)[present]
+        out["n_" + m] = np.bincount(key, weights=scan["values"]["n_" + m][mask], minlength=total)[present].astype(np.int64)
+    status = scan["codes"]["order_status"][mask]
+    for col, label in (("returned", "Returned"), ("cancelled", "Cancelled")):
+        hit = np.isin(status, np.flatnonzero(scan["labels"]["order_status"] == label))
+        out[col] = np.bincount(key, weights=weights * hit, minlength=total)[present].astype(np.int64)
+    return out
+
+
+def _customers_by(scan, dim, category):
+    """Distinct customers of the window's non-Processing orders per `dim` value, within the category filter."""
+    tuples = scan["customers"]
+    mask = _in(tuples, "category", category)
+    codes, size = tuples["codes"][dim][mask], max(tuples["n_customers"], 1)
+    pairs = np.unique(codes.astype(np.int64) * size + tuples["codes"]["customer_id"][mask])
+    counts = np.bincount(pairs // size, minlength=len(scan["labels"][dim]))
+    return pd.Series(counts, index=scan["labels"][dim])
+
+
+def _ratio(a, b):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(b > 0, a / np.where(b > 0, b, 1), np.nan)
+
+
+def _breakdown(view, start, end, state="All", zone="All", category="All"):
+    scan = _order_scan(start, end)
+    live = _in(scan, "order_status", ["Processing"], negate=True)
+    if view in ("state", "zone"):
+        g = _grouped(scan, [view], live & _in(scan, "category", category))
+        df = pd.DataFrame({view: g[view], "revenue": g["final_amount"], "orders": g["n"],
+                           "avg_delivery": _ratio(g["delivery_days"], g["n_delivery_days"]),
+                           "customers": _customers_by(scan, view, category).reindex(g[view]).to_numpy(),
+                           "return_rate": _ratio(g["returned"] * 100.0, g["n"])})
+        if view == "zone":
+            return df[["zone", "revenue", "orders", "avg_delivery", "return_rate", "customers"]] \
+                .sort_values("zone").reset_index(drop=True)
+    elif view == "category":
+        mask = _in(scan, "order_status", ["Cancelled", "Processing"], negate=True) \
+            & _in(scan, "state", state) & _in(scan, "zone", zone)
+        g = _grouped(scan, ["category"], mask)
+        df = pd.DataFrame({"category": g["category"], "revenue": g["final_amount"], "orders": g["n"],
+                           "aov": _ratio(g["final_amount"], g["n_final_amount"]), "discount": g["discount"],
+                           "avg_delivery": _ratio(g["delivery_days"], g["n_delivery_days"])})
+    elif view == "payment":
+        g = _grouped(scan, ["payment_method"], _in(scan, "state", state))
+        df = pd.DataFrame({"payment_method": g["payment_method"], "orders": g["n"], "revenue": g["final_amount"],
+                           "aov": _ratio(g["final_amount"], g["n_final_amount"]),
+                           "cancel_rate": _ratio(g["cancelled"] * 100.0, g["n"])})
+    elif view == "product":
+        g = _grouped(scan, ["product_name", "category"], live & _in(scan, "state", state) & _in(scan, "category", category))
+        df = pd.DataFrame({"product_name": g["product_name"], "category": g["category"], "orders": g["n"],
+                           "revenue": g["final_amount"], "aov": _ratio(g["final_amount"], g["n_final_amount"]),
+                           "avg_discount": _ratio(g["discount"], g["n_discount"]),
+                           "return_rate": _ratio(g["returned"] * 100.0, g["n"])})
+        return df.sort_values("revenue", ascending=False, kind="stable").head(30).reset_index(drop=True)
+    else:
+        raise ValueError(f"Unknown breakdown {view!r}")
+    return df.sort_values("revenue", ascending=False, kind="stable").reset_index(drop=True)
+
+
+BREAKDOWNS = ("state", "zone", "category", "payment", "product")
+
+def get_order_breakdowns(start, end, state="All", zone="All", category="All"):
+    """Every dimension breakdown for one window and filter set, from a single shared scan."""
+    return {view: _breakdown(view, start, end, state, zone, category) for view in BREAKDOWNS}
+
 
 def _delta(a, b):
     try:
@@ -27,140 +267,112 @@ def _delta(a, b):
 #  KPIs
 # ─────────────────────────────────────────────────────────────────────────────
 def get_kpis(start, end, state="All", zone="All", category="All", segment="All"):
-    conn = get_connection()
-    so = _state_o(state); zo = _zone_o(zone); co = _cat_o(category); sgc = _seg_c(segment)
-
-    def _run(s, e):
+    with reader() as conn:
+        so = _state_o(state); zo = _zone_o(zone); co = _cat_o(category); sgc = _seg_c(segment)
+
+        days = max((pd.to_datetime(end)-pd.to_datetime(start)).days, 1)
+        ps = (pd.to_datetime(start)-timedelta(days=days)).strftime("%Y-%m-%d")
+        params = _bind(start=start, end=end, prior_start=ps,
+                       state=state, zone=zone, category=category, segment=segment)
+
+        # One scan per fact table over [prior_start, end]: the prior window ends the
+        # day before :start, so rows dated >= :start are current and the rest prior.
+        # Both stay inner-joined to customers, as before, so rows whose customer
+        # is missing are not counted.
+        cj = "JOIN customers c ON {}.customer_id=c.customer_id"
+        cur, prv = "o.order_date >= :start", "o.order_date < :start"
         q = f"""
         SELECT
-            COALESCE(SUM(o.final_amount),0) AS gmv,
-            COALESCE(SUM(o.discount),0) AS total_discount,
-            COALESCE(SUM(o.gst_amount),0) AS total_gst,
-            COUNT(o.order_id) AS total_orders,
-            COUNT(DISTINCT o.customer_id) AS active_customers,
-            COALESCE(AVG(o.final_amount),0) AS aov,
-            COALESCE(AVG(o.delivery_days),0) AS avg_delivery_days,
-            SUM(CASE WHEN o.order_status='Returned'  THEN 1.0 ELSE 0 END)*100.0/NULLIF(COUNT(*),0) AS return_rate,
-            SUM(CASE WHEN o.order_status='Cancelled' THEN 1.0 ELSE 0 END)*100.0/NULLIF(COUNT(*),0) AS cancel_rate
-        FROM orders o JOIN customers c ON o.customer_id=c.customer_id
-        WHERE o.order_date BETWEEN '{s}' AND '{e}'
+            COALESCE(SUM(CASE WHEN {cur} THEN o.final_amount END),0) AS gmv,
+            COALESCE(SUM(CASE WHEN {prv} THEN o.final_amount END),0) AS p_gmv,
+            COALESCE(SUM(CASE WHEN {cur} THEN o.discount END),0) AS total_discount,
+            COALESCE(SUM(CASE WHEN {cur} THEN o.gst_amount END),0) AS total_gst,
+            COUNT(CASE WHEN {cur} THEN o.order_id END) AS total_orders,
+            COUNT(CASE WHEN {prv} THEN o.order_id END) AS p_total_orders,
+            COUNT(DISTINCT CASE WHEN {cur} THEN o.customer_id END) AS active_customers,
+            COUNT(DISTINCT CASE WHEN {prv} THEN o.customer_id END) AS p_active_customers,
+            COALESCE(AVG(CASE WHEN {cur} THEN o.final_amount END),0) AS aov,
+            COALESCE(AVG(CASE WHEN {prv} THEN o.final_amount END),0) AS p_aov,
+            COALESCE(AVG(CASE WHEN {cur} THEN o.delivery_days END),0) AS avg_delivery_days,
+            SUM(CASE WHEN {cur} AND o.order_status='Returned'  THEN 1.0 ELSE 0 END)*100.0
+                /NULLIF(SUM(CASE WHEN {cur} THEN 1 ELSE 0 END),0) AS return_rate,
+            SUM(CASE WHEN {cur} AND o.order_status='Cancelled' THEN 1.0 ELSE 0 END)*100.0
+                /NULLIF(SUM(CASE WHEN {cur} THEN 1 ELSE 0 END),0) AS cancel_rate
+        FROM {_route('orders', ps, end)} o {cj.format("o")}
+        WHERE o.order_date BETWEEN :prior_start AND :end
           AND o.order_status != 'Processing' {so}{zo}{co}{sgc}"""
-        return pd.read_sql(q, conn).iloc[0]
-
-    days = max((pd.to_datetime(end)-pd.to_datetime(start)).days, 1)
-    ps = (pd.to_datetime(start)-timedelta(days=days)).strftime("%Y-%m-%d")
-    pe = (pd.to_datetime(start)-timedelta(days=1)).strftime("%Y-%m-%d")
-    curr, prev = _run(start, end), _run(ps, pe)
-
-    # CSAT
-    st = _state_t(state)
-    q_csat = f"""SELECT COALESCE(AVG(t.csat_score),0) AS csat
-        FROM tickets t JOIN customers c ON t.customer_id=c.customer_id
-        WHERE t.created_date BETWEEN '{{s}}' AND '{{e}}' {st}{sgc}"""
-    csat_c = pd.read_sql(q_csat.format(s=start, e=end), conn).iloc[0]["csat"]
-    csat_p = pd.read_sql(q_csat.format(s=ps, e=pe),    conn).iloc[0]["csat"]
-
-    # Resolution rate
-    q_res = f"""SELECT SUM(CASE WHEN t.status='Resolved' THEN 1.0 ELSE 0 END)*100.0/NULLIF(COUNT(*),0) AS rr
-        FROM tickets t JOIN customers c ON t.customer_id=c.customer_id
-        WHERE t.created_date BETWEEN '{{s}}' AND '{{e}}' {st}{sgc}"""
-    rr_c = pd.read_sql(q_res.format(s=start, e=end), conn).iloc[0]["rr"] or 0
-    rr_p = pd.read_sql(q_res.format(s=ps,    e=pe),  conn).iloc[0]["rr"] or 0
-
-    conn.close()
+        o = pd.read_sql(q, conn, params=params).iloc[0]
+
+        # CSAT + resolution rate, same split on created_date
+        cur, prv = "t.created_date >= :start", "t.created_date < :start"
+        q = f"""
+        SELECT
+            COALESCE(AVG(CASE WHEN {cur} THEN t.csat_score END),0) AS csat,
+            COALESCE(AVG(CASE WHEN {prv} THEN t.csat_score END),0) AS p_csat,
+            SUM(CASE WHEN {cur} AND t.status='Resolved' THEN 1.0 ELSE 0 END)*100.0
+                /NULLIF(SUM(CASE WHEN {cur} THEN 1 ELSE 0 END),0) AS rr,
+            SUM(CASE WHEN {prv} AND t.status='Resolved' THEN 1.0 ELSE 0 END)*100.0
+                /NULLIF(SUM(CASE WHEN {prv} THEN 1 ELSE 0 END),0) AS p_rr
+        FROM {_route('tickets', ps, end)} t {cj.format("t")}
+        WHERE t.created_date BETWEEN :prior_start AND :end {_state_t(state)}{sgc}"""
+        t = pd.read_sql(q, conn, params=params).iloc[0]
+
+    rr_c, rr_p = t["rr"] or 0, t["p_rr"] or 0
     return {
-        "gmv": float(curr["gmv"]),                       "gmv_delta":       _delta(curr["gmv"], prev["gmv"]),
-        "orders": int(curr["total_orders"]),              "orders_delta":    _delta(curr["total_orders"], prev["total_orders"]),
-        "customers": int(curr["active_customers"]),       "customers_delta": _delta(curr["active_customers"], prev["active_customers"]),
-        "aov": float(curr["aov"]),                        "aov_delta":       _delta(curr["aov"], prev["aov"]),
-        "csat": float(csat_c),                            "csat_delta":      _delta(csat_c, csat_p),
+        "gmv": float(o["gmv"]),                          "gmv_delta":       _delta(o["gmv"], o["p_gmv"]),
+        "orders": int(o["total_orders"]),                 "orders_delta":    _delta(o["total_orders"], o["p_total_orders"]),
+        "customers": int(o["active_customers"]),          "customers_delta": _delta(o["active_customers"], o["p_active_customers"]),
+        "aov": float(o["aov"]),                           "aov_delta":       _delta(o["aov"], o["p_aov"]),
+        "csat": float(t["csat"]),                         "csat_delta":      _delta(t["csat"], t["p_csat"]),
         "resolution": float(rr_c),                        "resolution_delta":_delta(rr_c, rr_p),
-        "avg_delivery": float(curr["avg_delivery_days"]),
-        "return_rate": float(curr["return_rate"] or 0),
-        "cancel_rate": float(curr["cancel_rate"] or 0),
-        "total_discount": float(curr["total_discount"]),
-        "total_gst": float(curr["total_gst"]),
+        "avg_delivery": float(o["avg_delivery_days"]),
+        "return_rate": float(o["return_rate"] or 0),
+        "cancel_rate": float(o["cancel_rate"] or 0),
+        "total_discount": float(o["total_discount"]),
+        "total_gst": float(o["total_gst"]),
     }
 
 
 def get_revenue_trend(start, end, state="All", zone="All", category="All"):
-    conn = get_connection()
-    q = f"""SELECT o.order_date AS date,
-           SUM(o.final_amount) AS revenue, SUM(o.discount) AS discount,
-           COUNT(*) AS orders, SUM(o.gst_amount) AS gst
-    FROM orders o
-    WHERE o.order_date BETWEEN '{start}' AND '{end}'
-      AND o.order_status NOT IN ('Cancelled','Processing')
-      {_state_o(state)}{_zone_o(zone)}{_cat_o(category)}
-    GROUP BY o.order_date ORDER BY o.order_date"""
-    df = pd.read_sql(q, conn); conn.close()
+    with reader() as conn:
+        src, r = _orders_daily(conn, start, end)
+        q = f"""SELECT o.order_date AS date,
+               SUM(o.final_amount) AS revenue, SUM(o.discount) AS discount,
+               {_count(r)} AS orders, SUM(o.gst_amount) AS gst
+        FROM {src} o
+        WHERE o.order_date BETWEEN :start AND :end
+          AND o.order_status NOT IN ('Cancelled','Processing')
+          {_state_o(state)}{_zone_o(zone)}{_cat_o(category)}
+        GROUP BY o.order_date ORDER BY o.order_date"""
+        df = pd.read_sql(q, conn, params=_bind(start=start, end=end, state=state, zone=zone, category=category))
     df["date"] = pd.to_datetime(df["date"])
     return df
 
 
 def get_state_performance(start, end, category="All"):
-    conn = get_connection()
-    q = f"""SELECT o.state,
-           SUM(o.final_amount) AS revenue, COUNT(*) AS orders,
-           AVG(o.delivery_days) AS avg_delivery,
-           COUNT(DISTINCT o.customer_id) AS customers,
-           SUM(CASE WHEN o.order_status='Returned' THEN 1.0 ELSE 0 END)*100.0/NULLIF(COUNT(*),0) AS return_rate
-    FROM orders o
-    WHERE o.order_date BETWEEN '{start}' AND '{end}'
-      AND o.order_status NOT IN ('Processing') {_cat_o(category)}
-    GROUP BY o.state ORDER BY revenue DESC"""
-    df = pd.read_sql(q, conn); conn.close()
-    return df
+    return _breakdown("state", start, end, category=category)
 
 
 def get_category_mix(start, end, state="All", zone="All"):
-    conn = get_connection()
-    q = f"""SELECT o.category,
-           SUM(o.final_amount) AS revenue, COUNT(*) AS orders,
-           AVG(o.final_amount) AS aov, SUM(o.discount) AS discount,
-           AVG(o.delivery_days) AS avg_delivery
-    FROM orders o
-    WHERE o.order_date BETWEEN '{start}' AND '{end}'
-      AND o.order_status NOT IN ('Cancelled','Processing')
-      {_state_o(state)}{_zone_o(zone)}
-    GROUP BY o.category ORDER BY revenue DESC"""
-    df = pd.read_sql(q, conn); conn.close()
-    return df
+    return _breakdown("category", start, end, state=state, zone=zone)
 
 
 def get_payment_analysis(start, end, state="All"):
-    conn = get_connection()
-    q = f"""SELECT o.payment_method, COUNT(*) AS orders,
-           SUM(o.final_amount) AS revenue, AVG(o.final_amount) AS aov,
-           SUM(CASE WHEN o.order_status='Cancelled' THEN 1.0 ELSE 0 END)*100.0/NULLIF(COUNT(*),0) AS cancel_rate
-    FROM orders o
-    WHERE o.order_date BETWEEN '{start}' AND '{end}' {_state_o(state)}
-    GROUP BY o.payment_method ORDER BY revenue DESC"""
-    df = pd.read_sql(q, conn); conn.close()
-    return df
+    return _breakdown("payment", start, end, state=state)
 
 
 def get_temporal_patterns(start, end):
-    conn = get_connection()
-    q = f"""SELECT o.order_date,
-           strftime('%m','%w', o.order_date) AS month_dow,
-           strftime('%m', o.order_date) AS month,
-           strftime('%w', o.order_date) AS dow,
-           SUM(o.final_amount) AS revenue, COUNT(*) AS orders
-    FROM orders o
-    WHERE o.order_date BETWEEN '{start}' AND '{end}'
-      AND o.order_status NOT IN ('Cancelled','Processing')
-    GROUP BY o.order_date ORDER BY o.order_date"""
-    # Fix: strftime can't take two format args — split into two
-    q = f"""SELECT o.order_date,
-           strftime('%m', o.order_date) AS month,
-           strftime('%w', o.order_date) AS dow,
-           SUM(o.final_amount) AS revenue, COUNT(*) AS orders
-    FROM orders o
-    WHERE o.order_date BETWEEN '{start}' AND '{end}'
-      AND o.order_status NOT IN ('Cancelled','Processing')
-    GROUP BY o.order_date ORDER BY o.order_date"""
-    df = pd.read_sql(q, conn); conn.close()
+    with reader() as conn:
+        src, r = _orders_daily(conn, start, end)
+        q = f"""SELECT o.order_date,
+               strftime('%m', o.order_date) AS month,
+               strftime('%w', o.order_date) AS dow,
+               SUM(o.final_amount) AS revenue, {_count(r)} AS orders
+        FROM {src} o
+        WHERE o.order_date BETWEEN :start AND :end
+          AND o.order_status NOT IN ('Cancelled','Processing')
+        GROUP BY o.order_date ORDER BY o.order_date"""
+        df = pd.read_sql(q, conn, params=_bind(start=start, end=end))
     df["date"]       = pd.to_datetime(df["order_date"])
     df["month"]      = df["month"].astype(int)
     df["dow"]        = df["dow"].astype(int)
@@ -170,192 +382,227 @@ def get_temporal_patterns(start, end):
 
 
 def get_customer_tiers(start, end, state="All", segment="All"):
-    conn = get_connection()
-    sc = _state_c(state); sgc = _seg_c(segment)
-    q = f"""SELECT c.tier, c.segment, c.zone, c.age_group, c.status,
-           COUNT(DISTINCT c.customer_id) AS customers,
-           COALESCE(SUM(o.final_amount),0) AS revenue,
-           COALESCE(AVG(o.final_amount),0) AS aov,
-           COUNT(o.order_id) AS orders
-    FROM customers c
-    LEFT JOIN orders o ON c.customer_id=o.customer_id
-      AND o.order_date BETWEEN '{start}' AND '{end}'
-      AND o.order_status NOT IN ('Cancelled','Processing')
-    WHERE 1=1 {sc}{sgc}
-    GROUP BY c.tier, c.segment, c.zone, c.age_group, c.status"""
-    df = pd.read_sql(q, conn); conn.close()
+    with reader() as conn:
+        sc = _state_c(state); sgc = _seg_c(segment)
+        q = f"""SELECT c.tier, c.segment, c.zone, c.age_group, c.status,
+               COUNT(DISTINCT c.customer_id) AS customers,
+               COALESCE(SUM(o.final_amount),0) AS revenue,
+               COALESCE(AVG(o.final_amount),0) AS aov,
+               COUNT(o.order_id) AS orders
+        FROM customers c
+        LEFT JOIN {_route('orders', start, end)} o ON c.customer_id=o.customer_id
+          AND o.order_date BETWEEN :start AND :end
+          AND o.order_status NOT IN ('Cancelled','Processing')
+        WHERE 1=1 {sc}{sgc}
+        GROUP BY c.tier, c.segment, c.zone, c.age_group, c.status"""
+        df = pd.read_sql(q, conn, params=_bind(start=start, end=end, state=state, segment=segment))
     return df
 
 
 def get_return_analysis(start, end, state="All"):
-    conn = get_connection()
-    q = f"""SELECT r.reason, r.refund_status, r.state,
-           COUNT(*) AS returns,
-           SUM(r.refund_amount) AS refund_value,
-           AVG(r.refund_amount) AS avg_refund
-    FROM returns r
-    WHERE r.return_date BETWEEN '{start}' AND '{end}' {_state_r(state)}
-    GROUP BY r.reason, r.refund_status, r.state ORDER BY returns DESC"""
-    df = pd.read_sql(q, conn); conn.close()
+    with reader() as conn:
+        q = f"""SELECT r.reason, r.refund_status, r.state,
+               COUNT(*) AS returns,
+               SUM(r.refund_amount) AS refund_value,
+               AVG(r.refund_amount) AS avg_refund
+        FROM {_route('returns', start, end)} r
+        WHERE r.return_date BETWEEN :start AND :end {_state_r(state)}
+        GROUP BY r.reason, r.refund_status, r.state ORDER BY returns DESC"""
+        df = pd.read_sql(q, conn, params=_bind(start=start, end=end, state=state))
     return df
 
 
 def get_agent_performance(start, end, state="All"):
-    conn = get_connection()
-    q = f"""SELECT a.agent_name, a.team, a.shift,
-           COUNT(t.ticket_id) AS total,
-           SUM(CASE WHEN t.status='Resolved' THEN 1 ELSE 0 END) AS resolved,
-           SUM(CASE WHEN t.status='Escalated' THEN 1 ELSE 0 END) AS escalated,
-           AVG(t.resolution_hours) AS avg_resolution_h,
-           AVG(t.first_response_h) AS avg_frt_h,
-           AVG(t.csat_score) AS avg_csat,
-           SUM(t.is_repeat) AS repeat_contacts
-    FROM agents a JOIN tickets t ON a.agent_id=t.agent_id
-    WHERE t.created_date BETWEEN '{start}' AND '{end}' {_state_t(state)}
-    GROUP BY a.agent_id ORDER BY resolved DESC"""
-    df = pd.read_sql(q, conn); conn.close()
+    with reader() as conn:
+        q = f"""SELECT a.agent_name, a.team, a.shift,
+               COUNT(t.ticket_id) AS total,
+               SUM(CASE WHEN t.status='Resolved' THEN 1 ELSE 0 END) AS resolved,
+               SUM(CASE WHEN t.status='Escalated' THEN 1 ELSE 0 END) AS escalated,
+               AVG(t.resolution_hours) AS avg_resolution_h,
+               AVG(t.first_response_h) AS avg_frt_h,
+               AVG(t.csat_score) AS avg_csat,
+               SUM(t.is_repeat) AS repeat_contacts
+        FROM agents a JOIN {_route('tickets', start, end)} t ON a.agent_id=t.agent_id
+        WHERE t.created_date BETWEEN :start AND :end {_state_t(state)}
+        GROUP BY a.agent_id ORDER BY resolved DESC"""
+        df = pd.read_sql(q, conn, params=_bind(start=start, end=end, state=state))
     return df
 
 
 def get_ticket_analytics(start, end, state="All"):
-    conn = get_connection()
-    q = f"""SELECT t.ticket_category, t.priority,
-           COUNT(*) AS total,
-           AVG(t.resolution_hours) AS avg_res_h,
-           AVG(t.first_response_h) AS avg_frt_h,
-           AVG(t.csat_score) AS avg_csat,
-           SUM(t.is_repeat) AS repeat_contacts,
-           SUM(CASE WHEN t.status='Escalated' THEN 1 ELSE 0 END) AS escalated
-    FROM tickets t
-    WHERE t.created_date BETWEEN '{start}' AND '{end}' {_state_t(state)}
-    GROUP BY t.ticket_category, t.priority ORDER BY total DESC"""
-    df = pd.read_sql(q, conn); conn.close()
+    with reader() as conn:
+        q = f"""SELECT t.ticket_category, t.priority,
+               COUNT(*) AS total,
+               AVG(t.resolution_hours) AS avg_res_h,
+               AVG(t.first_response_h) AS avg_frt_h,
+               AVG(t.csat_score) AS avg_csat,
+               SUM(t.is_repeat) AS repeat_contacts,
+               SUM(CASE WHEN t.status='Escalated' THEN 1 ELSE 0 END) AS escalated
+        FROM {_route('tickets', start, end)} t
+        WHERE t.created_date BETWEEN :start AND :end {_state_t(state)}
+        GROUP BY t.ticket_category, t.priority ORDER BY total DESC"""
+        df = pd.read_sql(q, conn, params=_bind(start=start, end=end, state=state))
     return df
 
 
 def get_product_performance(start, end, state="All", category="All"):
-    conn = get_connection()
-    q = f"""SELECT o.product_name, o.category,
-           COUNT(*) AS orders, SUM(o.final_amount) AS revenue,
-           AVG(o.final_amount) AS aov, AVG(o.discount) AS avg_discount,
-           SUM(CASE WHEN o.order_status='Returned' THEN 1.0 ELSE 0 END)*100.0/NULLIF(COUNT(*),0) AS return_rate
-    FROM orders o
-    WHERE o.order_date BETWEEN '{start}' AND '{end}'
-      AND o.order_status NOT IN ('Processing')
-      {_state_o(state)}{_cat_o(category)}
-    GROUP BY o.product_name, o.category ORDER BY revenue DESC LIMIT 30"""
-    df = pd.read_sql(q, conn); conn.close()
-    return df
+    return _breakdown("product", start, end, state=state, category=category)
 
 
 def get_churn_risk(start, end, state="All", segment="All"):
-    conn = get_connection()
-    sc = _state_c(state); sgc = _seg_c(segment)
-    q = f"""SELECT c.customer_id, c.full_name, c.city, c.state, c.tier, c.segment, c.status,
-           COALESCE(SUM(o.final_amount),0) AS lifetime_value,
-           COALESCE(COUNT(o.order_id),0) AS total_orders,
-           COALESCE(CAST(julianday('{end}')-julianday(MAX(o.order_date)) AS INTEGER), 999) AS days_since_order,
-           COALESCE(AVG(o.final_amount),0) AS avg_order_value
-    FROM customers c
-    LEFT JOIN orders o ON c.customer_id=o.customer_id
-      AND o.order_status NOT IN ('Cancelled','Processing')
-    WHERE 1=1 {sc}{sgc}
-    GROUP BY c.customer_id"""
-    df = pd.read_sql(q, conn); conn.close()
-    np.random.seed(42)
+    with reader() as conn:
+        sc = _state_c(state); sgc = _seg_c(segment)
+        if has_table(conn, "customer_features"):
+            q = f"""SELECT c.customer_id, c.full_name, c.city, c.state, c.tier, c.segment, c.status,
+                   COALESCE(f.lifetime_value,0) AS lifetime_value,
+                   COALESCE(f.total_orders,0) AS total_orders,
+                   COALESCE(CAST(julianday(:end)-julianday(f.last_order_date) AS INTEGER), 999) AS days_since_order,
+                   COALESCE(f.avg_order_value,0) AS avg_order_value
+            FROM customers c
+            LEFT JOIN customer_features f ON c.customer_id=f.customer_id
+            WHERE 1=1 {sc}{sgc}
+            ORDER BY c.customer_id"""
+        else:
+            q = f"""SELECT c.customer_id, c.full_name, c.city, c.state, c.tier, c.segment, c.status,
+                   COALESCE(SUM(o.final_amount),0) AS lifetime_value,
+                   COALESCE(COUNT(o.order_id),0) AS total_orders,
+                   COALESCE(CAST(julianday(:end)-julianday(MAX(o.order_date)) AS INTEGER), 999) AS days_since_order,
+                   COALESCE(AVG(o.final_amount),0) AS avg_order_value
+            FROM customers c
+            LEFT JOIN orders o ON c.customer_id=o.customer_id
+              AND o.order_status NOT IN ('Cancelled','Processing')
+            WHERE 1=1 {sc}{sgc}
+            GROUP BY c.customer_id"""
+        df = pd.read_sql(q, conn, params=_bind(start=start, end=end, state=state, segment=segment))
+    rng = np.random.RandomState(42)   # same draws as np.random.seed(42), without touching global state
     df["churn_score"] = (
         (df["days_since_order"].clip(0,180)/180)*0.45
         + (df["status"]=="Churned").astype(float)*0.40
         + (df["status"]=="At-Risk").astype(float)*0.25
         + (1-df["total_orders"].clip(0,10)/10)*0.10
-        + np.random.uniform(0,0.05,len(df))
+        + rng.uniform(0,0.05,len(df))
     ).clip(0,1)
     return df
 
 
 def get_weekly_trends(weeks=8):
-    conn = get_connection()
-    q = """SELECT strftime('%Y-W%W', o.order_date) AS week,
-           SUM(o.final_amount) AS revenue, COUNT(*) AS orders,
-           AVG(o.delivery_days) AS avg_delivery,
-           SUM(CASE WHEN o.order_status='Returned' THEN 1.0 ELSE 0 END)*100.0/NULLIF(COUNT(*),0) AS return_rate,
-           SUM(CASE WHEN o.order_status='Cancelled' THEN 1.0 ELSE 0 END)*100.0/NULLIF(COUNT(*),0) AS cancel_rate
-    FROM orders o GROUP BY week ORDER BY week DESC LIMIT ?"""
-    df = pd.read_sql(q, conn, params=(weeks,)); conn.close()
+    with reader() as conn:
+        if has_table(conn, "orders_weekly"):
+            # last `weeks` rows of the primary key, whatever the history length
+            q = """SELECT week, revenue, n_orders AS orders,
+                   delivery_days*1.0/n_delivery_days AS avg_delivery,
+                   returned*100.0/NULLIF(n_orders,0) AS return_rate,
+                   cancelled*100.0/NULLIF(n_orders,0) AS cancel_rate
+            FROM orders_weekly ORDER BY week DESC LIMIT ?"""
+        else:
+            q = """SELECT strftime('%Y-W%W', o.order_date) AS week,
+                   SUM(o.final_amount) AS revenue, COUNT(*) AS orders,
+                   AVG(o.delivery_days) AS avg_delivery,
+                   SUM(CASE WHEN o.order_status='Returned' THEN 1.0 ELSE 0 END)*100.0/NULLIF(COUNT(*),0) AS return_rate,
+                   SUM(CASE WHEN o.order_status='Cancelled' THEN 1.0 ELSE 0 END)*100.0/NULLIF(COUNT(*),0) AS cancel_rate
+            FROM orders o GROUP BY week ORDER BY week DESC LIMIT ?"""
+        df = pd.read_sql(q, conn, params=(weeks,))
     return df.iloc[::-1].reset_index(drop=True)
 
 
 def get_weekly_csat(weeks=8):
-    conn = get_connection()
-    q = """SELECT strftime('%Y-W%W', t.created_date) AS week,
-           AVG(t.csat_score) AS avg_csat,
-           SUM(CASE WHEN t.status='Escalated' THEN 1.0 ELSE 0 END)*100.0/NULLIF(COUNT(*),0) AS escalation_rate,
-           COUNT(*) AS total_tickets
-    FROM tickets t GROUP BY week ORDER BY week DESC LIMIT ?"""
-    df = pd.read_sql(q, conn, params=(weeks,)); conn.close()
+    with reader() as conn:
+        if has_table(conn, "tickets_weekly"):
+            q = """SELECT week, csat_score*1.0/n_csat AS avg_csat,
+                   escalated*100.0/NULLIF(n_tickets,0) AS escalation_rate,
+                   n_tickets AS total_tickets
+            FROM tickets_weekly ORDER BY week DESC LIMIT ?"""
+        else:
+            q = """SELECT strftime('%Y-W%W', t.created_date) AS week,
+                   AVG(t.csat_score) AS avg_csat,
+                   SUM(CASE WHEN t.status='Escalated' THEN 1.0 ELSE 0 END)*100.0/NULLIF(COUNT(*),0) AS escalation_rate,
+                   COUNT(*) AS total_tickets
+            FROM tickets t GROUP BY week ORDER BY week DESC LIMIT ?"""
+        df = pd.read_sql(q, conn, params=(weeks,))
     return df.iloc[::-1].reset_index(drop=True)
 
 
+def _features_cover(conn, start, end):
+    """True when [start, end] spans every order and ticket customer_features summarizes."""
+    if not has_table(conn, "customer_features"):
+        return False
+    lo_o, hi_o, lo_t, hi_t = conn.execute(
+        """SELECT MIN(first_order_date), MAX(last_order_date), MIN(first_ticket_date), MAX(last_ticket_date)
+           FROM customer_features""").fetchone()
+    return all(lo is None or (start <= lo and hi <= end) for lo, hi in ((lo_o, hi_o), (lo_t, hi_t)))
+
+
 def get_top_customers(start, end, state="All", segment="All", limit=20):
-    conn = get_connection()
-    sc = _state_c(state); sgc = _seg_c(segment)
-    q = f"""SELECT c.full_name, c.city, c.state, c.tier, c.segment, c.age_group,
-           COUNT(DISTINCT o.order_id) AS orders,
-           SUM(o.final_amount) AS lifetime_value,
-           AVG(o.final_amount) AS aov,
-           COALESCE(AVG(t.csat_score),0) AS csat_avg
-    FROM customers c
-    JOIN orders o ON c.customer_id=o.customer_id
-    LEFT JOIN tickets t ON c.customer_id=t.customer_id
-      AND t.created_date BETWEEN '{start}' AND '{end}'
-    WHERE o.order_date BETWEEN '{start}' AND '{end}'
-      AND o.order_status NOT IN ('Cancelled','Processing') {sc}{sgc}
-    GROUP BY c.customer_id ORDER BY lifetime_value DESC LIMIT {limit}"""
-    df = pd.read_sql(q, conn); conn.close()
+    with reader() as conn:
+        sc = _state_c(state); sgc = _seg_c(segment)
+        if _features_cover(conn, str(start), str(end)):
+            # all-history window: rank the per-customer feature rows by lifetime value
+            q = f"""SELECT c.full_name, c.city, c.state, c.tier, c.segment, c.age_group,
+                   f.total_orders AS orders, f.lifetime_value, f.avg_order_value AS aov,
+                   COALESCE(f.csat_score*1.0/f.n_csat,0) AS csat_avg
+            FROM customer_features f
+            JOIN customers c ON c.customer_id=f.customer_id
+            WHERE f.total_orders > 0 {sc}{sgc}
+            ORDER BY f.lifetime_value DESC LIMIT :limit"""
+            df = pd.read_sql(q, conn, params=_bind(state=state, segment=segment, limit=limit))
+            return df
+        # Order and CSAT aggregates are computed per customer on their own and then
+        # joined (CSAT only for the ranked customers); joining tickets to orders row
+        # by row multiplied each order by the customer's ticket count and inflated
+        # lifetime_value.
+        cj = "JOIN customers c ON c.customer_id=o.customer_id" if sc or sgc else ""
+        q = f"""WITH r AS (
+            SELECT o.customer_id, COUNT(*) AS orders,
+                   SUM(o.final_amount) AS lifetime_value, AVG(o.final_amount) AS aov
+            FROM {_route('orders', start, end)} o {cj}
+            WHERE o.order_date BETWEEN :start AND :end
+              AND o.order_status NOT IN ('Cancelled','Processing') {sc}{sgc}
+            GROUP BY o.customer_id ORDER BY lifetime_value DESC LIMIT :limit)
+        SELECT c.full_name, c.city, c.state, c.tier, c.segment, c.age_group,
+               r.orders, r.lifetime_value, r.aov, COALESCE(t.csat_avg,0) AS csat_avg
+        FROM r
+        JOIN customers c ON c.customer_id=r.customer_id
+        LEFT JOIN (SELECT t.customer_id, AVG(t.csat_score) AS csat_avg
+                   FROM {_route('tickets', start, end)} t
+                   WHERE t.customer_id IN (SELECT customer_id FROM r)
+                     AND t.created_date BETWEEN :start AND :end
+                   GROUP BY t.customer_id) t ON t.customer_id=r.customer_id
+        ORDER BY r.lifetime_value DESC"""
+        df = pd.read_sql(q, conn, params=_bind(start=start, end=end, state=state, segment=segment, limit=limit))
     return df
 
 
 def get_zone_comparison(start, end, category="All"):
-    conn = get_connection()
-    q = f"""SELECT o.zone,
-           SUM(o.final_amount) AS revenue, COUNT(*) AS orders,
-           AVG(o.delivery_days) AS avg_delivery,
-           SUM(CASE WHEN o.order_status='Returned' THEN 1.0 ELSE 0 END)*100.0/NULLIF(COUNT(*),0) AS return_rate,
-           COUNT(DISTINCT o.customer_id) AS customers
-    FROM orders o
-    WHERE o.order_date BETWEEN '{start}' AND '{end}'
-      AND o.order_status NOT IN ('Processing') {_cat_o(category)}
-    GROUP BY o.zone"""
-    df = pd.read_sql(q, conn); conn.close()
-    return df
+    return _breakdown("zone", start, end, category=category)
 
 
 def get_yoy_comparison(state="All", category="All"):
-    conn = get_connection()
-    q = f"""SELECT strftime('%Y', o.order_date) AS year,
-           strftime('%m', o.order_date) AS month_num,
-           strftime('%b', o.order_date) AS month,
-           SUM(o.final_amount) AS revenue,
-           COUNT(*) AS orders,
-           AVG(o.final_amount) AS aov
-    FROM orders o
-    WHERE o.order_status NOT IN ('Cancelled','Processing')
-      {_state_o(state)}{_cat_o(category)}
-    GROUP BY year, month_num ORDER BY year, month_num"""
-    df = pd.read_sql(q, conn); conn.close()
+    with reader() as conn:
+        src, r = _orders_daily(conn)
+        q = f"""SELECT strftime('%Y', o.order_date) AS year,
+               strftime('%m', o.order_date) AS month_num,
+               strftime('%b', o.order_date) AS month,
+               SUM(o.final_amount) AS revenue,
+               {_count(r)} AS orders,
+               {_avg('final_amount', r)} AS aov
+        FROM {src} o
+        WHERE o.order_status NOT IN ('Cancelled','Processing')
+          {_state_o(state)}{_cat_o(category)}
+        GROUP BY year, month_num ORDER BY year, month_num"""
+        df = pd.read_sql(q, conn, params=_bind(state=state, category=category))
     return df
 
 
 def get_cohort_data(state="All", segment="All"):
-    conn = get_connection()
-    sc = _state_c(state); sgc = _seg_c(segment)
-    q = f"""SELECT c.customer_id,
-           strftime('%Y-%m', c.join_date) AS cohort_month,
-           strftime('%Y-%m', o.order_date) AS order_month
-    FROM customers c
-    JOIN orders o ON c.customer_id=o.customer_id
-    WHERE o.order_status NOT IN ('Cancelled','Processing') {sc}{sgc}"""
-    df = pd.read_sql(q, conn); conn.close()
+    with reader() as conn:
+        sc = _state_c(state); sgc = _seg_c(segment)
+        q = f"""SELECT c.customer_id,
+               strftime('%Y-%m', c.join_date) AS cohort_month,
+               strftime('%Y-%m', o.order_date) AS order_month
+        FROM customers c
+        JOIN orders o ON c.customer_id=o.customer_id
+        WHERE o.order_status NOT IN ('Cancelled','Processing') {sc}{sgc}"""
+        df = pd.read_sql(q, conn, params=_bind(state=state, segment=segment))
     if df.empty:
         return pd.DataFrame()
     df["cohort_month"] = pd.to_datetime(df["cohort_month"])
@@ -371,3 +618,22 @@ def get_cohort_data(state="All", segment="All"):
     pivot = pivot[[c for c in sorted(pivot.columns) if c <= 11]]
     pivot.columns = [f"M+{c}" for c in sorted(pivot.columns) if c <= 11]
     return pivot.round(1)
+
+
+def get_dimension_catalog():
+    """
+    Filter values for the sidebar: {"state": [...], "zone": [...], "category":
+    [...], "segment": [...]} sorted, plus {"city": {state: [cities]},
+    "product": {category: [products]}} for cascading filters. Read from the
+    dim_values rollup; scans the raw tables when it is missing.
+    """
+    with reader() as conn:
+        src = "SELECT dim, parent, value FROM dim_values" if has_table(conn, "dim_values") else DIM_VALUES_SELECT
+        rows = conn.execute(f"SELECT * FROM ({src}) ORDER BY 1, 2, 3").fetchall()
+    catalog = {dim: ({} if parent else []) for dim, (_, _, parent) in DIMENSIONS.items()}
+    for dim, parent, value in rows:
+        if isinstance(catalog[dim], dict):
+            catalog[dim].setdefault(parent, []).append(value)
+        else:
+            catalog[dim].append(value)
+    return catalog
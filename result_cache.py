@@ -0,0 +1,209 @@
+"""
+result_cache.py — Persistent query result cache
+Results of queries.py calls are pickled into a small SQLite file (repeated
+text columns stored as categoricals, so entries stay compact), keyed by
+function name, normalized arguments and the version of the data they were
+read from (database.data_version). Entries survive restarts and stay valid
+until the data changes; the file is kept under CACHE_MAX_MB by evicting the
+least recently used entries.
+
+    from result_cache import cached
+    kpis = cached(get_kpis)("2024-01-01", "2024-12-31", state="Kerala")
+"""
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+
+import pandas as pd
+
+import database
+
+CACHE_PATH   = os.environ.get("INDIA_OPS_CACHE", "india_ops_cache.db")
+CACHE_MAX_MB = float(os.environ.get("INDIA_OPS_CACHE_MB", "256"))
+COMPACT_ROWS = 1000   # smaller frames load faster as-is than through a categorical round trip
+
+CACHE_SQL = """
+CREATE TABLE IF NOT EXISTS results (
+    key        TEXT PRIMARY KEY,
+    fn         TEXT,
+    args       TEXT,
+    size       INTEGER,
+    created    REAL,
+    last_used  REAL,
+    value      BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_results_last_used ON results(last_used);
+"""
+
+_lock     = threading.Lock()
+_conn     = {}     # cache path -> connection
+_wrappers = {}
+_inflight = {}     # key -> Lock held while that result is being computed
+_stats    = {"hits": 0, "misses": 0, "evicted": 0, "errors": 0}
+
+
+def _connection():
+    conn = _conn.get(CACHE_PATH)
+    if conn is None:
+        conn = sqlite3.connect(CACHE_PATH, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(CACHE_SQL)
+        _conn[CACHE_PATH] = conn
+    return conn
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Keys
+# ─────────────────────────────────────────────────────────────────────────────
+def _normalize(value):
+    """Equivalent filter values map to one key: "All"/""/None, list order, dates vs strings."""
+    if value in ("", None):
+        return "All"
+    if isinstance(value, (list, tuple, set)):
+        items = sorted(_normalize(v) for v in value)
+        return "All" if not items or "All" in items else items
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m-%d")
+    return value
+
+
+def cache_key(fn, args=(), kwargs=None, version=None):
+    """(key, normalized arguments JSON) for a call of `fn` against data `version`."""
+    bound = inspect.signature(fn).bind(*args, **(kwargs or {}))
+    bound.apply_defaults()
+    norm = json.dumps({k: _normalize(v) for k, v in bound.arguments.items()}, sort_keys=True, default=str)
+    version = database.data_version() if version is None else version
+    raw = json.dumps([fn.__module__, fn.__name__, norm, version], default=str)
+    return hashlib.sha1(raw.encode()).hexdigest(), norm
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Get / put / evict
+# ─────────────────────────────────────────────────────────────────────────────
+def _pack(value):
+    """Pickle `value`; text columns with repeated values go in as categoricals."""
+    restore = {}
+    if isinstance(value, pd.DataFrame) and len(value) >= COMPACT_ROWS:
+        for col in value.columns:
+            dtype = value[col].dtype
+            if (dtype == object or pd.api.types.is_string_dtype(dtype)) and value[col].nunique() <= len(value) // 2:
+                restore[col] = dtype
+        if restore:
+            value = value.astype({col: "category" for col in restore})
+    return pickle.dumps((value, restore), protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _unpack(blob):
+    value, restore = pickle.loads(blob)
+    return value.astype(restore) if restore else value
+
+
+def _get(key):
+    with _lock:
+        conn = _connection()
+        row = conn.execute("SELECT value FROM results WHERE key=?", (key,)).fetchone()
+        if row:
+            conn.execute("UPDATE results SET last_used=? WHERE key=?", (time.time(), key))
+    return _unpack(row[0]) if row else None
+
+
+def _put(key, fn_name, norm, value):
+    blob = _pack(value)
+    now = time.time()
+    with _lock:
+        conn = _connection()
+        conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     (key, fn_name, norm, len(blob), now, now, blob))
+        _evict(conn)
+
+
+def _evict(conn):
+    """Drop least recently used entries until the cache fits CACHE_MAX_MB."""
+    limit = CACHE_MAX_MB * 2**20
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+    if total <= limit:
+        return
+    conn.execute("BEGIN")
+    for key, size in conn.execute("SELECT key, size FROM results ORDER BY last_used").fetchall():
+        if total <= limit * 0.9:
+            break
+        conn.execute("DELETE FROM results WHERE key=?", (key,))
+        total -= size
+        _stats["evicted"] += 1
+    conn.execute("COMMIT")
+
+
+def _lookup(key):
+    try:
+        hit = _get(key)
+    except (sqlite3.Error, pickle.UnpicklingError, EOFError):
+        _stats["errors"] += 1
+        return None
+    if hit is not None:
+        _stats["hits"] += 1
+    return hit
+
+
+def cached(fn):
+    """Disk-cached version of a queries.py function (the same wrapper for every call)."""
+    if fn in _wrappers:
+        return _wrappers[fn]
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        key, norm = cache_key(fn, args, kwargs)
+        hit = _lookup(key)
+        if hit is not None:
+            return hit
+        # one computation per key: concurrent callers (loaders, API clients) wait for it
+        with _lock:
+            lock = _inflight.setdefault(key, threading.Lock())
+        with lock:
+            hit = _lookup(key)
+            if hit is not None:
+                return hit
+            _stats["misses"] += 1
+            try:
+                result = fn(*args, **kwargs)
+                try:
+                    _put(key, fn.__name__, norm, result)
+                except (sqlite3.Error, pickle.PicklingError):
+                    _stats["errors"] += 1
+            finally:
+                with _lock:
+                    _inflight.pop(key, None)
+        return result
+
+    _wrappers[fn] = wrapper
+    return wrapper
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Maintenance
+# ─────────────────────────────────────────────────────────────────────────────
+def cache_stats():
+    with _lock:
+        entries, size = _connection().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+    lookups = _stats["hits"] + _stats["misses"]
+    return {**_stats, "entries": entries, "mb": size / 2**20, "max_mb": CACHE_MAX_MB,
+            "hit_ratio": _stats["hits"] / lookups if lookups else 0.0}
+
+
+def contains(keys):
+    """How many of `keys` have a stored result."""
+    with _lock:
+        conn = _connection()
+        return sum(conn.execute("SELECT 1 FROM results WHERE key=?", (k,)).fetchone() is not None for k in keys)
+
+
+def clear_cache():
+    with _lock:
+        _connection().execute("DELETE FROM results")
@@ -0,0 +1,285 @@
+"""
+rollups.py — Materialized aggregates kept next to the raw tables
+orders_daily holds one row per (order_date, state, zone, category,
+payment_method, order_status) with the order count and the sums/counts of
+final_amount, discount, gst_amount and delivery_days. Its key columns and
+summed measures keep the orders column names, so queries.py reads it with
+the same filters and SUM() expressions it uses on orders.
+
+orders_weekly / tickets_weekly hold one row per '%Y-W%W' week with the
+inputs of the weekly ops and CSAT series, so the alert pipeline reads its
+last 8 weeks by primary key however much history there is.
+
+customer_features holds one row per customer with the lifetime order value,
+count, AOV and first/last order date (delivered, shipped and returned
+orders) plus the CSAT sum/count and first/last ticket date, so churn scoring
+and the all-history customer ranking read one row per customer.
+
+dim_values is the dimension catalog behind the sidebar filters: every
+(dimension, parent, value) present in the data, e.g. ('state', '', 'Kerala'),
+('city', 'Kerala', 'Kochi') or ('product', 'Electronics', 'Laptop').
+
+Built here (app.py builds missing ones on first start); ingest.py refreshes
+the days, weeks and customers a batch touches and adds its new dimension
+values.
+
+    python rollups.py --db india_ops.db
+"""
+import argparse
+import time
+from datetime import date, timedelta
+
+import database
+from database import get_connection
+
+ROLLUP_KEY = ["order_date", "state", "zone", "category", "payment_method", "order_status"]
+
+ORDERS_DAILY_SQL = """
+CREATE TABLE IF NOT EXISTS orders_daily (
+    order_date      TEXT,
+    state           TEXT,
+    zone            TEXT,
+    category        TEXT,
+    payment_method  TEXT,
+    order_status    TEXT,
+    n_orders        INTEGER,
+    final_amount    REAL,
+    n_final_amount  INTEGER,
+    discount        REAL,
+    gst_amount      REAL,
+    delivery_days   INTEGER,
+    n_delivery_days INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_orders_daily_date ON orders_daily(order_date, state, category);
+"""
+
+ORDERS_DAILY_SELECT = f"""
+SELECT {', '.join(ROLLUP_KEY)},
+       COUNT(*), SUM(final_amount), COUNT(final_amount), SUM(discount), SUM(gst_amount),
+       SUM(delivery_days), COUNT(delivery_days)
+FROM orders {{where}}
+GROUP BY {', '.join(ROLLUP_KEY)}
+ORDER BY {', '.join(ROLLUP_KEY)}"""
+
+ORDERS_WEEKLY_SQL = """
+CREATE TABLE IF NOT EXISTS orders_weekly (
+    week            TEXT PRIMARY KEY,
+    n_orders        INTEGER,
+    revenue         REAL,
+    delivery_days   INTEGER,
+    n_delivery_days INTEGER,
+    returned        INTEGER,
+    cancelled       INTEGER
+);
+"""
+
+ORDERS_WEEKLY_SELECT = """
+SELECT strftime('%Y-W%W', order_date) AS week,
+       COUNT(*), SUM(final_amount), SUM(delivery_days), COUNT(delivery_days),
+       SUM(order_status='Returned'), SUM(order_status='Cancelled')
+FROM orders {where}
+GROUP BY week"""
+
+TICKETS_WEEKLY_SQL = """
+CREATE TABLE IF NOT EXISTS tickets_weekly (
+    week        TEXT PRIMARY KEY,
+    n_tickets   INTEGER,
+    csat_score  REAL,
+    n_csat      INTEGER,
+    escalated   INTEGER
+);
+"""
+
+TICKETS_WEEKLY_SELECT = """
+SELECT strftime('%Y-W%W', created_date) AS week,
+       COUNT(*), SUM(csat_score), COUNT(csat_score), SUM(status='Escalated')
+FROM tickets {where}
+GROUP BY week"""
+
+CUSTOMER_FEATURES_SQL = """
+CREATE TABLE IF NOT EXISTS customer_features (
+    customer_id       TEXT PRIMARY KEY,
+    lifetime_value    REAL,
+    total_orders      INTEGER,
+    avg_order_value   REAL,
+    first_order_date  TEXT,
+    last_order_date   TEXT,
+    csat_score        REAL,
+    n_csat            INTEGER,
+    first_ticket_date TEXT,
+    last_ticket_date  TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_customer_features_ltv ON customer_features(lifetime_value);
+"""
+
+# {where} is an "AND customer_id ..." scope, applied to both aggregates and the outer row
+CUSTOMER_FEATURES_SELECT = """
+SELECT customer_id, o.lifetime_value, COALESCE(o.total_orders, 0), o.avg_order_value,
+       o.first_order_date, o.last_order_date,
+       t.csat_score, COALESCE(t.n_csat, 0), t.first_ticket_date, t.last_ticket_date
+FROM customers c
+LEFT JOIN (SELECT customer_id, SUM(final_amount) AS lifetime_value, COUNT(*) AS total_orders,
+                  AVG(final_amount) AS avg_order_value,
+                  MIN(order_date) AS first_order_date, MAX(order_date) AS last_order_date
+           FROM orders WHERE order_status NOT IN ('Cancelled','Processing') {where}
+           GROUP BY customer_id) o USING (customer_id)
+LEFT JOIN (SELECT customer_id, SUM(csat_score) AS csat_score, COUNT(csat_score) AS n_csat,
+                  MIN(created_date) AS first_ticket_date, MAX(created_date) AS last_ticket_date
+           FROM tickets WHERE 1=1 {where}
+           GROUP BY customer_id) t USING (customer_id)
+WHERE 1=1 {where}"""
+
+# dimension -> (source table, value column, parent column or None)
+DIMENSIONS = {
+    "state":    ("orders",    "state",        None),
+    "zone":     ("orders",    "zone",         None),
+    "category": ("orders",    "category",     None),
+    "segment":  ("customers", "segment",      None),
+    "city":     ("customers", "city",         "state"),
+    "product":  ("orders",    "product_name", "category"),
+}
+
+DIM_VALUES_SQL = """
+CREATE TABLE IF NOT EXISTS dim_values (
+    dim     TEXT,
+    parent  TEXT,
+    value   TEXT,
+    PRIMARY KEY (dim, parent, value)
+) WITHOUT ROWID;
+"""
+
+DIM_VALUES_SELECT = "\nUNION ".join(
+    f"SELECT DISTINCT '{dim}', {parent or repr('')}, {col} FROM {table} WHERE {col} IS NOT NULL"
+    for dim, (table, col, parent) in DIMENSIONS.items())
+
+# table -> (DDL, SELECT, source table, source date column)
+ROLLUPS = {
+    "orders_daily":      (ORDERS_DAILY_SQL,      ORDERS_DAILY_SELECT,      "orders",  "order_date"),
+    "orders_weekly":     (ORDERS_WEEKLY_SQL,     ORDERS_WEEKLY_SELECT,     "orders",  "order_date"),
+    "tickets_weekly":    (TICKETS_WEEKLY_SQL,    TICKETS_WEEKLY_SELECT,    "tickets", "created_date"),
+    "customer_features": (CUSTOMER_FEATURES_SQL, CUSTOMER_FEATURES_SELECT, "customers", None),
+    "dim_values":        (DIM_VALUES_SQL,        DIM_VALUES_SELECT,        None,        None),
+}
+
+
+def has_table(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)).fetchone() is not None
+
+
+def build_rollups(path=None, report=print, tables=None):
+    """(Re)build every rollup (or just `tables`) from the raw tables. Returns {table: rows}."""
+    t0 = time.perf_counter()
+    tables = list(tables or ROLLUPS)
+    conn = get_connection(path)
+    conn.execute("BEGIN")
+    for name in tables:
+        ddl, select, _, _ = ROLLUPS[name]
+        conn.execute(f"DROP TABLE IF EXISTS {name}")
+        for stmt in ddl.split(";"):
+            if stmt.strip():
+                conn.execute(stmt)
+        conn.execute(f"INSERT INTO {name} " + select.format(where=""))
+        conn.execute(f"ANALYZE {name}")
+    conn.commit()
+    counts = {name: conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0] for name in tables}
+    conn.close()
+    if report:
+        report(f"Rollups built in {time.perf_counter() - t0:.1f}s: "
+               + ", ".join(f"{name} {n:,} rows" for name, n in counts.items()))
+    return counts
+
+
+def ensure_rollups(path=None, report=None):
+    """Build the rollups the database does not have yet."""
+    conn = get_connection(path)
+    missing = [name for name in ROLLUPS if not has_table(conn, name)]
+    conn.close()
+    if missing:
+        build_rollups(path, report=report, tables=missing)
+
+
+def refresh_orders_daily(conn, dates):
+    """Recompute orders_daily for the given order dates (inside the caller's transaction)."""
+    dates = sorted({d for d in dates if d is not None})
+    if not dates or not has_table(conn, "orders_daily"):
+        return 0
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS _rollup_dates (d TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM temp._rollup_dates")
+    conn.executemany("INSERT OR IGNORE INTO temp._rollup_dates VALUES (?)", [(d,) for d in dates])
+    conn.execute("DELETE FROM orders_daily WHERE order_date IN (SELECT d FROM temp._rollup_dates)")
+    conn.execute("INSERT INTO orders_daily " + ORDERS_DAILY_SELECT.format(
+        where="WHERE order_date IN (SELECT d FROM temp._rollup_dates)"))
+    return len(dates)
+
+
+def week_bounds(day):
+    """('%Y-W%W' key, first day, last day) of the week containing `day` ('YYYY-MM-DD')."""
+    d = date.fromisoformat(str(day)[:10])
+    monday = d - timedelta(days=d.weekday())
+    lo, hi = max(monday, date(d.year, 1, 1)), min(monday + timedelta(days=6), date(d.year, 12, 31))
+    return d.strftime("%Y-W%W"), lo.isoformat(), hi.isoformat()
+
+
+def refresh_weekly(conn, name, dates):
+    """Recompute the weeks of `name` (orders_weekly / tickets_weekly) that contain `dates`."""
+    if not has_table(conn, name):
+        return 0
+    _, select, _, col = ROLLUPS[name]
+    weeks = {week_bounds(d) for d in dates if d is not None}
+    for key, lo, hi in weeks:
+        conn.execute(f"DELETE FROM {name} WHERE week = ?", (key,))
+        conn.execute(f"INSERT INTO {name} " + select.format(where=f"WHERE {col} BETWEEN ? AND ?"), (lo, hi))
+    return len(weeks)
+
+
+def refresh_customer_features(conn, customer_ids):
+    """Recompute customer_features for the given customers. Returns the number refreshed."""
+    ids = {c for c in customer_ids if c is not None}
+    if not ids or not has_table(conn, "customer_features"):
+        return 0
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS _feature_scope (customer_id TEXT PRIMARY KEY) WITHOUT ROWID")
+    conn.execute("DELETE FROM temp._feature_scope")
+    conn.executemany("INSERT OR IGNORE INTO temp._feature_scope VALUES (?)", [(c,) for c in ids])
+    scope = "AND customer_id IN (SELECT customer_id FROM temp._feature_scope)"
+    conn.execute(f"DELETE FROM customer_features WHERE 1=1 {scope}")
+    conn.execute("INSERT INTO customer_features " + CUSTOMER_FEATURES_SELECT.format(where=scope))
+    return len(ids)
+
+
+def refresh_dimensions(conn, table, batch):
+    """Add the dimension values a `table` batch (DataFrame) brings to dim_values. Returns rows added."""
+    rows = set()
+    for dim, (source, col, parent) in DIMENSIONS.items():
+        if source == table and col in batch.columns and (parent is None or parent in batch.columns):
+            pairs = batch[[parent or col, col]].dropna().drop_duplicates()
+            rows.update((dim, p if parent else "", v) for p, v in pairs.itertuples(index=False))
+    if not rows or not has_table(conn, "dim_values"):
+        return 0
+    before = conn.total_changes
+    conn.executemany("INSERT OR IGNORE INTO dim_values VALUES (?, ?, ?)", sorted(rows))
+    return conn.total_changes - before
+
+
+def refresh_rollups(conn, table, dates, customer_ids=(), batch=None):
+    """
+    Bring every rollup fed by `table` up to date for the given dates /
+    customers / batch, inside the caller's transaction (the caller commits).
+    Returns days refreshed.
+    """
+    if batch is not None:
+        refresh_dimensions(conn, table, batch)
+    refresh_customer_features(conn, customer_ids)
+    if table == "orders":
+        refresh_weekly(conn, "orders_weekly", dates)
+        return refresh_orders_daily(conn, dates)
+    if table == "tickets":
+        refresh_weekly(conn, "tickets_weekly", dates)
+        return len({d for d in dates if d is not None})
+    return 0
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Build the materialized rollup tables.")
+    ap.add_argument("--db", default=None, help=f"SQLite file (default: {database.DB_PATH})")
+    args = ap.parse_args()
+    build_rollups(args.db)